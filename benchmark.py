@@ -0,0 +1,341 @@
+#!/usr/bin/env python
+"""reproducible benchmarks of loading and drawing synthetic meshes
+
+the meshes are generated once into the work directory, then each one is
+opened through the interactive MeshViewer/MeshViewerGui path, rendering into
+a hidden window. Without a GPU, use --rendersystem "Tiny Rendering Subsystem"
+together with SDL_VIDEODRIVER=dummy.
+"""
+
+import argparse
+import collections
+import json
+import math
+import os.path
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+import Ogre
+import Ogre.Bites as OgreBites
+
+import ogre_mesh_viewer as viewer
+from ogre_mesh_viewer import RGN_USERDATA, LodGeneration, MeshInspector, MeshViewer, percentile, run_workers
+
+Spec = collections.namedtuple("Spec", ("name", "vertices", "submeshes", "bones", "animations", "lods"))
+
+# growing along one dimension at a time, so a regression can be attributed
+SUITE = (
+    Spec("verts_10k", 10_000, 1, 0, 0, 0),
+    Spec("verts_100k", 100_000, 1, 0, 0, 0),
+    Spec("verts_1m", 1_000_000, 1, 0, 0, 0),
+    Spec("submeshes_100", 100_000, 100, 0, 0, 0),
+    Spec("submeshes_1000", 100_000, 1000, 0, 0, 0),
+    Spec("bones_64", 100_000, 1, 64, 1, 0),
+    Spec("bones_256", 100_000, 1, 256, 1, 0),
+    Spec("animations_32", 100_000, 1, 64, 32, 0),
+    Spec("lods_4", 100_000, 1, 0, 0, 4),
+)
+
+# bump when MeshGenerator writes different files for the same spec
+GENERATOR_VERSION = 2
+
+# lower is better for all of them
+METRICS = ("load_s", "first_frame_s", "frame_ms_p50", "frame_ms_p95", "ui_ms")
+
+def grid_geometry(spec):
+    """(positions, triangles per submesh) of a wavy square grid, split into bands of rows"""
+    n = max(2, math.isqrt(spec.vertices))
+    positions = [(x / (n - 1) - 0.5, 0.05 * math.sin(x * 0.3) * math.cos(y * 0.3), y / (n - 1) - 0.5)
+                 for y in range(n) for x in range(n)]
+
+    quads = [(y * n + x, y * n + x + n, y * n + x + n + 1, y * n + x + 1) for y in range(n - 1) for x in range(n - 1)]
+    per_submesh = -(-len(quads) // spec.submeshes)
+    triangles = []
+    for s in range(spec.submeshes):
+        tris = []
+        for a, b, c, d in quads[s * per_submesh:(s + 1) * per_submesh]:
+            tris.append((a, b, c))
+            tris.append((a, c, d))
+        triangles.append(tris)
+    return positions, triangles
+
+def write_obj(path, positions, triangles):
+    with open(path, "w", encoding="utf-8") as f:
+        for p in positions:
+            f.write(f"v {p[0]:.6f} {p[1]:.6f} {p[2]:.6f}\n")
+        for i, tris in enumerate(triangles):
+            f.write(f"o submesh{i}\n")
+            for a, b, c in tris:
+                f.write(f"f {a + 1} {b + 1} {c + 1}\n")
+
+class MeshGenerator(MeshInspector):
+    """writes the synthetic meshes of run_workers, without any render system"""
+
+    def __init__(self, outdir):
+        MeshInspector.__init__(self, None)
+        # the default material of the manual objects, a render system would create it
+        Ogre.MaterialManager.getSingleton().initialise()
+        self.outdir = outdir
+
+    def _create_skeleton(self, spec):
+        skel = Ogre.SkeletonManager.getSingleton().create(f"{spec.name}.skeleton", RGN_USERDATA, True)
+        parent = None
+        for i in range(spec.bones):
+            bone = skel.createBone(f"bone{i}", i)
+            # a chain across the grid
+            bone.setPosition(0, 0, 1 / spec.bones if parent else -0.5)
+            if parent:
+                parent.addChild(bone)
+            parent = bone
+        skel.setBindingPose()
+
+        for a in range(spec.animations):
+            anim = skel.createAnimation(f"anim{a}", 2)
+            for i in range(spec.bones):
+                track = anim.createNodeTrack(i, skel.getBone(i))
+                for k in range(5):
+                    angle = math.sin(k / 4 * 2 * math.pi + a) * 0.2
+                    track.createNodeKeyFrame(k / 2).setRotation(Ogre.Quaternion(Ogre.Radian(angle), Ogre.Vector3(1, 0, 0)))
+        return skel
+
+    def _assign_bones(self, spec, mesh, positions, used):
+        # two weights per vertex, blending the two closest bones along the chain
+        for sm, vertices in zip(mesh.getSubMeshes(), used):
+            for i, v in enumerate(vertices):
+                pos = (positions[v][2] + 0.5) * (spec.bones - 1)
+                first = min(int(pos), spec.bones - 2)
+                for bone, weight in ((first, 1 - (pos - first)), (first + 1, pos - first)):
+                    vba = Ogre.VertexBoneAssignment()
+                    vba.vertexIndex = i
+                    vba.boneIndex = bone
+                    vba.weight = weight
+                    sm.addBoneAssignment(vba)
+
+    def process(self, infile):
+        # the tasks are specs rather than input files
+        spec = Spec(*infile)
+        positions, triangles = grid_geometry(spec)
+        write_obj(os.path.join(self.outdir, spec.name + ".obj"), positions, triangles)
+
+        # every submesh gets the vertices of its band of rows, so the total matches the .obj
+        # up to the rows shared by neighbouring bands
+        obj = self.scn_mgr.createManualObject(spec.name)
+        used = []
+        for tris in triangles:
+            vertices = sorted({v for tri in tris for v in tri})
+            local = {v: i for i, v in enumerate(vertices)}
+            used.append(vertices)
+
+            obj.begin("BaseWhite", Ogre.RenderOperation.OT_TRIANGLE_LIST, RGN_USERDATA)
+            obj.estimateVertexCount(len(vertices))
+            obj.estimateIndexCount(len(tris) * 3)
+            for v in vertices:
+                p = positions[v]
+                obj.position(*p)
+                obj.normal(0, 1, 0)
+                obj.textureCoord(p[0] + 0.5, p[2] + 0.5)
+            for a, b, c in tris:
+                obj.triangle(local[a], local[b], local[c])
+            obj.end()
+        mesh = obj.convertToMesh(spec.name + ".mesh", RGN_USERDATA)
+        self.scn_mgr.destroyManualObject(obj)
+
+        if spec.bones:
+            skel = self._create_skeleton(spec)
+            viewer.export_skeleton(skel, os.path.join(self.outdir, spec.name + ".skeleton"))
+            mesh._notifySkeleton(skel)
+            self._assign_bones(spec, mesh, positions, used)
+
+        if spec.lods:
+            if viewer.np is None:
+                raise RuntimeError("numpy is required for LOD levels")
+            generation = LodGeneration(mesh, "distance_sphere", "proportional",
+                                       [(2 ** (level + 1), 1 - 0.5 ** (level + 1)) for level in range(spec.lods)])
+            generation.finish()
+            generation.apply()
+
+        Ogre.MeshSerializer().exportMesh(mesh, os.path.join(self.outdir, spec.name + ".mesh"))
+        Ogre.MeshManager.getSingleton().remove(mesh.getHandle())
+
+def generate_assets(outdir, specs, workers):
+    """write the specs that are missing in outdir, returns False on errors"""
+    os.makedirs(outdir, exist_ok=True)
+    # changing a spec must not reuse the old files
+    stamp_path = os.path.join(outdir, "specs.json")
+    stamps = {}
+    if os.path.exists(stamp_path):
+        with open(stamp_path, encoding="utf-8") as f:
+            stamps = json.load(f)
+
+    tasks = [tuple(s) for s in specs
+             if stamps.get(s.name) != [*s, GENERATOR_VERSION] or not os.path.exists(os.path.join(outdir, s.name + ".mesh"))]
+    print(f"Generating {len(tasks)} meshes")
+
+    ok = True
+    for spec, _, error in run_workers(MeshGenerator, (outdir,), tasks, workers):
+        if error:
+            ok = False
+            print(f"{spec[0]}: ERROR {error}")
+            continue
+        print(f"{spec[0]}")
+        stamps[spec[0]] = [*spec, GENERATOR_VERSION]
+
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        json.dump(stamps, f, indent=1)
+    return ok
+
+class BenchmarkViewer(MeshViewer):
+    """the interactive viewer, rendering into a hidden window"""
+    headless = True
+
+    def __init__(self, infile, rendersystem=None, width=1280, height=720):
+        MeshViewer.__init__(self, infile, None)
+        self.next_rendersystem = rendersystem
+        self.size = (width, height)
+
+    def oneTimeConfig(self):
+        # never show the config dialog. Select the render system right away, as shutting down another one, that was
+        # never initialised, fails without a display
+        root = self.getRoot()
+        if self.next_rendersystem:
+            root.setRenderSystem(root.getRenderSystemByName(self.next_rendersystem))
+        elif not root.restoreConfig():
+            root.setRenderSystem(root.getAvailableRenderers()[0])
+        return True
+
+    def createWindow(self, name, w=0, h=0, miscParams=None):
+        return OgreBites.ApplicationContext.createWindow(self, name, *self.size, {"hidden": "true", "vsync": "false"})
+
+    def windowResized(self, win):
+        pass
+
+    def frame(self):
+        start = time.perf_counter()
+        self.getRoot().renderOneFrame()
+        return time.perf_counter() - start
+
+    def measure(self, infile, frames):
+        """metrics of opening infile through the same path as File > Open"""
+        self.infile = infile
+        start = time.perf_counter()
+        self.reload()
+        self.frame()
+        while self.loader is not None:
+            self.frame()
+        load = time.perf_counter() - start
+        first_frame = load + self.frame()
+
+        self.profiler.record()
+        times = sorted(self.frame() * 1000 for _ in range(frames))
+        recorded = self.profiler.recording
+        self.profiler.recording = None
+
+        return {"load_s": load, "first_frame_s": first_frame,
+                "frame_ms_p50": percentile(times, 50), "frame_ms_p95": percentile(times, 95),
+                "ui_ms": sum(r[2] for r in recorded) * 1000 / max(1, len(recorded)),
+                "triangles": self.getRenderWindow().getStatistics().triangleCount}
+
+def run_suite(assetdir, specs, formats, frames, rendersystem):
+    files = [os.path.join(assetdir, s.name + ext) for s in specs for ext in formats]
+
+    homedir = tempfile.mkdtemp(prefix="ogre-meshviewer-bench-")
+    app = BenchmarkViewer(files[0], rendersystem)
+    # MeshViewerGui refers to the application as module global
+    viewer.app = app
+    app.getFSLayer().setHomePath(homedir)
+    results = {}
+    try:
+        app.initApp()
+        for infile in files:
+            results[os.path.basename(infile)] = app.measure(infile, frames)
+            print(format_result(os.path.basename(infile), results[os.path.basename(infile)]))
+    finally:
+        app.closeApp()
+        shutil.rmtree(homedir, ignore_errors=True)
+    return results
+
+def format_result(name, result, previous=None):
+    cells = []
+    for key in METRICS:
+        txt = f"{key} {result[key]:.3f}"
+        if previous and key in previous and previous[key] > 0:
+            txt += f" ({100 * (result[key] / previous[key] - 1):+.0f}%)"
+        cells.append(txt)
+    return f"{name:<20} " + "  ".join(cells)
+
+def compare(results, baseline, tolerance, min_delta):
+    """names and metrics that got slower than the baseline by more than tolerance and min_delta"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        for key in METRICS:
+            # seconds and milliseconds share the absolute threshold in ms
+            scale = 1000 if key.endswith("_s") else 1
+            delta = (result[key] - previous[key]) * scale
+            if result[key] > previous[key] * (1 + tolerance) and delta > min_delta:
+                regressions.append((name, key, previous[key], result[key]))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Ogre Mesh Viewer benchmarks")
+    parser.add_argument("--assets", default=os.path.join(tempfile.gettempdir(), "ogre-meshviewer-bench"),
+                        help="directory of the generated meshes, reused between runs")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="run only the given benchmarks")
+    parser.add_argument("--formats", nargs="+", default=[".mesh", ".obj"], help="file formats to load")
+    parser.add_argument("--frames", type=int, default=120, help="frames to measure the steady state")
+    parser.add_argument("--rendersystem", help="render system to use, e.g. 'Tiny Rendering Subsystem' without GPU")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="number of generator processes")
+    parser.add_argument("--out", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--baseline", default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                           "benchmark_baseline.json"),
+                        help="results to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="relative slowdown reported as regression")
+    parser.add_argument("--min-delta", type=float, default=1, help="absolute slowdown in ms reported as regression")
+    args = parser.parse_args()
+
+    specs = [s for s in SUITE if not args.only or s.name in args.only]
+    if not specs:
+        raise SystemExit(f"unknown benchmarks, choose from {', '.join(s.name for s in SUITE)}")
+    if not generate_assets(args.assets, specs, args.workers):
+        return 1
+
+    results = run_suite(args.assets, specs, args.formats, args.frames, args.rendersystem)
+    report = {"meta": {"ogre": Ogre.__version__, "python": platform.python_version(), "machine": platform.node(),
+                       "rendersystem": args.rendersystem or "", "frames": args.frames,
+                       "date": time.strftime("%Y-%m-%dT%H:%M:%S")},
+              "results": results}
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=1)
+    print(f"Results saved to {args.out}")
+
+    if args.save_baseline:
+        shutil.copyfile(args.out, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against, store one with --save-baseline")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline["meta"].get("machine") != report["meta"]["machine"]:
+        print(f"Warning: baseline was measured on {baseline['meta'].get('machine')}")
+
+    print("Compared to baseline:")
+    for name, result in results.items():
+        print(format_result(name, result, baseline["results"].get(name)))
+
+    regressions = compare(results, baseline["results"], args.tolerance, args.min_delta)
+    for name, key, before, after in regressions:
+        print(f"REGRESSION {name} {key}: {before:.3f} -> {after:.3f}")
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
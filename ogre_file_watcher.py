@@ -0,0 +1,122 @@
+"""change detection of the files shown by ogre_mesh_viewer --watch
+
+kept free of Ogre, so it can be used and tested without it
+"""
+import ctypes
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+
+def material_names(script):
+    """names of the materials defined in a material script"""
+    return re.findall(r'^\s*material\s+("[^"]+"|[^\s{:]+)', script, re.MULTILINE)
+
+class FileWatcher:
+    """reports changes to a set of files, using inotify where available and polling otherwise
+
+    a change is only reported, once the file was quiet for DEBOUNCE seconds,
+    as editors and exporters often write a file in several steps.
+    """
+    DEBOUNCE = 0.05
+    POLL_INTERVAL = 0.25
+    # IN_CLOSE_WRITE | IN_MOVED_TO, which covers writing in place and replacing
+    IN_MASK = 0x08 | 0x80
+
+    def __init__(self):
+        self.files = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+        self._libc = None
+        self._fd = -1
+        self._dirs = {}
+        if sys.platform.startswith("linux"):
+            libc = ctypes.CDLL(None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC) if hasattr(libc, "inotify_init1") else -1
+            if fd >= 0:
+                self._libc = libc
+                self._fd = fd
+
+        self.mode = "inotify" if self._fd >= 0 else "polling"
+        target = self._read_events if self._fd >= 0 else self._poll_files
+        self._thread = threading.Thread(target=target, daemon=True)
+        self._thread.start()
+
+    def watch(self, paths):
+        """replace the watched files"""
+        paths = {os.path.abspath(p) for p in paths}
+        with self.lock:
+            self.files = {p: self._stat(p) for p in paths}
+            self.pending = {}
+
+        if self._fd < 0:
+            return
+        dirs = {os.path.dirname(p) for p in paths}
+        for wd, d in list(self._dirs.items()):
+            if d not in dirs:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+        for d in dirs - set(self._dirs.values()):
+            wd = self._libc.inotify_add_watch(self._fd, d.encode(), self.IN_MASK)
+            if wd >= 0:
+                self._dirs[wd] = d
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _changed(self, path):
+        with self.lock:
+            if path in self.files:
+                self.pending[path] = time.perf_counter()
+
+    def _read_events(self):
+        while not self.closed:
+            if not select.select([self._fd], [], [], 0.2)[0]:
+                continue
+            try:
+                buf = os.read(self._fd, 1 << 16)
+            except BlockingIOError:
+                continue
+            offset = 0
+            while offset < len(buf):
+                wd, _, _, length = struct.unpack_from("iIII", buf, offset)
+                name = buf[offset + 16:offset + 16 + length].rstrip(b"\0").decode(errors="replace")
+                offset += 16 + length
+                if wd in self._dirs:
+                    self._changed(os.path.join(self._dirs[wd], name))
+        os.close(self._fd)
+
+    def _poll_files(self):
+        while not self.closed:
+            time.sleep(self.POLL_INTERVAL)
+            with self.lock:
+                files = list(self.files.items())
+            for path, stat in files:
+                new = self._stat(path)
+                if new != stat:
+                    with self.lock:
+                        if path in self.files:
+                            self.files[path] = new
+                    self._changed(path)
+
+    def poll(self):
+        """the changed files that were quiet long enough"""
+        now = time.perf_counter()
+        with self.lock:
+            ready = [p for p, t in self.pending.items() if now - t >= self.DEBOUNCE]
+            for p in ready:
+                del self.pending[p]
+        return ready
+
+    def close(self):
+        self.closed = True
@@ -1,7 +1,23 @@
 #!/usr/bin/env python
 
+import bisect
+import csv
+import ctypes
+import hashlib
+import json
+import math
+import multiprocessing
 import os.path
+import queue
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
 import time
+import zlib
 
 import tkinter as tk
 from tkinter import filedialog
@@ -12,9 +28,55 @@ import Ogre.Bites as OgreBites
 import Ogre.Overlay
 import Ogre.ImGui as ImGui
 
+from ogre_file_watcher import FileWatcher, material_names
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # only needed for triangle-accurate picking, the GPU efficiency metrics and LOD generation
+
 RGN_MESHVIEWER = "OgreMeshViewer"
 RGN_USERDATA   = "UserData"
 
+MAIN_CAM_NAME = "MeshViewer/Cam"
+BACKGROUND_COLOUR = (.3, .3, .3)
+
+SHADER_CACHE_SIZE = 256 << 20
+
+MESH_EXTENSIONS = (".mesh", ".scene", ".obj", ".fbx", ".ply", ".gltf", ".glb")
+# converted by the assimp codec on every load
+ASSIMP_EXTENSIONS = (".obj", ".fbx", ".ply", ".gltf", ".glb")
+ASSET_CACHE_SIZE = 2048 << 20
+THUMBNAIL_CACHE_SIZE = 256 << 20
+THUMBNAIL_SIZE = 128
+HEADLESS_RENDERSYSTEM = "OpenGL 3+ Rendering Subsystem"
+
+# the pip package installs its plugins here, while its plugins.cfg points at the build tree
+PLUGIN_DIR = os.path.join(os.path.dirname(Ogre.__file__), "OGRE")
+# what MeshInspector needs to load assets, without a render system
+ASSET_PLUGINS = ("Codec_STBI", "Codec_Assimp", "Plugin_DotScene")
+
+# redraws per second, while nothing changes in on demand mode
+IDLE_FPS = 1
+# how often input is polled meanwhile
+IDLE_POLL_INTERVAL = 0.01
+
+BATCHING_MODES = ("Entities", "Static Geometry", "Instancing")
+
+# bone weights per vertex, above which a vertex is reported
+WEIGHT_BUDGET = 4
+
+# window size multiple of the high resolution screenshots
+SCREENSHOT_SCALE = 4
+# frames of a turntable without --frames
+SEQUENCE_FRAMES = 120
+
+# choices for the largest texture side at load time, 0 keeps the textures as they are
+TEXTURE_BUDGETS = (0, 4096, 2048, 1024, 512, 256)
+
+# maximal absolute error per component, when packing vertex elements
+COMPACT_THRESHOLDS = {"normal": 0.002, "texcoord": 0.0005, "colour": 0.002}
+
 VES2STR = ("ERROR", "Position", "Blend Weights", "Blend Indices", "Normal", "Diffuse", "Specular", "Texcoord", "Binormal", "Tangent")
 VET2STR = ("float", "float2", "float3", "float4", "ERROR",
            "short", "short2", "short3", "short4", "ubyte4", "argb", "abgr",
@@ -25,9 +87,14 @@ VET2STR = ("float", "float2", "float3", "float4", "ERROR",
            "byte4", "byte4n", "ubyte4n", "short2n", "short4n", "ushort2n", "ushort4n", "int1010102n",
            "half", "half2", "half3", "half4")
 
+# strategy name, label
+LOD_STRATEGIES = (("distance_sphere", "Distance"), ("screen_ratio_pixel_count", "Screen ratio"))
+# label, name of the reduction method of LodGeneration
+LOD_METHODS = (("Proportional", "proportional"), ("Constant", "constant"))
+
 ROP2STR = ("ERROR", "Point List", "Line List", "Line Strip", "Triangle List", "Triangle Strip", "Triangle Fan")
 
-def show_vertex_decl(decl):
+def show_vertex_decl(rows):
     flags = ImGui.TableFlags_Borders | ImGui.TableFlags_SizingStretchProp
     if not ImGui.BeginTable("vertexDecl", 3, flags):
         return
@@ -36,14 +103,11 @@ def show_vertex_decl(decl):
     ImGui.TableSetupColumn("Buffer")
     ImGui.TableHeadersRow()
 
-    for e in decl.getElements():
+    for row in rows:
         ImGui.TableNextRow()
-        ImGui.TableNextColumn()
-        ImGui.Text(VES2STR[e.getSemantic()])
-        ImGui.TableNextColumn()
-        ImGui.Text(VET2STR[e.getType()])
-        ImGui.TableNextColumn()
-        ImGui.Text(str(e.getSource()))
+        for txt in row:
+            ImGui.TableNextColumn()
+            ImGui.Text(txt)
     ImGui.EndTable()
 
 _rgbcol = ((1, 0.6, 0.6, 1), (0.6, 1, 0.6, 1), (0.6, 0.6, 1, 1))
@@ -63,6 +127,271 @@ def draw_lbl_table_row(lbl, val, valstr = _xyzstr, valcol = _rgbcol):
 def printable(str):
     return str.encode("utf-8", "replace").decode()
 
+def operation_str(op):
+    return ROP2STR[op] if op <= 6 else "Control Points"
+
+def describe_vertex_decl(decl):
+    return [{"semantic": VES2STR[e.getSemantic()], "type": VET2STR[e.getType()], "source": e.getSource()}
+            for e in decl.getElements()]
+
+def describe_mesh(mesh):
+    """plain data description of mesh, as shown in the side panel"""
+    info = {"name": printable(mesh.getName()), "shared_vertices": None, "submeshes": []}
+
+    if mesh.sharedVertexData:
+        info["shared_vertices"] = {"count": mesh.sharedVertexData.vertexCount,
+                                   "declaration": describe_vertex_decl(mesh.sharedVertexData.vertexDeclaration)}
+
+    for sm in mesh.getSubMeshes():
+        smi = {"material": printable(sm.getMaterialName()), "operation": operation_str(sm.operationType),
+               "indices": sm.indexData.indexCount, "index_bits": None, "vertices": None}
+        if sm.indexData.indexCount:
+            smi["index_bits"] = sm.indexData.indexBuffer.getIndexSize() * 8
+        if sm.vertexData:
+            smi["vertices"] = {"count": sm.vertexData.vertexCount,
+                               "declaration": describe_vertex_decl(sm.vertexData.vertexDeclaration)}
+        info["submeshes"].append(smi)
+
+    info["edge_lists"] = mesh.isEdgeListBuilt()
+
+    info["skeleton"] = None
+    animations = []
+    if mesh.hasSkeleton():
+        skel = mesh.getSkeleton()
+        info["skeleton"] = {"name": printable(mesh.getSkeletonName()), "bones": skel.getNumBones()}
+        for i in range(skel.getNumAnimations()):
+            anim = skel.getAnimation(i)
+            animations.append({"name": printable(anim.getName()), "length": anim.getLength(), "type": "skeletal"})
+    for i in range(mesh.getNumAnimations()):
+        anim = mesh.getAnimation(i)
+        animations.append({"name": printable(anim.getName()), "length": anim.getLength(), "type": "vertex"})
+    info["animations"] = animations
+
+    info["lod"] = {"strategy": mesh.getLodStrategy().getName(),
+                   "levels": [mesh.getLodLevel(i).userValue for i in range(1, mesh.getNumLodLevels())]}
+
+    memory = geometry_memory(mesh)
+    info["memory"] = {"buffers": [dict(zip(("buffer", "kind", "count", "stride", "bytes"), r)) for r in memory],
+                      "total": sum(r[4] for r in memory)}
+
+    bounds = mesh.getBounds()
+    info["bounds"] = {"size": [float(v) for v in bounds.getSize()],
+                      "center": [float(v) for v in bounds.getCenter()],
+                      "radius": mesh.getBoundingSphereRadius()}
+    return info
+
+def _decl_rows(decl):
+    return tuple((d["semantic"], d["type"], str(d["source"])) for d in describe_vertex_decl(decl))
+
+def vertex_data_bytes(vdata):
+    decl = vdata.vertexDeclaration
+    sources = {e.getSource() for e in decl.getElements()}
+    return sum(decl.getVertexSize(src) for src in sources) * vdata.vertexCount
+
+# sizes of the structs behind an edge list, assuming 64 bit size_t
+EDGE_TRIANGLE_BYTES = 6 * 8 + 2 * 8 + 16 + 1
+EDGE_BYTES = 6 * 8 + 8
+
+def _binding_rows(label, vdata):
+    decl = vdata.vertexDeclaration
+    binding = vdata.vertexBufferBinding
+    rows = []
+    for src in sorted({e.getSource() for e in decl.getElements()}):
+        stride = binding.getBuffer(src).getVertexSize()
+        rows.append((f"{label} binding {src}", "Vertices", vdata.vertexCount, stride, stride * vdata.vertexCount))
+    return rows
+
+def _index_row(label, kind, idata):
+    isize = idata.indexBuffer.getIndexSize()
+    return label, kind, idata.indexCount, isize, isize * idata.indexCount
+
+def lod_index_data(sm, level):
+    """index data of sm at LOD level, as SubMesh.mLodFaceList is not wrapped"""
+    op = Ogre.RenderOperation()
+    sm._getRenderOperation(op, level)
+    return op.indexData
+
+def _triangle_count(sm, idata):
+    count = idata.indexCount
+    if sm.operationType == Ogre.RenderOperation.OT_TRIANGLE_LIST:
+        return count // 3
+    if sm.operationType in (Ogre.RenderOperation.OT_TRIANGLE_STRIP, Ogre.RenderOperation.OT_TRIANGLE_FAN):
+        return max(0, count - 2)
+    return 0
+
+def geometry_memory(mesh):
+    """(buffer, kind, count, stride, bytes) of everything mesh keeps in memory"""
+    rows = []
+    if mesh.sharedVertexData:
+        rows += _binding_rows("Shared", mesh.sharedVertexData)
+
+    for i, sm in enumerate(mesh.getSubMeshes()):
+        if not sm.useSharedVertices and sm.vertexData:
+            rows += _binding_rows(f"SubMesh #{i}", sm.vertexData)
+        if sm.indexData.indexCount:
+            rows.append(_index_row(f"SubMesh #{i}", "Indices", sm.indexData))
+
+    for level in range(1, mesh.getNumLodLevels()):
+        usage = mesh.getLodLevel(level)
+        if usage.manualName:
+            if usage.manualMesh:
+                nbytes = sum(r[4] for r in geometry_memory(usage.manualMesh))
+                rows.append((f"LOD {level} {printable(usage.manualName)}", "Manual LOD", 1, nbytes, nbytes))
+            continue
+        for i, sm in enumerate(mesh.getSubMeshes()):
+            idata = lod_index_data(sm, level)
+            if idata.indexCount:
+                rows.append(_index_row(f"LOD {level} SubMesh #{i}", "LOD Indices", idata))
+
+    if mesh.isEdgeListBuilt():
+        # EdgeData is not wrapped, so count the triangles it was built from. A closed mesh has 3/2 edges per triangle
+        for level in range(mesh.getNumLodLevels()):
+            if level and mesh.getLodLevel(level).manualName:
+                continue
+            triangles = sum(_triangle_count(sm, lod_index_data(sm, level))
+                            for sm in mesh.getSubMeshes() if sm.isBuildEdgesEnabled())
+            edges = triangles * 3 // 2
+            rows.append((f"Edge list LOD {level}", "Edge List", triangles + edges, EDGE_TRIANGLE_BYTES,
+                         triangles * EDGE_TRIANGLE_BYTES + edges * EDGE_BYTES))
+
+    submeshes = mesh.getSubMeshes()
+    for pose in mesh.getPoseList():
+        # the offset map is not wrapped, count the dense buffer hardware pose animation uses instead
+        target = pose.getTarget()
+        vdata = mesh.sharedVertexData if target == 0 else submeshes[target - 1].vertexData
+        stride = 24 if pose.getIncludesNormals() else 12
+        rows.append((f"Pose {printable(pose.getName())}", "Pose", vdata.vertexCount, stride, vdata.vertexCount * stride))
+
+    for i in range(mesh.getNumAnimations()):
+        anim = mesh.getAnimation(i)
+        for handle in range(len(mesh.getSubMeshes()) + 1):
+            if not anim.hasVertexTrack(handle):
+                continue
+            track = anim.getVertexTrack(handle)
+            if track.getAnimationType() != Ogre.VAT_MORPH:
+                continue
+            nbytes = sum(track.getVertexMorphKeyFrame(k).getVertexBuffer().getSizeInBytes()
+                         for k in range(track.getNumKeyFrames()))
+            rows.append((f"Morph {printable(anim.getName())} #{handle}", "Morph", track.getNumKeyFrames(),
+                         nbytes // max(1, track.getNumKeyFrames()), nbytes))
+    return rows
+
+def format_bytes(n):
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+class SubMeshInfo:
+    """display strings and sort keys of a submesh"""
+    __slots__ = ("label", "material", "material_label", "operation", "indices", "vertices", "vertex_decl",
+                 "vertex_count", "index_count", "nbytes", "row", "search")
+
+    def __init__(self, i, sm):
+        self.label = f"SubMesh #{i}"
+        # keep the original name to look the material up
+        self.material = sm.getMaterialName()
+        self.material_label = "\uf1b2 " + printable(self.material)
+        self.operation = f"Operation: {operation_str(sm.operationType)}"
+
+        self.index_count = sm.indexData.indexCount
+        self.nbytes = 0
+        if self.index_count:
+            isize = sm.indexData.indexBuffer.getIndexSize()
+            self.indices = f"Indices: {self.index_count} ({isize * 8} bit)"
+            self.nbytes += isize * self.index_count
+        else:
+            self.indices = "Indices: None"
+
+        if sm.vertexData:
+            self.vertex_count = sm.vertexData.vertexCount
+            self.vertices = f"Vertices: {self.vertex_count}"
+            self.vertex_decl = _decl_rows(sm.vertexData.vertexDeclaration)
+            self.nbytes += vertex_data_bytes(sm.vertexData)
+        else:
+            self.vertex_count = 0
+            self.vertices = "Vertices: shared"
+            self.vertex_decl = None
+
+        vcount = str(self.vertex_count) if sm.vertexData else "shared"
+        self.row = (f"#{i}", printable(self.material), vcount, str(self.index_count), format_bytes(self.nbytes))
+        self.search = f"#{i} {self.material}".lower()
+
+class MeshInfo:
+    """snapshot of everything the side panel shows about an entity
+
+    querying Ogre through the bindings every frame is more expensive than
+    drawing, so this is built once per entity and dropped on reload.
+    """
+    __slots__ = ("entity", "title", "shared_vertices", "shared_decl", "submeshes", "edge_lists",
+                 "skeleton", "vertex_animation", "animations", "lod_strategy", "lod_labels",
+                 "memory", "memory_total", "size", "center", "radius")
+
+    def __init__(self, entity):
+        mesh = entity.getMesh()
+        self.entity = entity
+        self.title = "\uf016 " + printable(mesh.getName())
+
+        if mesh.sharedVertexData:
+            self.shared_vertices = f"Shared Vertices: {mesh.sharedVertexData.vertexCount}"
+            self.shared_decl = _decl_rows(mesh.sharedVertexData.vertexDeclaration)
+        else:
+            self.shared_vertices = "Shared Vertices: None"
+            self.shared_decl = None
+
+        self.submeshes = tuple(SubMeshInfo(i, sm) for i, sm in enumerate(mesh.getSubMeshes()))
+        self.edge_lists = mesh.isEdgeListBuilt()
+
+        self.skeleton = f"\uf183 Skeleton: {printable(mesh.getSkeletonName())}" if entity.hasSkeleton() else None
+        self.vertex_animation = mesh.hasVertexAnimation()
+        animations = entity.getAllAnimationStates()
+        self.animations = tuple(animations.getAnimationStates().items()) if animations is not None else None
+
+        self.lod_strategy = f"Strategy: {mesh.getLodStrategy().getName()}"
+        self.lod_labels = tuple("Base Mesh" if i == 0 else f"Level {i}: {mesh.getLodLevel(i).userValue:.2f}"
+                                for i in range(mesh.getNumLodLevels()))
+
+        # a list, as the table sorts it in place
+        self.memory = geometry_memory(mesh)
+        self.memory_total = sum(r[4] for r in self.memory)
+
+        bounds = mesh.getBounds()
+        self.size = tuple(bounds.getSize())
+        self.center = tuple(bounds.getCenter())
+        self.radius = mesh.getBoundingSphereRadius()
+
+    def __setattr__(self, name, value):
+        if hasattr(self, name):
+            raise AttributeError(f"MeshInfo is immutable, cannot set '{name}'")
+        object.__setattr__(self, name, value)
+
+def summarize_info(info):
+    if "error" in info:
+        return f"ERROR {info['error']}"
+    if "meshes" in info:
+        total = sum(m["memory"]["total"] for m in info["meshes"] if "memory" in m)
+        return f"scene with {len(info['meshes'])} meshes, {format_bytes(total)} geometry"
+
+    nverts = sum(sm["vertices"]["count"] for sm in info["submeshes"] if sm["vertices"])
+    if info["shared_vertices"]:
+        nverts += info["shared_vertices"]["count"]
+    skel = f", {info['skeleton']['bones']} bones" if info["skeleton"] else ""
+    # entries cached before the memory was reported
+    memory = f", {format_bytes(info['memory']['total'])} geometry" if "memory" in info else ""
+    return f"{len(info['submeshes'])} submeshes, {nverts} vertices, " \
+           f"{len(info['lod']['levels']) + 1} LODs, {len(info['animations'])} animations{skel}{memory}"
+
+def find_assets(path):
+    """all loadable files below path, in a stable order"""
+    found = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for fn in sorted(filenames):
+            if fn.lower().endswith(MESH_EXTENSIONS):
+                found.append(os.path.join(dirpath, fn))
+    return found
+
 def askopenfilename(initialdir=None):
     infile = filedialog.askopenfilename(
         title="Select Mesh File",
@@ -72,6 +401,14 @@ def askopenfilename(initialdir=None):
                    ("Common mesh files", "*.obj *.fbx *.ply *.gltf *.glb ")])
     return infile
 
+def asksavefilename(initialdir=None, initialfile=None):
+    return filedialog.asksaveasfilename(
+        title="Save Mesh File",
+        initialdir=initialdir,
+        initialfile=initialfile,
+        defaultextension=".mesh",
+        filetypes=[("Ogre files", "*.mesh")])
+
 class GridFloor:
     def __init__(self, scale, parent_node):
         self.material = Ogre.MaterialManager.getSingleton().create("VertexColour", RGN_MESHVIEWER)
@@ -84,6 +421,9 @@ class GridFloor:
 
         self.planes = [self._create_plane(i) for i in range(3)]
 
+    def set_scale(self, scale):
+        self.plane_node.setScale(scale, scale, scale)
+
     def show_plane(self, plane):
         for i, grid in enumerate(self.planes):
             grid.setVisible(i == plane)
@@ -142,18 +482,1806 @@ class MaterialCreator(Ogre.MeshSerializerListener):
 
     def processMeshCompleted(self, mesh): pass
 
-class LogWindow(Ogre.LogListener):
+def read_buffer(buf):
+    """copy of the content of a hardware buffer as numpy uint8 array"""
+    size = buf.getSizeInBytes()
+    ptr = buf.lock(Ogre.HardwareBuffer.HBL_READ_ONLY)
+    try:
+        data = (ctypes.c_ubyte * size).from_address(int(ptr))
+        return np.frombuffer(data, dtype=np.uint8).copy()
+    finally:
+        buf.unlock()
+
+def read_element(vdata, elem, data=None):
+    """values of a float or half vertex element as (N, components) float32 array
+
+    data is the content of the buffer of elem, if it was already read
+    """
+    vtype = VET2STR[elem.getType()]
+    if vtype.startswith("float"):
+        dtype = np.float32
+    elif vtype.startswith("half"):
+        dtype = np.float16
+    else:
+        raise ValueError(f"unsupported element type {vtype}")
+    ncomp = int(vtype[-1]) if vtype[-1].isdigit() else 1
+
+    buf = vdata.vertexBufferBinding.getBuffer(elem.getSource())
+    if data is None:
+        data = read_buffer(buf)
+    vsize = buf.getVertexSize()
+    offset = vdata.vertexStart * vsize + elem.getOffset()
+    values = np.ndarray((vdata.vertexCount, ncomp), dtype, data, offset, (vsize, np.dtype(dtype).itemsize))
+    return values.astype(np.float32)
+
+def read_positions(vdata):
+    """vertex positions of vdata as (N, 3) float32 array"""
+    return read_element(vdata, vdata.vertexDeclaration.findElementBySemantic(Ogre.VES_POSITION))[:, :3]
+
+def read_indices(idata):
+    ibuf = idata.indexBuffer
+    itype = np.uint16 if ibuf.getIndexSize() == 2 else np.uint32
+    return read_buffer(ibuf).view(itype)[idata.indexStart:idata.indexStart + idata.indexCount]
+
+def write_buffer(buf, data, offset=0):
+    """overwrite the content of a hardware buffer, starting at offset bytes"""
+    data = np.ascontiguousarray(data)
+    ptr = buf.lock(offset, data.nbytes, Ogre.HardwareBuffer.HBL_NORMAL)
+    try:
+        ctypes.memmove(int(ptr), data.ctypes.data, data.nbytes)
+    finally:
+        buf.unlock()
+
+def read_submesh_indices(mesh, sm):
+    """vertex data and the triangles of sm as (T, 3) index array, None if sm has no triangles
+
+    strips are unrolled with consistent winding, so every triangle faces the way it is rendered
+    """
+    op = sm.operationType
+    if op not in (Ogre.RenderOperation.OT_TRIANGLE_LIST, Ogre.RenderOperation.OT_TRIANGLE_STRIP,
+                  Ogre.RenderOperation.OT_TRIANGLE_FAN):
+        return None
+
+    vdata = mesh.sharedVertexData if sm.useSharedVertices else sm.vertexData
+
+    if sm.indexData.indexCount:
+        idx = read_indices(sm.indexData)
+    else:
+        idx = np.arange(vdata.vertexCount, dtype=np.uint32)
+
+    if op == Ogre.RenderOperation.OT_TRIANGLE_LIST:
+        tris = idx[:len(idx) // 3 * 3].reshape(-1, 3)
+    elif op == Ogre.RenderOperation.OT_TRIANGLE_STRIP:
+        tris = np.stack([idx[:-2], idx[1:-1], idx[2:]], axis=1)
+        tris[1::2, :2] = tris[1::2, 1::-1]
+    else:
+        tris = np.stack([np.full(len(idx) - 2, idx[0]), idx[1:-1], idx[2:]], axis=1)
+
+    return vdata, tris
+
+def read_submesh_triangles(mesh, sm):
+    """corners of the triangles of sm as (T, 3, 3) array, None if sm has no triangles"""
+    res = read_submesh_indices(mesh, sm)
+    if res is None:
+        return None
+    vdata, tris = res
+    return read_positions(vdata)[tris]
+
+def _spread_bits(x):
+    """insert two zero bits after each of the lower 10 bits, for morton codes"""
+    x = x.astype(np.uint32) & 0x3FF
+    x = (x | (x << 16)) & 0x030000FF
+    x = (x | (x << 8)) & 0x0300F00F
+    x = (x | (x << 4)) & 0x030C30C3
+    x = (x | (x << 2)) & 0x09249249
+    return x
+
+class TriangleBVH:
+    """bounding volume hierarchy over the triangles of a mesh, for picking
+
+    the triangles are sorted along a morton curve and grouped into leaves of
+    LEAF_SIZE, so building is a handful of vectorised passes. The tree is a
+    complete binary tree in heap layout: node i has the children 2i+1, 2i+2.
+    Traversal tests all nodes of a level at once.
+    """
+    LEAF_SIZE = 16
+    START_NODES = 256
+    _CHILDREN = np.array([1, 2]) if np else None
+    _GRANDCHILDREN = np.array([3, 4, 5, 6]) if np else None
+
+    def __init__(self, mesh):
+        corners = []
+        submesh = []
+        triangle = []
+        for i, sm in enumerate(mesh.getSubMeshes()):
+            tris = read_submesh_triangles(mesh, sm)
+            if tris is None or not len(tris):
+                continue
+            corners.append(tris)
+            submesh.append(np.full(len(tris), i, dtype=np.int32))
+            triangle.append(np.arange(len(tris), dtype=np.int32))
+
+        self.count = sum(len(c) for c in corners)
+        if not self.count:
+            return
+
+        corners = np.concatenate(corners)
+        # element-wise over the corners is much faster than reducing along a length 3 axis
+        centroids = (corners[:, 0] + corners[:, 1] + corners[:, 2]) / 3
+        lo = centroids.min(axis=0)
+        extent = np.maximum(centroids.max(axis=0) - lo, 1e-30)
+        q = (centroids - lo) / extent * 1023
+        codes = _spread_bits(q[:, 0]) | (_spread_bits(q[:, 1]) << 1) | (_spread_bits(q[:, 2]) << 2)
+        order = np.argsort(codes, kind="stable")
+
+        corners = corners[order]
+        self.submesh = np.concatenate(submesh)[order]
+        self.triangle = np.concatenate(triangle)[order]
+        self.v0 = corners[:, 0]
+        self.e1 = corners[:, 1] - self.v0
+        self.e2 = corners[:, 2] - self.v0
+
+        used = -(-self.count // self.LEAF_SIZE)
+        self.nleaves = 1 << (used - 1).bit_length()
+
+        # (min, max) corners per node. Empty nodes get NaN bounds, so they are never hit
+        self.bounds = np.full((2 * self.nleaves - 1, 2, 3), np.nan, dtype=np.float32)
+        starts = np.arange(used) * self.LEAF_SIZE
+        first_leaf = self.nleaves - 1
+        tri_min = np.minimum(np.minimum(corners[:, 0], corners[:, 1]), corners[:, 2])
+        tri_max = np.maximum(np.maximum(corners[:, 0], corners[:, 1]), corners[:, 2])
+        self.bounds[first_leaf:first_leaf + used, 0] = np.minimum.reduceat(tri_min, starts)
+        self.bounds[first_leaf:first_leaf + used, 1] = np.maximum.reduceat(tri_max, starts)
+
+        # a level with n nodes starts at index n - 1
+        n = self.nleaves
+        while n > 1:
+            children = self.bounds[n - 1:2 * n - 1].reshape(-1, 2, 2, 3)
+            self.bounds[n // 2 - 1:n - 1, 0] = np.fmin(children[:, 0, 0], children[:, 1, 0])
+            self.bounds[n // 2 - 1:n - 1, 1] = np.fmax(children[:, 0, 1], children[:, 1, 1])
+            n //= 2
+
+    def intersect(self, origin, direction):
+        """(distance, submesh index, triangle id) of the closest hit or None"""
+        if not self.count:
+            return None
+
+        o = np.array(origin, dtype=np.float32)
+        d = np.array(direction, dtype=np.float32)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # avoid 0 * inf = NaN in the slab test
+            inv_d = 1 / np.where(d == 0, 1e-30, d)
+
+            # skip the top of the tree and descend two levels per step, to save numpy calls
+            first_leaf = self.nleaves - 1
+            n = min(self.nleaves, self.START_NODES)
+            nodes = np.arange(n - 1, 2 * n - 1)
+            while True:
+                t = (self.bounds[nodes] - o) * inv_d
+                near = np.minimum(t[:, 0], t[:, 1])
+                far = np.maximum(t[:, 0], t[:, 1])
+                tmin = np.maximum(np.maximum(near[:, 0], near[:, 1]), near[:, 2])
+                tmax = np.minimum(np.minimum(far[:, 0], far[:, 1]), far[:, 2])
+                nodes = nodes[tmax >= np.maximum(tmin, 0)]
+                if not len(nodes):
+                    return None
+                if nodes[0] >= first_leaf:
+                    break
+                if 4 * nodes[0] + 3 <= first_leaf:
+                    nodes = (4 * nodes[:, None] + self._GRANDCHILDREN).ravel()
+                else:
+                    nodes = (2 * nodes[:, None] + self._CHILDREN).ravel()
+
+            tris = ((nodes - first_leaf)[:, None] * self.LEAF_SIZE + np.arange(self.LEAF_SIZE)).ravel()
+            tris = tris[tris < self.count]
+
+            # Moeller-Trumbore on all candidates at once
+            e1, e2 = self.e1[tris], self.e2[tris]
+            p = np.cross(d, e2)
+            det = np.einsum("ij,ij->i", e1, p)
+            inv_det = 1 / det
+            s = o - self.v0[tris]
+            u = np.einsum("ij,ij->i", s, p) * inv_det
+            q = np.cross(s, e1)
+            v = (q @ d) * inv_det
+            t = np.einsum("ij,ij->i", q, e2) * inv_det
+
+        valid = (np.abs(det) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0)
+        if not valid.any():
+            return None
+
+        best = np.flatnonzero(valid)[np.argmin(t[valid])]
+        tri = tris[best]
+        return float(t[best]), int(self.submesh[tri]), int(self.triangle[tri])
+
+def simulate_fifo(items, size):
+    """the items that miss a FIFO cache with room for size items, in order of access"""
+    items = items.tolist()
+    # number of misses when the item entered the cache
+    stamps = [-size - 1] * (max(items) + 1) if items else []
+    missed = []
+    for item in items:
+        if len(missed) - stamps[item] > size:
+            stamps[item] = len(missed)
+            missed.append(item)
+    return missed
+
+def _expand_ranges(first, count):
+    """concatenation of the ranges first[i], .., first[i] + count[i] - 1"""
+    starts = np.cumsum(count) - count
+    return np.repeat(first - starts, count) + np.arange(count.sum())
+
+def estimate_overdraw(pos, tris, resolution=128):
+    """shaded fragments per covered pixel, averaged over the 6 axis aligned views
+
+    the triangles are rasterised in index order with early depth testing, like
+    the GPU does, so a better triangle order gives a lower number.
+    """
+    lo = pos.min(axis=0)
+    extent = max(float((pos.max(axis=0) - lo).max()), 1e-30)
+    p = (pos - lo) / extent
+    normal = np.cross(p[tris[:, 1]] - p[tris[:, 0]], p[tris[:, 2]] - p[tris[:, 0]])
+
+    shaded = covered = 0
+    for axis in range(3):
+        x = p[:, (axis + 1) % 3] * resolution
+        y = p[:, (axis + 2) % 3] * resolution
+        for facing in (1, -1):
+            # the camera looks along -facing * axis and sees the counter-clockwise triangles
+            front = np.flatnonzero(facing * normal[:, axis] > 0)
+            depth = 1 - p[:, axis] if facing > 0 else p[:, axis]
+            s, c = _rasterise(x, y, depth, tris, front, resolution)
+            shaded += s
+            covered += c
+
+    return shaded / covered if covered else 0
+
+def _rasterise(x, y, depth, tris, draw, resolution, batch=1 << 22):
+    """(shaded fragments, covered pixels) when drawing the triangles draw in order"""
+    a, b, c = tris[draw].T
+    xmin = np.minimum(np.minimum(x[a], x[b]), x[c])
+    xmax = np.maximum(np.maximum(x[a], x[b]), x[c])
+    ymin = np.minimum(np.minimum(y[a], y[b]), y[c])
+    ymax = np.maximum(np.maximum(y[a], y[b]), y[c])
+    # pixel centers inside the bounding box
+    x0 = np.ceil(xmin - 0.5).astype(np.int64)
+    y0 = np.ceil(ymin - 0.5).astype(np.int64)
+    w = np.minimum(np.floor(xmax - 0.5).astype(np.int64), resolution - 1) - x0 + 1
+    h = np.minimum(np.floor(ymax - 0.5).astype(np.int64), resolution - 1) - y0 + 1
+    area = (x[b] - x[a]) * (y[c] - y[a]) - (x[c] - x[a]) * (y[b] - y[a])
+    count = np.where((w > 0) & (h > 0) & (area != 0), w * h, 0)
+
+    pixels = []
+    order = []
+    depths = []
+    # bound the memory of the candidate fragments
+    ends = np.cumsum(count)
+    splits = np.searchsorted(ends, np.arange(batch, ends[-1] if len(ends) else 0, batch))
+    for sel in np.split(np.flatnonzero(count), splits):
+        t = np.repeat(sel, count[sel])
+        local = _expand_ranges(np.zeros(len(sel), dtype=np.int64), count[sel])
+        px = x0[t] + local % w[t]
+        py = y0[t] + local // w[t]
+
+        ta, tb, tc = a[t], b[t], c[t]
+        cx = px + 0.5 - x[ta]
+        cy = py + 0.5 - y[ta]
+        l1 = (cx * (y[tc] - y[ta]) - (x[tc] - x[ta]) * cy) / area[t]
+        l2 = ((x[tb] - x[ta]) * cy - cx * (y[tb] - y[ta])) / area[t]
+        inside = (l1 >= 0) & (l2 >= 0) & (l1 + l2 <= 1)
+
+        pixels.append((py * resolution + px)[inside])
+        order.append(t[inside])
+        depths.append((depth[ta] + l1 * (depth[tb] - depth[ta]) + l2 * (depth[tc] - depth[ta]))[inside])
+
+    if not pixels:
+        return 0, 0
+    pixels = np.concatenate(pixels)
+    if not len(pixels):
+        return 0, 0
+    sort = np.lexsort((np.concatenate(order), pixels))
+    pixels = pixels[sort]
+    # depth is in [0, 1], so the offset keeps the running minimum from leaking between pixels
+    key = np.concatenate(depths)[sort] - 2.0 * pixels
+    closest = np.minimum.accumulate(key)
+    shaded = 1 + np.count_nonzero(key[1:] < closest[:-1])
+    covered = 1 + np.count_nonzero(pixels[1:] != pixels[:-1])
+    return shaded, covered
+
+def analyse_geometry(tris, pos, stride, cache_sizes=(8, 16, 32), fetch_cache=16, cache_line=64, cache_lines=128):
+    """vertex cache, vertex fetch and overdraw metrics of a triangle list"""
+    idx = tris.ravel()
+    referenced = np.count_nonzero(np.bincount(idx))
+
+    metrics = {"acmr": {}}
+    for size in cache_sizes:
+        missed = simulate_fifo(idx, size)
+        metrics["acmr"][size] = len(missed) / len(tris)
+        if size == fetch_cache:
+            metrics["atvr"] = len(missed) / referenced
+            # every transformed vertex is fetched from memory through a cache of lines
+            v = np.array(missed, dtype=np.int64) * stride
+            first = v // cache_line
+            lines = _expand_ranges(first, (v + stride - 1) // cache_line - first + 1)
+            fetched = len(simulate_fifo(lines, cache_lines)) * cache_line
+            metrics["fetch"] = referenced * stride / fetched
+
+    metrics["overdraw"] = estimate_overdraw(pos, tris)
+    return metrics
+
+def optimise_vertex_cache(tris, nverts, cache_size=16):
+    """triangle order for a FIFO vertex cache, using Tipsify by Sander et al.
+
+    see "Fast Triangle Reordering for Vertex Locality and Reduced Overdraw", 2007
+    """
+    idx = tris.ravel()
+    live = np.bincount(idx, minlength=nverts)
+    offsets = np.concatenate(([0], np.cumsum(live))).tolist()
+    adjacency = (np.argsort(idx, kind="stable") // 3).tolist()
+    live = live.tolist()
+    tris = tris.tolist()
+
+    stamps = [-cache_size - 1] * nverts
+    emitted = bytearray(len(tris))
+    dead_end = []
+    out = []
+    clock = cache_size + 1
+    fanning = 0
+    cursor = 0
+    while fanning >= 0:
+        candidates = set()
+        for t in adjacency[offsets[fanning]:offsets[fanning + 1]]:
+            if emitted[t]:
+                continue
+            emitted[t] = 1
+            out.append(t)
+            for v in tris[t]:
+                dead_end.append(v)
+                candidates.add(v)
+                live[v] -= 1
+                if clock - stamps[v] > cache_size:
+                    stamps[v] = clock
+                    clock += 1
+
+        # prefer the vertex that is still in the cache and will stay there during its fan
+        fanning = -1
+        best = -1
+        for v in candidates:
+            if live[v] > 0:
+                priority = clock - stamps[v] if clock - stamps[v] + 2 * live[v] <= cache_size else 0
+                if priority > best:
+                    best = priority
+                    fanning = v
+
+        while fanning < 0 and dead_end:
+            v = dead_end.pop()
+            if live[v] > 0:
+                fanning = v
+        while fanning < 0 and cursor < nverts:
+            if live[cursor] > 0:
+                fanning = cursor
+            cursor += 1
+
+    return np.array(out, dtype=np.int64)
+
+def optimise_vertex_fetch(idx, nverts):
+    """new position of every vertex, so vertices are stored in order of first use"""
+    used, first = np.unique(idx, return_index=True)
+    order = np.concatenate((used[np.argsort(first)], np.setdiff1d(np.arange(nverts), used)))
+    remap = np.empty(nverts, dtype=np.int64)
+    remap[order] = np.arange(nverts)
+    return remap
+
+def format_metrics(metrics, previous=None):
+    """display lines of the metrics, with the change to previous if given"""
+    def fmt(label, key, fn=lambda m: m):
+        txt = f"{label}: {fn(metrics[key]):.2f}"
+        if previous is not None:
+            txt += f" (was {fn(previous[key]):.2f})"
+        return txt
+
+    lines = [fmt(f"ACMR ({size} entries)", "acmr", lambda m, size=size: m[size]) for size in metrics["acmr"]]
+    lines.append(fmt("ATVR", "atvr"))
+    lines.append(fmt("Fetch efficiency", "fetch"))
+    lines.append(fmt("Overdraw", "overdraw"))
+    return tuple(lines)
+
+class GeometryAnalysis:
+    """GPU efficiency metrics of the submeshes, computed by a worker thread
+
+    the buffers are copied on the render thread, everything else runs in the
+    background, so the UI stays responsive with large meshes.
+    """
+    CACHE_SIZE = 16
+
+    def __init__(self, mesh, previous=None):
+        self.cancelled = False
+        # submesh index -> metrics, None if the submesh has no triangles
+        self.metrics = {}
+        self.lines = {}
+        self.cells = {}
+        self.previous = previous.metrics if previous is not None else {}
+
+        jobs = []
+        # read once, for all the submeshes using them
+        shared = None
+        for i, sm in enumerate(mesh.getSubMeshes()):
+            res = read_submesh_indices(mesh, sm)
+            if res is None or not len(res[1]):
+                self.metrics[i] = None
+                self.cells[i] = "-"
+                continue
+            vdata, tris = res
+            stride = vertex_data_bytes(vdata) // max(vdata.vertexCount, 1)
+            if not sm.useSharedVertices:
+                jobs.append((i, tris, read_positions(vdata), stride))
+                continue
+            if shared is None:
+                shared = read_positions(vdata)
+            jobs.append((i, tris, shared, stride))
+
+        self._thread = threading.Thread(target=self._run, args=(jobs,), daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _run(self, jobs):
+        for i, tris, pos, stride in jobs:
+            if self.cancelled:
+                return
+            metrics = analyse_geometry(tris, pos, stride, fetch_cache=self.CACHE_SIZE)
+            self.lines[i] = format_metrics(metrics, self.previous.get(i))
+            self.cells[i] = f"{metrics['acmr'][self.CACHE_SIZE]:.2f}"
+            self.metrics[i] = metrics
+
+    def sort_key(self, i):
+        metrics = self.metrics.get(i)
+        return metrics["acmr"][self.CACHE_SIZE] if metrics else float("inf")
+
+class MeshOptimiser:
+    """reorders the triangles and vertices of a mesh for the vertex caches
+
+    the new orders are computed by a worker thread, apply() writes them to the
+    hardware buffers on the render thread. Vertices are only reordered if
+    nothing else refers to them by index, like bone assignments or poses.
+    """
+    def __init__(self, mesh):
+        self.mesh = mesh
+        self.cancelled = False
+        self.result = None
+
+        self.reorder_vertices = not (mesh.hasSkeleton() or mesh.hasVertexAnimation() or len(mesh.getPoseList()) or
+                                     mesh.getNumLodLevels() > 1)
+
+        jobs = []
+        shared_complete = True
+        for i, sm in enumerate(mesh.getSubMeshes()):
+            if sm.operationType != Ogre.RenderOperation.OT_TRIANGLE_LIST or not sm.indexData.indexCount:
+                shared_complete &= not sm.useSharedVertices
+                continue
+            vdata, tris = read_submesh_indices(mesh, sm)
+            # shared vertices are keyed by -1
+            jobs.append((i, -1 if sm.useSharedVertices else i, tris, vdata.vertexCount))
+        self.skipped = len(mesh.getSubMeshes()) - len(jobs)
+        self._reorder_shared = shared_complete
+
+        self._thread = threading.Thread(target=self._run, args=(jobs,), daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _run(self, jobs):
+        triangles = {}
+        groups = {}
+        for i, key, tris, nverts in jobs:
+            if self.cancelled:
+                return
+            triangles[i] = tris[optimise_vertex_cache(tris, nverts)]
+            groups.setdefault(key, (nverts, []))[1].append(triangles[i].ravel())
+
+        remaps = {}
+        if self.reorder_vertices:
+            for key, (nverts, indices) in groups.items():
+                if key != -1 or self._reorder_shared:
+                    remaps[key] = optimise_vertex_fetch(np.concatenate(indices), nverts)
+
+        self.result = (triangles, remaps)
+
+    def apply(self):
+        """write the new orders to the mesh, returns False if the work was cancelled"""
+        if self.result is None:
+            return False
+
+        mesh = self.mesh
+        triangles, remaps = self.result
+        for i, tris in triangles.items():
+            sm = mesh.getSubMesh(i)
+            key = -1 if sm.useSharedVertices else i
+            if key in remaps:
+                tris = remaps[key][tris]
+            ibuf = sm.indexData.indexBuffer
+            itype = np.uint16 if ibuf.getIndexSize() == 2 else np.uint32
+            write_buffer(ibuf, tris.astype(itype), sm.indexData.indexStart * ibuf.getIndexSize())
+
+        for key, remap in remaps.items():
+            vdata = mesh.sharedVertexData if key == -1 else mesh.getSubMesh(key).vertexData
+            sources = {e.getSource() for e in vdata.vertexDeclaration.getElements()}
+            for src in sources:
+                buf = vdata.vertexBufferBinding.getBuffer(src)
+                vsize = buf.getVertexSize()
+                start = vdata.vertexStart * vsize
+                rows = read_buffer(buf)[start:start + vdata.vertexCount * vsize].reshape(-1, vsize)
+                reordered = np.empty_like(rows)
+                reordered[remap] = rows
+                write_buffer(buf, reordered, start)
+
+        # edge lists refer to the old index order
+        if mesh.isEdgeListBuilt():
+            mesh.freeEdgeList()
+            mesh.buildEdgeList()
+        return True
+
+def _pack_int1010102n(values):
+    """xyz as signed normalised 10 bit and w as 2 bit, like GL_INT_2_10_10_10_REV"""
+    q = np.clip(np.round(values[:, :3] * 511), -511, 511).astype(np.int32)
+    w = np.clip(np.round(values[:, 3]), -1, 1).astype(np.int32) if values.shape[1] > 3 else np.zeros(len(q), np.int32)
+    packed = (q[:, 0] & 0x3FF) | (q[:, 1] & 0x3FF) << 10 | (q[:, 2] & 0x3FF) << 20 | (w & 3) << 30
+    decoded = np.column_stack((q / 511, w))[:, :values.shape[1]]
+    return packed.astype(np.uint32).view(np.uint8).reshape(-1, 4), decoded
+
+def _pack_half2(values):
+    h = values.astype(np.float16)
+    return h.view(np.uint8).reshape(-1, 4), h.astype(np.float32)
+
+def _pack_ubyte4n(values):
+    q = np.round(np.clip(values, 0, 1) * 255).astype(np.uint8)
+    if values.shape[1] < 4:
+        # opaque
+        q = np.column_stack((q, np.full((len(q), 4 - values.shape[1]), 255, np.uint8)))
+    return q, q[:, :values.shape[1]] / 255
+
+def _compact_format(elem):
+    """(packed type, packer, threshold name) for elements that can be compacted, else None"""
+    sem = elem.getSemantic()
+    vtype = VET2STR[elem.getType()]
+    if sem in (Ogre.VES_NORMAL, Ogre.VES_TANGENT, Ogre.VES_BINORMAL) and vtype in ("float3", "float4"):
+        return Ogre.VET_INT_10_10_10_2_NORM, _pack_int1010102n, "normal"
+    if sem == Ogre.VES_TEXTURE_COORDINATES and vtype == "float2":
+        return Ogre.VET_HALF2, _pack_half2, "texcoord"
+    if sem in (Ogre.VES_DIFFUSE, Ogre.VES_SPECULAR) and vtype in ("float3", "float4"):
+        return Ogre.VET_UBYTE4_NORM, _pack_ubyte4n, "colour"
+    return None
+
+def _copy_buffer(buf, data, count, vertex_size=None):
+    """new hardware buffer with the usage of buf, holding data"""
+    bufmgr = Ogre.HardwareBufferManager.getSingleton()
+    if vertex_size is None:
+        new = bufmgr.createIndexBuffer(Ogre.HardwareIndexBuffer.IT_16BIT, count, buf.getUsage(), buf.hasShadowBuffer())
+    else:
+        new = bufmgr.createVertexBuffer(vertex_size, count, buf.getUsage(), buf.hasShadowBuffer())
+    write_buffer(new, data)
+    return new
+
+def compact_vertex_data(vdata, thresholds):
+    """pack the vertex elements of vdata where the error stays below thresholds
+
+    returns a description of every converted element
+    """
+    decl = vdata.vertexDeclaration
+    binding = vdata.vertexBufferBinding
+    elements = list(enumerate(decl.getElements()))
+    count = vdata.vertexCount
+
+    changes = []
+    layouts = {}
+    for src in sorted({e.getSource() for _, e in elements}):
+        buf = binding.getBuffer(src)
+        vsize = buf.getVertexSize()
+        data = read_buffer(buf)
+        rows = data[vdata.vertexStart * vsize:(vdata.vertexStart + count) * vsize].reshape(count, vsize)
+
+        columns = []
+        layout = []
+        offset = 0
+        for i, elem in sorted(((i, e) for i, e in elements if e.getSource() == src), key=lambda ie: ie[1].getOffset()):
+            vtype = elem.getType()
+            column = rows[:, elem.getOffset():elem.getOffset() + elem.getSize()]
+            fmt = _compact_format(elem)
+            if fmt is not None:
+                values = read_element(vdata, elem, data)
+                packed, decoded = fmt[1](values)
+                error = float(np.abs(decoded - values).max()) if count else 0
+                if error <= thresholds[fmt[2]]:
+                    changes.append(f"{VES2STR[elem.getSemantic()]}: {VET2STR[vtype]} -> {VET2STR[fmt[0]]}"
+                                   f" (error {error:.5f})")
+                    vtype, column = fmt[0], packed
+            layout.append((i, elem, offset, vtype))
+            columns.append(column)
+            offset += column.shape[1]
+        layouts[src] = (buf, offset, np.hstack(columns) if columns else rows, layout)
+
+    if not changes:
+        return changes
+
+    # rebuild every buffer, so they all start at the first vertex
+    for src, (buf, vsize, rows, layout) in layouts.items():
+        binding.setBinding(src, _copy_buffer(buf, rows, count, vsize))
+        for i, elem, offset, vtype in layout:
+            decl.modifyElement(i, src, offset, vtype, elem.getSemantic(), elem.getIndex())
+    vdata.vertexStart = 0
+    return changes
+
+def compact_index_data(idata):
+    """switch to 16 bit indices if all indices fit, returns whether it did"""
+    ibuf = idata.indexBuffer
+    if not idata.indexCount or ibuf.getIndexSize() == 2:
+        return False
+    idx = read_indices(idata)
+    # 0xFFFF is the primitive restart index
+    if idx.max() >= 0xFFFF:
+        return False
+    idata.indexBuffer = _copy_buffer(ibuf, idx.astype(np.uint16), idata.indexCount)
+    idata.indexStart = 0
+    return True
+
+def _geometry_bytes(vdata, idata=None):
+    nbytes = vertex_data_bytes(vdata) if vdata else 0
+    if idata is not None and idata.indexCount:
+        nbytes += idata.indexCount * idata.indexBuffer.getIndexSize()
+    return nbytes
+
+def compact_mesh(mesh, outfile, thresholds):
+    """save a copy of mesh with compacted vertex formats and indices to outfile
+
+    returns the (label, bytes before, bytes after) of the shared vertices,
+    every submesh and every generated LOD level and the list of conversions.
+    The given mesh is not modified.
+    """
+    meshmgr = Ogre.MeshManager.getSingleton()
+    clone = mesh.clone(mesh.getName() + "/compact")
+    try:
+        parts = [(f"SubMesh #{i}", sm.vertexData, sm.indexData) for i, sm in enumerate(clone.getSubMeshes())]
+        if clone.sharedVertexData:
+            parts.insert(0, ("Shared Vertices", clone.sharedVertexData, None))
+        for level in range(1, clone.getNumLodLevels()):
+            if clone.getLodLevel(level).manualName:
+                continue
+            for i, sm in enumerate(clone.getSubMeshes()):
+                idata = lod_index_data(sm, level)
+                if idata.indexCount:
+                    parts.append((f"LOD {level} SubMesh #{i}", None, idata))
+
+        rows = []
+        changes = []
+        for label, vdata, idata in parts:
+            before = _geometry_bytes(vdata, idata)
+            if vdata:
+                changes += [f"{label} {c}" for c in compact_vertex_data(vdata, thresholds)]
+            if idata is not None and compact_index_data(idata):
+                changes.append(f"{label} Indices: 32 bit -> 16 bit")
+            rows.append((label, before, _geometry_bytes(vdata, idata)))
+
+        Ogre.MeshSerializer().exportMesh(clone, outfile)
+    finally:
+        meshmgr.remove(clone.getHandle())
+
+    return rows, changes
+
+def format_compaction(rows):
+    """table cells of the rows of compact_mesh, with a total"""
+    before = sum(r[1] for r in rows)
+    after = sum(r[2] for r in rows)
+    cells = []
+    for label, b, a in rows + [("Total", before, after)]:
+        saved = f"{100 * (b - a) / b:.0f}%" if b else "-"
+        cells.append((label, format_bytes(b), format_bytes(a), saved))
+    return cells
+
+def default_lod_levels(strategy, radius, count=3):
+    """[user value, reduction] of count levels to start from, each halving the vertices of the previous one"""
+    if strategy.startswith("distance"):
+        values = [radius * 4 * 2**i for i in range(count)]
+    else:
+        values = [0.25 ** (i + 1) for i in range(count)]
+    return [[v, 1 - 0.5 ** (i + 1)] for i, v in enumerate(values)]
+
+def lod_level_stats(mesh):
+    """(user value, triangles, vertices) of every LOD level of mesh
+
+    vertices counts the referenced vertices and is None without numpy. Only
+    triangle lists are counted, as the LOD generator only reduces those.
+    """
+    stats = []
+    for level in range(mesh.getNumLodLevels()):
+        triangles = 0
+        used = {}
+        for i, sm in enumerate(mesh.getSubMeshes()):
+            if sm.operationType != Ogre.RenderOperation.OT_TRIANGLE_LIST:
+                continue
+            idata = lod_index_data(sm, level)
+            triangles += idata.indexCount // 3
+            if np is not None and idata.indexCount:
+                used.setdefault(-1 if sm.useSharedVertices else i, []).append(read_indices(idata))
+
+        vertices = None
+        if np is not None:
+            vertices = sum(np.count_nonzero(np.bincount(np.concatenate(idx))) for idx in used.values())
+        stats.append((mesh.getLodLevel(level).userValue, triangles, vertices))
+    return stats
+
+def lod_strategy(name):
+    """the Ogre::LodStrategy called name
+
+    the distance strategies are not wrapped, but distance_sphere is the default of every material
+    """
+    if name == "screen_ratio_pixel_count":
+        return Ogre.ScreenRatioPixelCountLodStrategy.getSingleton()
+    if name == "pixel_count":
+        return Ogre.AbsolutePixelCountLodStrategy.getSingleton()
+    strategy = Ogre.MaterialManager.getSingleton().getDefaultSettings().getLodStrategy()
+    if strategy.getName() != name:
+        raise ValueError(f"unknown LOD strategy '{name}'")
+    return strategy
+
+def cluster_vertices(pos, target):
+    """representative vertex of every vertex, after merging the vertices within the cells of a grid
+
+    the finest grid with at most target occupied cells is used. Each cell is represented by the
+    vertex closest to the mean of its vertices, so no new vertices are needed.
+    """
+    if target >= len(pos):
+        return np.arange(len(pos))
+
+    lo = pos.min(axis=0)
+    extent = max(float((pos.max(axis=0) - lo).max()), 1e-12)
+    unit = (pos - lo) / extent
+
+    def cells(res):
+        dims = np.maximum(np.ceil(unit.max(axis=0) * res), 1).astype(np.int64)
+        xyz = np.minimum((unit * res).astype(np.int64), dims - 1)
+        return np.unique((xyz[:, 0] * dims[1] + xyz[:, 1]) * dims[2] + xyz[:, 2], return_inverse=True)[1]
+
+    # the occupied cells grow with the resolution, so search the largest one within target
+    lo_res, hi_res = 1, 1 << 16
+    inv = cells(lo_res)
+    while hi_res - lo_res > 1:
+        mid = (lo_res + hi_res) // 2
+        candidate = cells(mid)
+        if candidate.max() < target:
+            lo_res, inv = mid, candidate
+        else:
+            hi_res = mid
+
+    counts = np.bincount(inv)
+    mean = np.stack([np.bincount(inv, pos[:, k]) for k in range(3)], axis=1) / counts[:, None]
+    dist = ((pos - mean[inv])**2).sum(axis=1)
+    order = np.lexsort((dist, inv))
+    first = order[np.r_[True, inv[order[1:]] != inv[order[:-1]]]]
+    return first[inv]
+
+def collapse_triangles(tris, remap):
+    """tris with their vertices replaced by remap, without degenerate and duplicate triangles"""
+    tris = remap[tris]
+    tris = tris[(tris[:, 0] != tris[:, 1]) & (tris[:, 1] != tris[:, 2]) & (tris[:, 0] != tris[:, 2])]
+    _, keep = np.unique(np.sort(tris, axis=1), axis=0, return_index=True)
+    return tris[np.sort(keep)]
+
+class LodGeneration:
+    """generates LOD levels by vertex clustering in the background
+
+    the buffers are copied on the render thread, the levels are computed by a
+    worker thread and apply() writes them to the mesh on the render thread.
+    Every level only adds an index buffer, the vertices of the base mesh are
+    reused. Only triangle lists are reduced.
+    """
+    def __init__(self, mesh, strategy, method, levels):
+        self.mesh = mesh
+        self.cancelled = False
+        self.result = None
+        self.started = time.perf_counter()
+        self.duration = None
+
+        self.strategy = lod_strategy(strategy)
+        # the levels go from high to low detail
+        levels = sorted(levels, key=lambda level: self.strategy.transformUserValue(level[0]))
+
+        jobs = []
+        positions = {}
+        for i, sm in enumerate(mesh.getSubMeshes()):
+            if sm.operationType != Ogre.RenderOperation.OT_TRIANGLE_LIST or not sm.indexData.indexCount:
+                continue
+            vdata, tris = read_submesh_indices(mesh, sm)
+            # shared vertices are keyed by -1
+            key = -1 if sm.useSharedVertices else i
+            if key not in positions:
+                positions[key] = read_positions(vdata)
+            jobs.append((i, key, tris))
+
+        self._thread = threading.Thread(target=self._run, args=(jobs, positions, levels, method), daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def finish(self):
+        """wait for the worker"""
+        self._thread.join()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def cancel(self):
+        """the levels will not be applied, once the worker is done"""
+        self.cancelled = True
+
+    def _run(self, jobs, positions, levels, method):
+        result = []
+        previous = sum(len(tris) for _, _, tris in jobs)
+        for value, reduction in levels:
+            remaps = {}
+            for key, pos in positions.items():
+                if self.cancelled:
+                    return
+                removed = reduction * len(pos) if method == "proportional" else reduction
+                remaps[key] = cluster_vertices(pos, max(1, int(len(pos) - removed)))
+            triangles = {}
+            for i, key, tris in jobs:
+                reduced = collapse_triangles(tris, remaps[key])
+                # keep one triangle, as an empty index buffer would draw the vertices unindexed
+                triangles[i] = reduced if len(reduced) else tris[:1]
+            count = sum(len(t) for t in triangles.values())
+            # skip levels that do not reduce the previous one
+            if count < previous:
+                result.append((value, triangles))
+                previous = count
+
+        self.duration = time.perf_counter() - self.started
+        self.result = result
+
+    def apply(self):
+        """replace the LOD levels of the mesh, returns False if the work was cancelled"""
+        if self.result is None or self.cancelled:
+            return False
+
+        mesh = self.mesh
+        mesh.removeLodLevels()
+        edges = mesh.isEdgeListBuilt()
+        mesh.freeEdgeList()
+        mesh.setLodStrategy(self.strategy)
+        mesh._setLodInfo(len(self.result) + 1)
+
+        bufmgr = Ogre.HardwareBufferManager.getSingleton()
+        for level, (value, triangles) in enumerate(self.result, 1):
+            usage = Ogre.MeshLodUsage()
+            usage.userValue = value
+            usage.value = self.strategy.transformUserValue(value)
+            mesh._setLodUsage(level, usage)
+
+            for i, sm in enumerate(mesh.getSubMeshes()):
+                if i not in triangles:
+                    # drawn at full detail, sharing the index buffer
+                    idata = sm.indexData.clone(False)
+                else:
+                    ibuf = sm.indexData.indexBuffer
+                    itype = np.uint16 if ibuf.getIndexSize() == 2 else np.uint32
+                    idata = Ogre.IndexData()
+                    idata.indexCount = triangles[i].size
+                    idata.indexBuffer = bufmgr.createIndexBuffer(ibuf.getType(), idata.indexCount, ibuf.getUsage(),
+                                                                 ibuf.hasShadowBuffer())
+                    write_buffer(idata.indexBuffer, triangles[i].astype(itype))
+                # deleted by the submesh
+                idata.disown()
+                mesh._setSubMeshLodFaceList(i, level, idata)
+
+        if edges:
+            mesh.buildEdgeList()
+        return True
+
+def format_lod_stats(stats):
+    """table cells of lod_level_stats, with the share of the base mesh"""
+    base = stats[0][1] or 1
+    cells = []
+    for i, (value, triangles, vertices) in enumerate(stats):
+        cells.append(("Base" if i == 0 else str(i), "-" if i == 0 else f"{value:.2f}",
+                      f"{triangles} ({100 * triangles / base:.0f}%)", "-" if vertices is None else str(vertices)))
+    return cells
+
+class SubMeshHighlight:
+    """draws the chosen submeshes a second time with an additive material
+
+    the materials of the entity are never touched, so no shaders need to be
+    resolved again and each highlighted submesh costs one draw call.
+    """
+    def __init__(self, scn_mgr, material):
+        self.scn_mgr = scn_mgr
+        self.material = material
+        self.target = None
+        self.overlay = None
+        self.visible = frozenset()
+
+    def clear(self):
+        if self.overlay:
+            self.scn_mgr.destroyEntity(self.overlay)
+        self.target = None
+        self.overlay = None
+        self.visible = frozenset()
+
+    def _attach(self, entity):
+        self.clear()
+        self.target = entity
+
+        self.overlay = self.scn_mgr.createEntity(entity.getMesh())
+        self.overlay.setMaterial(self.material)
+        self.overlay.setQueryFlags(0)
+        self.overlay.setCastShadows(False)
+        self.overlay.setRenderQueueGroup(Ogre.RENDER_QUEUE_MAIN + 1)
+        if entity.hasSkeleton():
+            self.overlay.shareSkeletonInstanceWith(entity)
+        for se in self.overlay.getSubEntities():
+            se.setVisible(False)
+        entity.getParentSceneNode().attachObject(self.overlay)
+
+    def show(self, entity, indices):
+        indices = frozenset(indices)
+        if entity is self.target and indices == self.visible:
+            return
+
+        if entity is not self.target:
+            if not indices:
+                self.clear()
+                return
+            self._attach(entity)
+
+        subentities = self.overlay.getSubEntities()
+        for i in indices ^ self.visible:
+            subentities[i].setVisible(i in indices)
+        self.visible = indices
+
+def skinning_stats(mesh):
+    """(bones, histogram of vertices by weights, max bones referenced by a submesh)
+
+    the weights are counted in the compiled vertex data, so at most 4 per vertex
+    """
+    histogram = np.zeros(5, np.int64)
+    vdatas = [mesh.sharedVertexData] if mesh.sharedVertexData else []
+    vdatas += [sm.vertexData for sm in mesh.getSubMeshes() if not sm.useSharedVertices and sm.vertexData]
+    for vdata in vdatas:
+        elem = vdata.vertexDeclaration.findElementBySemantic(Ogre.VES_BLEND_WEIGHTS)
+        if elem is None:
+            continue
+        try:
+            weights = read_element(vdata, elem)
+        except ValueError:
+            continue
+        histogram += np.bincount(np.count_nonzero(weights > 1e-4, axis=1), minlength=5)[:5]
+
+    max_bones = max((len(sm.blendIndexToBoneIndexMap) for sm in mesh.getSubMeshes()), default=0)
+    return mesh.getSkeleton().getNumBones(), [int(n) for n in histogram], max_bones
+
+def _quat_mul(a, b):
+    """a * b for a single quaternion a and (N, 4) quaternions b, as (w, x, y, z)"""
+    w1, x1, y1, z1 = a
+    w2, x2, y2, z2 = b.T
+    return np.stack((w1*w2 - x1*x2 - y1*y2 - z1*z2,
+                     w1*x2 + x1*w2 + y1*z2 - z1*y2,
+                     w1*y2 - x1*z2 + y1*w2 + z1*x2,
+                     w1*z2 + x1*y2 - y1*x2 + z1*w2), axis=1)
+
+class PoseCache:
+    """the skeletal animations of an entity, sampled at RATE by a worker thread
+
+    playback and scrubbing copy the nearest sample to manually controlled bones,
+    instead of searching and interpolating the keyframes of every track. Like
+    Ogre by default, the keyframes are interpolated linearly.
+    """
+    RATE = 30
+
+    def __init__(self, entity):
+        self.entity = entity
+        self.skeleton = entity.getSkeleton()
+        self.bones = self.skeleton.getBones()
+        self.initial = [(np.array(tuple(b.getInitialPosition()), np.float32),
+                         np.array([b.getInitialOrientation().w, b.getInitialOrientation().x,
+                                   b.getInitialOrientation().y, b.getInitialOrientation().z], np.float32),
+                         np.array(tuple(b.getInitialScale()), np.float32)) for b in self.bones]
+
+        states = entity.getAllAnimationStates().getAnimationStates()
+        self.names = [name for name in states if self.skeleton.hasAnimation(name)]
+        self.lengths = {name: states[name].getLength() for name in self.names}
+        # name -> (bone handles, positions, orientations, scales) each (samples, bones, components)
+        self.samples = {}
+
+        self.current = None
+        self.time = 0
+        self.playing = False
+
+        self.cancelled = False
+        self._thread = threading.Thread(target=self._bake, daemon=True)
+        self._thread.start()
+
+    def _bake(self):
+        for name in self.names:
+            samples = self._sample(self.skeleton.getAnimation(name))
+            if self.cancelled:
+                return
+            self.samples[name] = samples
+
+    def _sample(self, anim):
+        ts = np.arange(int(anim.getLength() * self.RATE) + 1, dtype=np.float32) / self.RATE
+
+        def interp(times, values):
+            return np.stack([np.interp(ts, times, values[:, c]) for c in range(values.shape[1])], axis=1)
+
+        handles, positions, orientations, scales = [], [], [], []
+        for handle, (pos, rot, scale) in enumerate(self.initial):
+            if self.cancelled:
+                break
+            if not anim.hasNodeTrack(handle):
+                continue
+            track = anim.getNodeTrack(handle)
+            keys = [track.getNodeKeyFrame(i) for i in range(track.getNumKeyFrames())]
+            if not keys:
+                continue
+
+            times = np.array([k.getTime() for k in keys], np.float32)
+            q = np.array([(r.w, r.x, r.y, r.z) for r in (k.getRotation() for k in keys)], np.float32)
+            # take the shortest path, as Ogre does
+            for i in range(1, len(q)):
+                if np.dot(q[i - 1], q[i]) < 0:
+                    q[i] = -q[i]
+            q = interp(times, q)
+            q /= np.linalg.norm(q, axis=1, keepdims=True)
+
+            handles.append(handle)
+            positions.append(pos + interp(times, np.array([tuple(k.getTranslate()) for k in keys], np.float32)))
+            orientations.append(_quat_mul(rot, q))
+            scales.append(scale * interp(times, np.array([tuple(k.getScale()) for k in keys], np.float32)))
+
+        if not handles:
+            return [], np.zeros((len(ts), 0, 3)), np.zeros((len(ts), 0, 4)), np.zeros((len(ts), 0, 3))
+        return handles, np.stack(positions, 1), np.stack(orientations, 1), np.stack(scales, 1)
+
+    @property
+    def done(self):
+        return not self._thread.is_alive()
+
+    def ready(self, name):
+        return name in self.samples
+
+    def _apply(self):
+        handles, positions, orientations, scales = self.samples[self.current]
+        i = min(len(positions) - 1, int(round(self.time * self.RATE)))
+        for j, handle in enumerate(handles):
+            bone = self.bones[handle]
+            bone.setPosition(*positions[i, j].tolist())
+            bone.setOrientation(*orientations[i, j].tolist())
+            bone.setScale(*scales[i, j].tolist())
+
+    def seek(self, name, t):
+        if name != self.current:
+            self.stop()
+            self.current = name
+            for handle in self.samples[name][0]:
+                self.bones[handle].setManuallyControlled(True)
+        self.time = t
+        self._apply()
+
+    def play(self, name):
+        self.seek(name, 0)
+        self.playing = True
+
+    def stop(self):
+        """back to the binding pose"""
+        if self.current is None:
+            return
+        for bone in self.bones:
+            bone.setManuallyControlled(False)
+        self.skeleton.reset(True)
+        self.current = None
+        self.time = 0
+        self.playing = False
+
+    def update(self, dt):
+        if not self.playing:
+            return
+        length = self.lengths[self.current]
+        self.time = (self.time + dt) % length if length > 0 else 0
+        self._apply()
+
+    def close(self):
+        self.cancelled = True
+        self._thread.join()
+        self.stop()
+
+class SceneBatcher:
+    """rebuilds the static entities of a .scene as StaticGeometry regions or instanced batches
+
+    the entities stay in the scene, so picking keeps working on them, but are
+    hidden from the viewports. The work is spread over frames, one cell of the
+    scene or one mesh at a time.
+    """
+    CELLS = 4
+    MIN_INSTANCES = 2
+    INSTANCES_PER_BATCH = 256
+    # frames to wait after building, before measuring
+    SETTLE_FRAMES = 30
+    MEASURE_FRAMES = 60
+
+    def __init__(self, scn_mgr, mode, before):
+        self.scn_mgr = scn_mgr
+        self.mode = mode
+        # (batches, triangles, median frame time in ms)
+        self.before = before
+        self.after = None
+        self.frame_times = []
+
+        self.static_geometry = []
+        self.instance_managers = []
+        self.materials = []
+        self.hidden = []
+
+        # query flags 0 are our own helpers, like the submesh highlight
+        entities = []
+        candidates = 0
+        for ent in scn_mgr.getMovableObjects("Entity").values():
+            ent = ent.castEntity()
+            if not ent.isAttached() or not ent.getQueryFlags():
+                continue
+            candidates += 1
+            if not ent.hasSkeleton() and not ent.getMesh().hasVertexAnimation():
+                entities.append(ent)
+
+        self.tasks = self._cells(entities) if mode == 1 else self._instances(entities)
+        self.total = len(self.tasks)
+        # animated or, when instancing, unique entities
+        self.skipped = candidates - sum(len(t) for t in self.tasks)
+
+    def _cells(self, entities):
+        if not entities:
+            return []
+        bounds = Ogre.AxisAlignedBox()
+        centers = []
+        for ent in entities:
+            aabb = ent.getWorldBoundingBox(True)
+            bounds.merge(aabb)
+            centers.append(aabb.getCenter())
+
+        lo = bounds.getMinimum()
+        size = bounds.getSize()
+        cells = {}
+        for ent, c in zip(entities, centers):
+            key = tuple(min(self.CELLS - 1, int((c[i] - lo[i]) / size[i] * self.CELLS)) if size[i] > 0 else 0
+                        for i in range(3))
+            cells.setdefault(key, []).append(ent)
+        return list(cells.values())
+
+    def _instances(self, entities):
+        groups = {}
+        for ent in entities:
+            key = (ent.getMesh().getName(), tuple(se.getMaterialName() for se in ent.getSubEntities()))
+            groups.setdefault(key, []).append(ent)
+        return [g for g in groups.values() if len(g) >= self.MIN_INSTANCES]
+
+    def _hide(self, entities):
+        for ent in entities:
+            self.hidden.append((ent, ent.getVisibilityFlags()))
+            ent.setVisibilityFlags(0)
+
+    def _build_static(self, entities):
+        sg = self.scn_mgr.createStaticGeometry(f"MeshViewer/Batch/{len(self.static_geometry)}")
+        self.static_geometry.append(sg)
+        for ent in entities:
+            node = ent.getParentSceneNode()
+            sg.addEntity(ent, node._getDerivedPosition(), node._getDerivedOrientation(), node._getDerivedScale())
+        sg.build()
+
+    def _instanced_material(self, mat):
+        """clone of mat, that takes the world matrix from the instance buffer"""
+        name = mat.getName() + "/Instanced"
+        matmgr = Ogre.MaterialManager.getSingleton()
+        if matmgr.resourceExists(name, mat.getGroup()):
+            return name
+
+        clone = mat.clone(name)
+        self.materials.append(clone)
+        shadergen = OgreRTShader.ShaderGenerator.getSingleton()
+        scheme = OgreRTShader.ShaderGenerator.DEFAULT_SCHEME_NAME
+        shadergen.createShaderBasedTechnique(clone, Ogre.MSN_DEFAULT, scheme)
+        transform = shadergen.createSubRenderState("FFP_Transform")
+        transform.setParameter("instanced", "true")
+        shadergen.getRenderState(scheme, name, clone.getGroup(), 0).addTemplateSubRenderState(transform)
+        return name
+
+    def _build_instanced(self, entities):
+        mesh = entities[0].getMesh()
+        for i, se in enumerate(entities[0].getSubEntities()):
+            name = f"MeshViewer/Instancing/{len(self.instance_managers)}"
+            self.scn_mgr.createInstanceManager(name, mesh.getName(), mesh.getGroup(),
+                                               Ogre.InstanceManager.HWInstancingBasic, self.INSTANCES_PER_BATCH, 0, i)
+            self.instance_managers.append(name)
+            matname = self._instanced_material(se.getMaterial())
+            for ent in entities:
+                inst = self.scn_mgr.createInstancedEntity(matname, name)
+                # picking stays with the hidden entity
+                inst.setQueryFlags(0)
+                ent.getParentSceneNode().attachObject(inst)
+
+    @property
+    def done(self):
+        return not self.tasks
+
+    def step(self, budget=0.01):
+        """build until budget seconds passed"""
+        start = time.perf_counter()
+        while self.tasks and time.perf_counter() - start < budget:
+            entities = self.tasks.pop()
+            if self.mode == 1:
+                self._build_static(entities)
+            else:
+                self._build_instanced(entities)
+            self._hide(entities)
+
+    def measure(self, batches, triangles, frame_ms):
+        """record the stats once the new batches settled, call once per frame"""
+        if self.tasks or self.after is not None:
+            return
+        self.frame_times.append(frame_ms)
+        if len(self.frame_times) == self.SETTLE_FRAMES + self.MEASURE_FRAMES:
+            self.after = (batches, triangles, percentile(sorted(self.frame_times[self.SETTLE_FRAMES:]), 50))
+
+    def revert(self):
+        for ent, flags in self.hidden:
+            ent.setVisibilityFlags(flags)
+        self.hidden = []
+        self.tasks = []
+
+        for sg in self.static_geometry:
+            self.scn_mgr.destroyStaticGeometry(sg)
+        self.static_geometry = []
+        for name in self.instance_managers:
+            self.scn_mgr.destroyInstanceManager(name)
+        self.instance_managers = []
+
+        shadergen = OgreRTShader.ShaderGenerator.getSingleton()
+        matmgr = Ogre.MaterialManager.getSingleton()
+        for mat in self.materials:
+            shadergen.removeAllShaderBasedTechniques(mat.getName(), mat.getGroup())
+            matmgr.remove(mat.getHandle())
+        self.materials = []
+
+def texture_bytes(width, height, depth, faces, mips, fmt):
+    """GPU memory of a texture including its mip chain"""
+    total = 0
+    for i in range(mips + 1):
+        total += Ogre.PixelUtil.getMemorySize(max(1, width >> i), max(1, height >> i), max(1, depth >> i), fmt)
+    return total * faces
+
+def compressed_format(fmt):
+    """the block compressed format, the texture would likely use on the target"""
+    if Ogre.PixelUtil.isCompressed(fmt):
+        return fmt
+    return Ogre.PF_BC7_UNORM if Ogre.PixelUtil.hasAlpha(fmt) else Ogre.PF_DXT1
+
+def cap_image(img, max_size):
+    """img reduced to max_size by skipping the top mips, or by scaling if it has too few"""
+    width, height = img.getWidth(), img.getHeight()
+    skip = 0
+    while max(width, height) >> skip > max_size:
+        skip += 1
+    if not skip:
+        return img
+
+    fmt = img.getFormat()
+    mips = img.getNumMipmaps()
+    levels = mips - skip + 1 if mips >= skip else 1
+    if mips < skip and (Ogre.PixelUtil.isCompressed(fmt) or img.getNumFaces() > 1):
+        # cannot be scaled
+        return img
+
+    first = min(skip, mips)
+    out = Ogre.Image()
+    out.create(fmt, max(1, width >> first), max(1, height >> first), 1, img.getNumFaces(), levels - 1)
+    for face in range(img.getNumFaces()):
+        for level in range(levels):
+            Ogre.PixelUtil.bulkPixelConversion(img.getPixelBox(face, first + level), out.getPixelBox(face, level))
+    if first < skip:
+        out.resize(max(1, width >> skip), max(1, height >> skip))
+    return out
+
+def cap_texture(tex, max_size):
+    """shrink a loaded texture, returns whether it was above max_size"""
+    if max(tex.getWidth(), tex.getHeight()) <= max_size:
+        return False
+    img = Ogre.Image()
+    tex.convertToImage(img, True)
+    img = cap_image(img, max_size)
+    tex.unload()
+    tex.loadImage(img)
+    return True
+
+def preload_capped_texture(name, group, max_size):
+    """load texture name from an image reduced to max_size, so the full size never reaches the GPU"""
+    texmgr = Ogre.TextureManager.getSingleton()
+    if texmgr.resourceExists(name, group):
+        return False
+    img = Ogre.Image()
+    img.load(name, group)
+    if max(img.getWidth(), img.getHeight()) <= max_size:
+        return False
+    texmgr.loadImage(name, group, cap_image(img, max_size))
+    return True
+
+class TextureReport:
+    """GPU memory of the textures used by the entities of the scene
+
+    built once, as walking the materials through the bindings is too slow for every frame.
+    """
+
+    def __init__(self, scn_mgr):
+        # name -> [name, size, format, mips, bytes, compressed bytes, material count]
+        textures = {}
+        # name -> [name, texture count, bytes, compressed bytes]
+        materials = {}
+
+        for ent in scn_mgr.getMovableObjects("Entity").values():
+            ent = ent.castEntity()
+            if not ent.getQueryFlags():
+                continue
+            for se in ent.getSubEntities():
+                mat = se.getMaterial()
+                if mat.getName() in materials:
+                    continue
+                row = materials[mat.getName()] = [printable(mat.getName()), 0, 0, 0]
+                tech = mat.getBestTechnique()
+                for p in tech.getPasses() if tech else []:
+                    for tus in p.getTextureUnitStates():
+                        for frame in range(tus.getNumFrames()):
+                            tex = tus._getTexturePtr(frame)
+                            if tex is None or not tex.isLoaded():
+                                continue
+                            info = textures.get(tex.getName())
+                            if info is None:
+                                info = textures[tex.getName()] = self._describe(tex)
+                            info[6] += 1
+                            row[1] += 1
+                            row[2] += info[4]
+                            row[3] += info[5]
+
+        self.textures = list(textures.values())
+        self.materials = list(materials.values())
+        self.total = sum(t[4] for t in self.textures)
+        self.total_compressed = sum(t[5] for t in self.textures)
+
+    @staticmethod
+    def _describe(tex):
+        w, h, d = tex.getWidth(), tex.getHeight(), tex.getDepth()
+        faces, mips, fmt = tex.getNumFaces(), tex.getNumMipmaps(), tex.getFormat()
+        return [printable(tex.getName()), f"{w}x{h}" + (f"x{d}" if d > 1 else ""), Ogre.PixelUtil.getFormatName(fmt),
+                mips, texture_bytes(w, h, d, faces, mips, fmt), texture_bytes(w, h, d, faces, mips, compressed_format(fmt)),
+                0]
+
+def image_array(img):
+    """pixels of an Ogre.Image as (height, width, channels) uint8 array, sharing its memory"""
+    data = (ctypes.c_ubyte * img.getSize()).from_address(int(img.getData()))
+    return np.frombuffer(data, dtype=np.uint8).reshape(img.getHeight(), img.getWidth(), -1)
+
+class PngWriter:
+    """writes a RGB PNG from strips of rows, so the image never needs to be in memory at once
+
+    on any error the file is closed and the partial image deleted, before the error is raised.
+    """
+
+    def __init__(self, path, width, height):
+        self.path = path
+        self.width = width
+        self.failed = None
+        self._compressor = zlib.compressobj(6)
+        self._file = open(path, "wb")
+        try:
+            self._file.write(b"\x89PNG\r\n\x1a\n")
+            self._chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        except BaseException:
+            self.abort()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif not self._file.closed:
+            self.abort()
+
+    def _chunk(self, kind, data):
+        self._file.write(struct.pack(">I", len(data)) + kind + data)
+        self._file.write(struct.pack(">I", zlib.crc32(kind + data)))
+
+    def write_rows(self, rows):
+        try:
+            # filter type 0 in front of every row
+            data = np.zeros((len(rows), 1 + self.width * 3), np.uint8)
+            data[:, 1:] = rows[:, :, :3].reshape(len(rows), -1)
+            compressed = self._compressor.compress(data.tobytes())
+            if compressed:
+                self._chunk(b"IDAT", compressed)
+        except BaseException:
+            self.abort()
+            raise
+
+    def close(self):
+        try:
+            self._chunk(b"IDAT", self._compressor.flush())
+            self._chunk(b"IEND", b"")
+            self._file.close()
+        except BaseException:
+            self.abort()
+            raise
+
+    def abort(self):
+        """close and delete the incomplete file"""
+        self._file.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+class ScreenshotEncoder:
+    """encodes screenshots on a worker thread, so the frame loop only copies the pixels
+
+    zlib releases the GIL while compressing. At most QUEUED strips wait for the
+    worker, which bounds the memory of tiled screenshots.
+    """
+    QUEUED = 2
+
     def __init__(self):
+        self.jobs = queue.Queue(self.QUEUED)
+        self.finished = queue.Queue()
+        self.pending = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for writer, rows in iter(self.jobs.get, None):
+            try:
+                if writer.failed:
+                    pass
+                elif rows is None:
+                    writer.close()
+                else:
+                    writer.write_rows(rows)
+            except (OSError, ValueError) as e:
+                writer.failed = str(e)
+            if rows is None:
+                self.finished.put(writer)
+
+    def open(self, path, width, height):
+        self.pending += 1
+        return PngWriter(path, width, height)
+
+    def write(self, writer, rows):
+        """queue rows, which must not change afterwards. Blocks, while the worker is behind"""
+        self.jobs.put((writer, rows))
+
+    def close(self, writer):
+        self.jobs.put((writer, None))
+
+    def poll(self):
+        """writers that were closed since the last call"""
+        done = []
+        while True:
+            try:
+                done.append(self.finished.get_nowait())
+            except queue.Empty:
+                break
+        self.pending -= len(done)
+        return done
+
+    def shutdown(self):
+        # finish the queued screenshots
+        self.jobs.put(None)
+        self._thread.join()
+
+class AssetLoader:
+    """loads the asset spread over several frames, so the UI stays responsive
+
+    the file is read by a worker thread, which warms up the OS cache for Ogre.
+    The bindings hold the GIL during every Ogre call, so a thread cannot take
+    any Ogre work off the frame loop. Files converted by assimp are therefore
+    converted by an AssetConverter process into the AssetCache, which reports
+    each resource as it is written. The render thread then only parses the
+    binary result, one resource per frame.
+    """
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, app):
+        self.app = app
+        self.stage = "reading file"
+        self.cancelled = False
+        self.done = False
+
+        self.bytes_read = 0
+        self.bytes_total = os.path.getsize(app.infile) if os.path.isfile(app.infile) else 0
+        self.counts = {"Meshes": 0, "Skeletons": 0, "Materials": 0, "Textures": 0}
+        # resources created on the render thread, the total grows once the materials are known
+        self.resources_done = 0
+        self.resources_total = 2
+
+        # the content hash of files converted by assimp, computed while reading unless known
+        self.cache = None
+        self.digest = None
+        self.cached = False
+        if app.asset_cache is not None and self.bytes_total and app.infile.lower().endswith(ASSIMP_EXTENSIONS):
+            self.cache = app.asset_cache
+            self.digest = self.cache.known_digest(app.infile)
+
+        self._reader = threading.Thread(target=self._read_file, daemon=True)
+        self._reader.start()
+        self._steps = self._load()
+
+    def cancel(self):
+        self.cancelled = True
+
+    def _read_file(self):
+        if not self.bytes_total:
+            # resource name, that only Ogre can resolve
+            return
+
+        if self.digest is not None and self.cache.lookup(self.digest) is not None:
+            # only the cached conversion is read
+            self.bytes_read = self.bytes_total
+            return
+
+        hasher = hashlib.sha256() if self.cache is not None and self.digest is None else None
+        with open(self.app.infile, "rb") as f:
+            while not self.cancelled:
+                chunk = f.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                if hasher:
+                    hasher.update(chunk)
+                self.bytes_read += len(chunk)
+
+        if hasher and not self.cancelled:
+            self.digest = hasher.hexdigest()
+
+    def _load(self):
+        while self._reader.is_alive():
+            yield
+
+        if self.digest is not None:
+            self.cache.remember(self.app.infile, self.digest)
+            if self.cache.lookup(self.digest) is None:
+                yield from self._convert()
+            entry = self.cache.lookup(self.digest)
+            if entry is not None:
+                self.cached = True
+                self.app.use_cached_asset(*entry)
+
+        max_size = self.app.max_texture_size
+        if max_size and not self.app.filename.lower().endswith(".scene"):
+            self.stage = "reducing textures"
+            yield
+            capped = 0
+            for name in self._texture_names():
+                try:
+                    capped += preload_capped_texture(name, RGN_USERDATA, max_size)
+                except RuntimeError:
+                    # left to the material, which reports it
+                    pass
+                yield
+            if capped:
+                Ogre.LogManager.getSingleton().logMessage(f"Reduced {capped} textures to {max_size}px")
+
+        if not self.app.filename.lower().endswith(".scene"):
+            self.stage = "loading mesh"
+            yield  # show the stage before blocking
+            # parses the file or runs assimp, the slowest step
+            Ogre.MeshManager.getSingleton().load(self.app.cached_mesh or self.app.filename, RGN_USERDATA)
+        self.resources_done += 1
+
+        self.stage = "creating scene"
+        yield
+        self.app.create_asset()
+        self.resources_done += 1
+
+        entities = [e.castEntity() for e in self.app.scn_mgr.getMovableObjects("Entity").values()]
+        self.counts["Meshes"] = len({e.getMesh().getName() for e in entities})
+        self.counts["Skeletons"] = len({e.getMesh().getSkeletonName() for e in entities if e.hasSkeleton()})
+        yield
+
+        self.stage = "loading materials"
+        materials = {}
+        for e in entities:
+            for se in e.getSubEntities():
+                mat = se.getMaterial()
+                materials[mat.getName()] = mat
+        self.resources_total += len(materials)
+        yield
+
+        for mat in materials.values():
+            mat.load()
+            self.resources_done += 1
+            self.counts["Materials"] += 1
+            tech = mat.getBestTechnique()
+            for p in tech.getPasses() if tech else []:
+                self.counts["Textures"] += len(p.getTextureUnitStates())
+                if max_size:
+                    # .scene files, or textures not known before the entity was created
+                    for tus in p.getTextureUnitStates():
+                        tex = tus._getTexturePtr()
+                        if tex is not None and tex.isLoaded():
+                            cap_texture(tex, max_size)
+            yield
+
+        if self.digest is not None and not self.cached:
+            self.stage = "caching converted asset"
+            yield
+            if self.cache.store(self.digest, self.app.entity.getMesh()):
+                Ogre.LogManager.getSingleton().logMessage(f"Converted asset cached as {self.digest}")
+
+    def _convert(self):
+        """run assimp in a worker process, until the converted asset is in the cache"""
+        self.stage = "converting"
+        # forking would share the GL context and windows of the viewer
+        ctx = multiprocessing.get_context("spawn")
+        tasks = ctx.Queue()
+        results = ctx.Queue()
+        progress = ctx.Queue()
+        tasks.put((self.app.infile, self.digest))
+        tasks.put(None)
+        initargs = (self.app.rescfg, self.cache.rootdir, self.cache.max_bytes, progress)
+        proc = ctx.Process(target=_worker_main, args=(AssetConverter, initargs, tasks, results), daemon=True)
+        proc.start()
+
+        result = None
+        try:
+            # the worker exits after its task, which flushes its reports
+            exited = False
+            while not exited:
+                exited = not proc.is_alive()
+                if result is None:
+                    try:
+                        result = results.get_nowait()
+                    except queue.Empty:
+                        if exited:
+                            result = (None, False, "worker process died")
+                while True:
+                    try:
+                        kind, _ = progress.get_nowait()
+                    except queue.Empty:
+                        break
+                    self.counts[kind] += 1
+                yield
+        finally:
+            # also when the loader is cancelled
+            if proc.is_alive():
+                proc.terminate()
+
+        _, stored, error = result
+        if error or not stored:
+            # the render thread converts it instead
+            Ogre.LogManager.getSingleton().logMessage(
+                f"Converting '{self.app.filename}' in the background failed: {error or 'it cannot be cached'}")
+        # counted again, as they are loaded
+        self.counts = dict.fromkeys(self.counts, 0)
+
+    def _texture_names(self):
+        """2D textures of the materials of the mesh, which is loaded for that"""
+        mesh = Ogre.MeshManager.getSingleton().load(self.app.cached_mesh or self.app.filename, RGN_USERDATA)
+        matmgr = Ogre.MaterialManager.getSingleton()
+        names = {}
+        for sm in mesh.getSubMeshes():
+            # a null pointer is returned for the materials of other groups, which crashes on access
+            if not matmgr.resourceExists(sm.getMaterialName(), RGN_USERDATA):
+                continue
+            mat = matmgr.getByName(sm.getMaterialName(), RGN_USERDATA)
+            for tech in mat.getTechniques():
+                for p in tech.getPasses():
+                    for tus in p.getTextureUnitStates():
+                        if tus.getTextureType() == Ogre.TEX_TYPE_2D:
+                            names.update(dict.fromkeys(tus.getFrameTextureName(i) for i in range(tus.getNumFrames())))
+        return [n for n in names if n]
+
+    def finish(self):
+        """load synchronously, when there is no UI to keep responsive"""
+        self._reader.join()
+        for _ in self._steps:
+            pass
+        self.done = True
+
+    def step(self):
+        if self.cancelled:
+            self._steps.close()
+            self.done = True
+            return
+
+        try:
+            next(self._steps)
+        except StopIteration:
+            self.done = True
+
+class LogWindow(Ogre.LogListener):
+    LEVELS = (("All", 0), ("Warnings", 3), ("Errors", 4))
+
+    def __init__(self, dump_path, capacity=10000):
         Ogre.LogListener.__init__(self)
 
         self.show = False
-        self.items = []
+        self.dump_path = dump_path
+
+        # ring buffer of (timestamp, escaped line, level, lowercase line)
+        self.capacity = capacity
+        self.items = [None] * capacity
+        self.total = 0
+        self.counts = {3: 0, 4: 0}
+
+        # sequence numbers of the items passing the filter, None if not filtering
+        self.min_level = 0
+        self.filter_text = ""
+        self.index = None
+        self.index_start = 0
 
         self.font = None
-    
+
+    def _first(self):
+        return max(0, self.total - self.capacity)
+
+    def _matches(self, item):
+        return item[2] >= self.min_level and self.filter_text.lower() in item[3]
+
+    def _rebuild_index(self):
+        if self.min_level == 0 and not self.filter_text:
+            self.index = None
+            return
+
+        self.index = [seq for seq in range(self._first(), self.total) if self._matches(self.items[seq % self.capacity])]
+        self.index_start = 0
+
+    def _prune_index(self):
+        # drop the entries that were overwritten in the ring buffer
+        self.index_start = bisect.bisect_left(self.index, self._first(), self.index_start)
+        if self.index_start > len(self.index) // 2:
+            del self.index[:self.index_start]
+            self.index_start = 0
+
     def messageLogged(self, msg, lvl, *args):
         ts = time.strftime("%T", time.localtime())
-        self.items.append((ts, printable(msg.replace("%", "%%")), lvl))
+        if lvl in self.counts:
+            self.counts[lvl] += 1
+
+        # one item per line, so all rows have the same height
+        for line in printable(msg).splitlines() or [""]:
+            item = (ts, line.replace("%", "%%"), lvl, line.lower())
+            self.items[self.total % self.capacity] = item
+            if self.index is not None and self._matches(item):
+                self.index.append(self.total)
+            self.total += 1
+
+        # also while the window is closed, so the index stays within the capacity
+        if self.index is not None:
+            self._prune_index()
+
+    def dump(self):
+        with open(self.dump_path, "w", encoding="utf-8") as f:
+            if self._first() > 0:
+                f.write(f"[{self._first()} older messages dropped]\n")
+            for seq in range(self._first(), self.total):
+                ts, msg, _, _ = self.items[seq % self.capacity]
+                f.write(f"{ts} {msg.replace('%%', '%')}\n")
+        Ogre.LogManager.getSingleton().logMessage(f"Log saved to: {os.path.normpath(self.dump_path)}")
 
     def draw(self):
         if not self.show:
@@ -162,22 +2290,216 @@ class LogWindow(Ogre.LogListener):
         ImGui.SetNextWindowSize(ImGui.ImVec2(500, 400), ImGui.Cond_FirstUseEver)
         self.show = ImGui.Begin("Log", self.show)[1]
 
+        level_name = next(name for name, lvl in self.LEVELS if lvl == self.min_level)
+        ImGui.SetNextItemWidth(ImGui.GetFontSize()*6)
+        if ImGui.BeginCombo("##level", level_name):
+            for name, lvl in self.LEVELS:
+                if ImGui.Selectable(name, lvl == self.min_level) and lvl != self.min_level:
+                    self.min_level = lvl
+                    self._rebuild_index()
+            ImGui.EndCombo()
+        ImGui.SameLine()
+        ImGui.SetNextItemWidth(ImGui.GetFontSize()*12)
+        changed, self.filter_text = ImGui.InputTextWithHint("##filter", "\uf002 Filter", self.filter_text, 256)
+        if changed:
+            self._rebuild_index()
+        ImGui.SameLine()
+        if ImGui.Button("\uf0c7 Save"):
+            self.dump()
+        ImGui.SameLine()
+        ImGui.TextColored(ImGui.ImVec4(1, 0.4, 0.4, 1), f"{self.counts[4]} errors")
+        ImGui.SameLine()
+        ImGui.TextColored(ImGui.ImVec4(1, 0.8, 0.4, 1), f"{self.counts[3]} warnings")
+        ImGui.Separator()
+
+        if self.index is None:
+            rows = range(self._first(), self.total)
+        else:
+            self._prune_index()
+            rows = self.index
+        offset = self.index_start if self.index is not None else 0
+
+        ImGui.BeginChild("scrolling", ImGui.ImVec2(0, 0), 0, ImGui.WindowFlags_HorizontalScrollbar)
+        at_bottom = ImGui.GetScrollY() >= ImGui.GetScrollMaxY()
+
         ImGui.PushFont(self.font)
-        for ts, msg, lvl in self.items:
-            ImGui.PushStyleColor(ImGui.Col_Text, ImGui.ImVec4(0.6, 0.6, 0.6, 1))
-            ImGui.Text(ts)
-            ImGui.PopStyleColor()
-            ImGui.SameLine()
-            if lvl == 4:
-                ImGui.PushStyleColor(ImGui.Col_Text, ImGui.ImVec4(1, 0.4, 0.4, 1))
-            elif lvl == 3:
-                ImGui.PushStyleColor(ImGui.Col_Text, ImGui.ImVec4(1, 0.8, 0.4, 1))
-            ImGui.TextWrapped(msg)
-            if lvl > 2:
+        clipper = ImGui.ImGuiListClipper()
+        clipper.Begin(len(rows) - offset)
+        while clipper.Step():
+            for row in range(clipper.DisplayStart, clipper.DisplayEnd):
+                ts, msg, lvl, _ = self.items[rows[row + offset] % self.capacity]
+                ImGui.PushStyleColor(ImGui.Col_Text, ImGui.ImVec4(0.6, 0.6, 0.6, 1))
+                ImGui.Text(ts)
                 ImGui.PopStyleColor()
+                ImGui.SameLine()
+                if lvl == 4:
+                    ImGui.PushStyleColor(ImGui.Col_Text, ImGui.ImVec4(1, 0.4, 0.4, 1))
+                elif lvl == 3:
+                    ImGui.PushStyleColor(ImGui.Col_Text, ImGui.ImVec4(1, 0.8, 0.4, 1))
+                ImGui.Text(msg)
+                if lvl > 2:
+                    ImGui.PopStyleColor()
+        clipper.End()
         ImGui.PopFont()
+
+        # stick to the newest message, unless the user scrolled up
+        if at_bottom:
+            ImGui.SetScrollHereY(1.0)
+        ImGui.EndChild()
         ImGui.End()
 
+def percentile(ordered, p):
+    """nearest rank percentile of a sorted list"""
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+class FrameProfiler(Ogre.FrameListener, Ogre.RenderQueueListener):
+    """frame times and their split into phases, in a ring buffer
+
+    a frame runs from one frameStarted to the next. The UI build is reported
+    by the GUI, the other phases are measured between the Ogre callbacks and
+    anything not covered, like input handling, ends up in "Other".
+    """
+    PHASES = ("UI build", "Scene update", "Render queue", "Swap", "Other")
+    REFRESH = 0.25
+
+    def __init__(self, capacity=1000):
+        Ogre.FrameListener.__init__(self)
+        Ogre.RenderQueueListener.__init__(self)
+
+        # ring buffer of (frame time, *phases) in seconds
+        self.capacity = capacity
+        self.frames = [None] * capacity
+        self.total = 0
+
+        # frames since record(), None if not recording
+        self.recording = None
+
+        self._start = None
+        self._mark = 0
+        self._queued = None
+        self._phases = [0.0] * (len(self.PHASES) - 1)
+
+        self._summary = None
+        self._summary_time = 0
+
+        # seconds without rendering, see MeshViewer.run
+        self.idle_total = 0.0
+        self.idle_share = 0.0
+        self._idle_since_summary = 0.0
+
+    def idle(self, seconds):
+        """no frame was rendered for seconds, so they do not count as frame time"""
+        self.idle_total += seconds
+        self._idle_since_summary += seconds
+        self._start = None
+
+    def _commit(self, frame):
+        item = (frame, *self._phases, max(0.0, frame - sum(self._phases)))
+        self.frames[self.total % self.capacity] = item
+        self.total += 1
+        if self.recording is not None:
+            self.recording.append((time.time(), *item))
+
+    def frameStarted(self, evt):
+        now = time.perf_counter()
+        if self._start is not None:
+            self._commit(now - self._start)
+        self._start = now
+        self._mark = now
+        self._queued = None
+        self._phases = [0.0] * (len(self.PHASES) - 1)
+        return True
+
+    def ui_built(self, start):
+        now = time.perf_counter()
+        self._phases[0] += now - start
+        self._mark = now
+
+    def preRenderQueues(self):
+        now = time.perf_counter()
+        self._phases[1] += now - self._mark
+        self._mark = now
+
+    def postRenderQueues(self):
+        now = time.perf_counter()
+        self._phases[2] += now - self._mark
+        self._mark = now
+
+    def frameRenderingQueued(self, evt):
+        self._queued = time.perf_counter()
+        return True
+
+    def frameEnded(self, evt):
+        # the buffers are swapped between the two
+        if self._queued is not None:
+            self._phases[3] += time.perf_counter() - self._queued
+        return True
+
+    def record(self):
+        self.recording = []
+
+    def stop(self, path):
+        """write the recorded frames as CSV to path"""
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["timestamp", "frame_ms"] + [f"{p.lower().replace(' ', '_')}_ms" for p in self.PHASES])
+            for timestamp, *times in self.recording:
+                writer.writerow([f"{timestamp:.6f}"] + [f"{t * 1000:.3f}" for t in times])
+        self.recording = None
+        Ogre.LogManager.getSingleton().logMessage(f"Frame times saved to: {os.path.normpath(path)}")
+
+    def summary(self, bins=40):
+        """(percentiles, phase averages, histogram, histogram max) in ms or None
+
+        sorting the ring buffer every frame would cost more than it shows, so
+        this is refreshed a few times per second.
+        """
+        now = time.perf_counter()
+        if now - self._summary_time < self.REFRESH:
+            return self._summary
+        if self._summary_time:
+            self.idle_share = min(1.0, self._idle_since_summary / (now - self._summary_time))
+        self._idle_since_summary = 0.0
+        self._summary_time = now
+
+        frames = [f for f in self.frames if f is not None]
+        if not frames:
+            return None
+
+        ordered = sorted(f[0] * 1000 for f in frames)
+        percentiles = tuple((p, percentile(ordered, p)) for p in (50, 95, 99))
+        phases = tuple((name, sum(f[i + 1] for f in frames) * 1000 / len(frames)) for i, name in enumerate(self.PHASES))
+
+        # clip the outliers, so the bulk of the frames stays visible
+        top = max(percentile(ordered, 99) * 1.25, 1e-3)
+        histogram = [0.0] * bins
+        for ms in ordered:
+            histogram[min(bins - 1, int(ms / top * bins))] += 1
+
+        self._summary = (percentiles, phases, histogram, top)
+        return self._summary
+
+class SkinningTimer(Ogre.SceneManager_Listener):
+    """times the skeleton update and software skinning of the inspected entity
+
+    the scene manager would do this later in the frame, but skips entities that
+    were already updated, so the work is not done twice.
+    """
+
+    def __init__(self, app):
+        Ogre.SceneManager_Listener.__init__(self)
+        self.app = app
+        # smoothed, in ms
+        self.ms = 0.0
+
+    def preFindVisibleObjects(self, source, irs, v):
+        entity = self.app.entity
+        if entity is None or not entity.hasSkeleton():
+            return
+        start = time.perf_counter()
+        entity._updateAnimation()
+        self.ms += ((time.perf_counter() - start) * 1000 - self.ms) * 0.1
+
 class MeshViewerGui(Ogre.RenderTargetListener):
 
     def __init__(self, app):
@@ -190,11 +2512,50 @@ class MeshViewerGui(Ogre.RenderTargetListener):
 
         self.app = app
 
-        self.highlighted = -1
-        self.orig_mat = None
         self.logwin = app.logwin
 
         self.lod_idx_override = -1
+        self.mesh_info = None
+
+        self.selected_submesh = -1
+        self.selected_submeshes = set()
+        self.submesh_filter = ""
+        self.submesh_sort = (0, False)
+        self.submesh_order = None
+        self.picked = None
+
+        self.analysis = None
+        self.analysed = 0
+        self.optimiser = None
+        self.optimise_path = None
+        self.optimise_status = None
+
+        self.compact_thresholds = dict(COMPACT_THRESHOLDS)
+        self.compact_report = None
+
+        self.lod_strategy = 0
+        self.lod_method = 0
+        self.lod_rows = None
+        self.lod_generation = None
+        self.lod_report = None
+        self.lod_budget = 0
+        self.lod_status = None
+
+        self.skinning = None
+        self.weight_budget = WEIGHT_BUDGET
+
+        self.show_textures = False
+        self.texture_report = None
+        self.table_sort = {"Materials": (2, True), "Textures": (4, True), "Memory": (4, True)}
+
+    def reset(self):
+        """forget about the asset, before it is unloaded"""
+        self.set_mesh_info(None)
+        self.app.highlight.clear()
+        self.show_material = None
+        self.lod_idx_override = -1
+        self.skinning = None
+        self.texture_report = None
 
     def draw_about(self):
         flags = ImGui.WindowFlags_AlwaysAutoResize
@@ -219,8 +2580,7 @@ class MeshViewerGui(Ogre.RenderTargetListener):
         ImGui.Separator()
 
         if ImGui.Button("Apply & Restart"):
-            app.restart = True
-            app.getRoot().queueEndRendering()
+            app.restart()
 
         ImGui.End()
 
@@ -251,17 +2611,91 @@ class MeshViewerGui(Ogre.RenderTargetListener):
                 ImGui.TableSetColumnIndex(1)
                 ImGui.Text(value)
             ImGui.EndTable()
+
+        if self.app.batcher:
+            self.draw_batching(self.app.batcher)
+        self.draw_profiler(self.app.profiler)
         ImGui.End()
 
+    def draw_batching(self, batcher):
+        ImGui.Text(BATCHING_MODES[batcher.mode])
+        ImGui.Separator()
+        if not batcher.done:
+            ImGui.ProgressBar(1 - len(batcher.tasks) / max(1, batcher.total), ImGui.ImVec2(ImGui.GetFontSize()*15, 0))
+            return
+        if batcher.after is None:
+            ImGui.Text("\uf252 measuring..")
+            return
+
+        if ImGui.BeginTable("Batching", 3):
+            rows = (("Batches", "{:d}"), ("Triangles", "{:d}"), ("Frame p50", "{:.2f}ms"))
+            for i, (name, fmt) in enumerate(rows):
+                ImGui.TableNextRow()
+                ImGui.TableSetColumnIndex(0)
+                ImGui.Text(name)
+                ImGui.TableSetColumnIndex(1)
+                ImGui.Text(fmt.format(batcher.before[i]))
+                ImGui.TableSetColumnIndex(2)
+                ImGui.Text("\uf061 " + fmt.format(batcher.after[i]))
+            ImGui.EndTable()
+
+    def draw_profiler(self, profiler):
+        summary = profiler.summary()
+        if summary is not None:
+            percentiles, phases, histogram, top = summary
+            ImGui.Text("Frame Time")
+            ImGui.Separator()
+            ImGui.Text("  ".join(f"p{p} {ms:.2f}ms" for p, ms in percentiles))
+            if self.app.on_demand:
+                ImGui.Text(f"Idle {profiler.idle_share:.0%} ({profiler.idle_total:.0f}s total)")
+            ImGui.PlotHistogram("##frametimes", histogram, len(histogram), 0, f"0 - {top:.1f}ms", 0, max(histogram),
+                                ImGui.ImVec2(ImGui.GetFontSize()*15, ImGui.GetFontSize()*3))
+            if ImGui.BeginTable("Phases", 2):
+                for name, ms in phases:
+                    ImGui.TableNextRow()
+                    ImGui.TableSetColumnIndex(0)
+                    ImGui.Text(name)
+                    ImGui.TableSetColumnIndex(1)
+                    ImGui.Text(f"{ms:.2f}ms")
+                ImGui.EndTable()
+
+        if profiler.recording is None:
+            if ImGui.Button("\uf111 Record"):
+                profiler.record()
+        elif ImGui.Button(f"\uf04d Stop ({len(profiler.recording)} frames)"):
+            profiler.stop(self.app.getFSLayer().getWritablePath(time.strftime("frametimes_%Y%m%d_%H%M%S.csv")))
+
     def draw_loading(self):
+        loader = self.app.loader
         win = self.app.getRenderWindow()
         ImGui.SetNextWindowPos(ImGui.ImVec2(win.getWidth() * 0.5, win.getHeight() * 0.5), 0, ImGui.ImVec2(0.5, 0.5))
 
-        flags = ImGui.WindowFlags_NoTitleBar | ImGui.WindowFlags_NoResize | ImGui.WindowFlags_NoSavedSettings
+        flags = ImGui.WindowFlags_NoTitleBar | ImGui.WindowFlags_NoResize | ImGui.WindowFlags_NoSavedSettings | \
+                ImGui.WindowFlags_AlwaysAutoResize
         ImGui.Begin("Loading", True, flags)
         ImGui.Text(self.app.filename)
         ImGui.Separator()
-        ImGui.Text("\uf252 Loading..            ")
+        ImGui.Text(f"\uf252 Loading.. {loader.stage}")
+
+        size = ImGui.ImVec2(ImGui.GetFontSize()*15, 0)
+        if loader.stage == "reading file":
+            if loader.bytes_total:
+                mb_read = loader.bytes_read / 2**20
+                mb_total = loader.bytes_total / 2**20
+                ImGui.ProgressBar(loader.bytes_read / loader.bytes_total, size,
+                                  f"file read {mb_read:.1f} / {mb_total:.1f} MB")
+        elif loader.stage == "converting":
+            # assimp does not report how far it got
+            ImGui.ProgressBar(-ImGui.GetTime(), size, "in background")
+        else:
+            ImGui.ProgressBar(loader.resources_done / loader.resources_total, size,
+                              f"resources {loader.resources_done} / {loader.resources_total}")
+
+        for kind, count in loader.counts.items():
+            ImGui.BulletText(f"{kind}: {count}")
+
+        if ImGui.Button("Cancel"):
+            loader.cancel()
         ImGui.End()
 
     def draw_material(self, matname):
@@ -306,15 +2740,503 @@ class MeshViewerGui(Ogre.RenderTargetListener):
 
         ImGui.End()
 
+    def _sorted_table(self, name, columns, rows, fmts):
+        """table of rows, sorted in place by the chosen column"""
+        flags = ImGui.TableFlags_Borders | ImGui.TableFlags_RowBg | ImGui.TableFlags_ScrollY | \
+                ImGui.TableFlags_Sortable | ImGui.TableFlags_Resizable | ImGui.TableFlags_SizingStretchProp
+        height = ImGui.GetTextLineHeightWithSpacing() * (min(len(rows), 10) + 1.5)
+        if not ImGui.BeginTable(name, len(columns), flags, ImGui.ImVec2(0, height)):
+            return
+
+        col, descending = self.table_sort[name]
+        ImGui.TableSetupScrollFreeze(0, 1)
+        for i, column in enumerate(columns):
+            flags = ImGui.TableColumnFlags_DefaultSort if i == col else 0
+            if i == col and descending:
+                flags |= ImGui.TableColumnFlags_PreferSortDescending
+            ImGui.TableSetupColumn(column, flags)
+        ImGui.TableHeadersRow()
+
+        specs = ImGui.TableGetSortSpecs()
+        if specs and specs.SpecsDirty:
+            self.table_sort[name] = (specs.Specs.ColumnIndex, specs.Specs.SortDirection == ImGui.SortDirection_Descending)
+            specs.SpecsDirty = False
+            col, descending = self.table_sort[name]
+            rows.sort(key=lambda r: r[col], reverse=descending)
+
+        clipper = ImGui.ImGuiListClipper()
+        clipper.Begin(len(rows))
+        while clipper.Step():
+            for row in rows[clipper.DisplayStart:clipper.DisplayEnd]:
+                ImGui.TableNextRow()
+                for value, fmt in zip(row, fmts):
+                    ImGui.TableNextColumn()
+                    ImGui.Text(fmt(value))
+        ImGui.EndTable()
+
+    def draw_textures(self):
+        ImGui.SetNextWindowSize(ImGui.ImVec2(ImGui.GetFontSize()*36, ImGui.GetFontSize()*30), ImGui.Cond_FirstUseEver)
+        self.show_textures = ImGui.Begin("Texture Memory", self.show_textures)[1]
+
+        if self.texture_report is None and self.app.loader is None:
+            self.texture_report = TextureReport(self.app.scn_mgr)
+            for name, rows in (("Materials", self.texture_report.materials), ("Textures", self.texture_report.textures)):
+                col, descending = self.table_sort[name]
+                rows.sort(key=lambda r, col=col: r[col], reverse=descending)
+        report = self.texture_report
+
+        budget = self.app.max_texture_size
+        ImGui.SetNextItemWidth(ImGui.GetFontSize()*8)
+        if ImGui.BeginCombo("Budget", f"{budget}px" if budget else "Off"):
+            for size in TEXTURE_BUDGETS:
+                if ImGui.Selectable(f"{size}px" if size else "Off", size == budget) and size != budget:
+                    # applied when loading
+                    self.app.max_texture_size = size
+                    self.app.reload(keep_cam=True)
+            ImGui.EndCombo()
+        ImGui.SameLine()
+        if ImGui.Button("\uf021 Refresh"):
+            self.texture_report = None
+
+        if report is not None:
+            ImGui.Text(f"{len(report.textures)} textures: {format_bytes(report.total)}, "
+                       f"{format_bytes(report.total_compressed)} if block compressed")
+            ImGui.Separator()
+            ImGui.Text("Materials")
+            self._sorted_table("Materials", ("Material", "Textures", "Memory", "Compressed"), report.materials,
+                               (str, str, format_bytes, format_bytes))
+            ImGui.Text("Textures")
+            self._sorted_table("Textures", ("Texture", "Size", "Format", "Mips", "Memory", "Compressed", "Materials"),
+                               report.textures, (str, str, str, str, format_bytes, format_bytes, str))
+        ImGui.End()
+
     def load_file(self):
         infile = askopenfilename(app.filedir)
         if not infile:
             return
 
-        app.infile = infile
-        app.reload()
+        self.app.infile = infile
+        self.app.reload()
+
+    def draw_submesh_table(self, info):
+        """sortable and searchable list of the submeshes, returns the hovered one"""
+        hovered = -1
+
+        ImGui.SetNextItemWidth(-1)
+        changed, self.submesh_filter = ImGui.InputTextWithHint("##smfilter", "\uf002 Material or #index",
+                                                               self.submesh_filter, 256)
+        if changed:
+            self.submesh_order = None
+
+        flags = ImGui.TableFlags_Borders | ImGui.TableFlags_RowBg | ImGui.TableFlags_ScrollY | \
+                ImGui.TableFlags_Sortable | ImGui.TableFlags_Resizable | ImGui.TableFlags_SizingStretchProp
+        rows = len(self.submesh_order) if self.submesh_order is not None else len(info.submeshes)
+        height = ImGui.GetTextLineHeightWithSpacing() * (min(rows, 12) + 1.5)
+        if not ImGui.BeginTable("SubMeshes", 6, flags, ImGui.ImVec2(0, height)):
+            return hovered
+
+        ImGui.TableSetupScrollFreeze(0, 1)
+        ImGui.TableSetupColumn("#", ImGui.TableColumnFlags_DefaultSort)
+        ImGui.TableSetupColumn("Material")
+        ImGui.TableSetupColumn("Vertices")
+        ImGui.TableSetupColumn("Indices")
+        ImGui.TableSetupColumn("Memory")
+        ImGui.TableSetupColumn("ACMR")
+        ImGui.TableHeadersRow()
+
+        specs = ImGui.TableGetSortSpecs()
+        if specs and specs.SpecsDirty:
+            self.submesh_sort = (specs.Specs.ColumnIndex, specs.Specs.SortDirection == ImGui.SortDirection_Descending)
+            specs.SpecsDirty = False
+            self.submesh_order = None
+
+        if self.analysis is not None and len(self.analysis.metrics) != self.analysed:
+            # more metrics arrived, which may change the order
+            self.analysed = len(self.analysis.metrics)
+            self.submesh_order = None
+
+        if self.submesh_order is None:
+            needle = self.submesh_filter.lower()
+            order = [i for i, sm in enumerate(info.submeshes) if needle in sm.search]
+            col, descending = self.submesh_sort
+            keys = (lambda i: i, lambda i: info.submeshes[i].row[1], lambda i: info.submeshes[i].vertex_count,
+                    lambda i: info.submeshes[i].index_count, lambda i: info.submeshes[i].nbytes,
+                    self.analysis.sort_key if self.analysis is not None else lambda i: i)
+            order.sort(key=keys[col], reverse=descending)
+            self.submesh_order = order
+
+        clipper = ImGui.ImGuiListClipper()
+        clipper.Begin(len(self.submesh_order))
+        while clipper.Step():
+            for row in range(clipper.DisplayStart, clipper.DisplayEnd):
+                i = self.submesh_order[row]
+                cells = info.submeshes[i].row
+                ImGui.TableNextRow()
+                ImGui.TableNextColumn()
+                if ImGui.Selectable(cells[0], i in self.selected_submeshes, ImGui.SelectableFlags_SpanAllColumns):
+                    self.select_submesh(i, ImGui.GetIO().KeyCtrl)
+                if ImGui.IsItemHovered():
+                    hovered = i
+                for txt in cells[1:]:
+                    ImGui.TableNextColumn()
+                    ImGui.Text(txt)
+                ImGui.TableNextColumn()
+                ImGui.Text(self.analysis.cells.get(i, "...") if self.analysis is not None else "-")
+        clipper.End()
+        ImGui.EndTable()
+
+        return hovered
+
+    def show_pick(self, entity, submesh, triangle):
+        if self.mesh_info is None or self.mesh_info.entity is not entity:
+            self.set_mesh_info(MeshInfo(entity))
+        self.select_submesh(submesh, False)
+        self.picked = f"\uf245 Picked: SubMesh #{submesh}, Triangle #{triangle}"
+
+    def set_mesh_info(self, info):
+        self.mesh_info = info
+        self.selected_submesh = -1
+        self.selected_submeshes = set()
+        self.submesh_order = None
+        self.picked = None
+
+        if self.analysis is not None:
+            self.analysis.cancel()
+        if self.optimiser is not None:
+            self.optimiser.cancel()
+        self.analysis = None
+        self.analysed = 0
+        self.optimiser = None
+        self.optimise_status = None
+        self.compact_report = None
+
+        if self.lod_generation is not None:
+            self.lod_generation.cancel()
+        self.lod_generation = None
+        self.lod_rows = None
+        self.lod_report = None
+        self.lod_status = None
+
+    def refresh_lod_info(self, entity):
+        """rebuild the snapshot after the LOD levels of the mesh changed, keeping the selection"""
+        self.mesh_info = MeshInfo(entity)
+        self.lod_idx_override = -1
+        entity.setMeshLodBias(1)
+
+    def select_submesh(self, i, add):
+        if add:
+            self.selected_submeshes ^= {i}
+        elif self.selected_submeshes == {i}:
+            self.selected_submeshes = set()
+        else:
+            self.selected_submeshes = {i}
+
+        self.selected_submesh = i if i in self.selected_submeshes else -1
+
+    def draw_submesh_details(self, sm):
+        ImGui.Text(sm.label)
+        ImGui.BulletText("Material:")
+        ImGui.SameLine()
+        if ImGui.TextLink(sm.material_label):
+            self.show_material = sm.material
+        ImGui.BulletText(sm.operation)
+        ImGui.BulletText(sm.indices)
+
+        if sm.vertex_decl:
+            if ImGui.TreeNode(sm.vertices):
+                show_vertex_decl(sm.vertex_decl)
+                ImGui.TreePop()
+        else:
+            ImGui.BulletText(sm.vertices)
+
+        if self.analysis is not None and self.selected_submesh in self.analysis.lines:
+            if ImGui.TreeNode("GPU Efficiency"):
+                for txt in self.analysis.lines[self.selected_submesh]:
+                    ImGui.BulletText(txt)
+                ImGui.TreePop()
+
+    def update_analysis(self, mesh):
+        """start the analysis and apply a finished optimisation"""
+        if self.analysis is None:
+            self.analysis = GeometryAnalysis(mesh)
+
+        optimiser = self.optimiser
+        if optimiser is None or not optimiser.done:
+            return
+
+        self.optimiser = None
+        if not optimiser.apply():
+            return
+        # the BVH and the snapshot refer to the old triangles
+        self.app.bvh_cache.pop(mesh.getName(), None)
+        self.mesh_info = MeshInfo(self.mesh_info.entity)
+        self.picked = None
+        Ogre.MeshSerializer().exportMesh(mesh, self.optimise_path)
+        skipped = f", {optimiser.skipped} submeshes skipped" if optimiser.skipped else ""
+        kept = "" if optimiser.reorder_vertices else ", vertex order kept"
+        self.optimise_status = f"\uf0c7 Saved {os.path.basename(self.optimise_path)}{skipped}{kept}"
+        Ogre.LogManager.getSingleton().logMessage(f"Optimised mesh saved to '{self.optimise_path}'")
+
+        # measure again, to report the change
+        self.analysis = GeometryAnalysis(mesh, self.analysis)
+        self.analysed = 0
+
+    def draw_optimise(self, mesh):
+        if self.optimiser is not None:
+            ImGui.Text("\uf110 Optimising...")
+        elif self.analysis.done and self.lod_generation is None and ImGui.Button("\uf0ad Optimise & Save.."):
+            path = asksavefilename(self.app.filedir, os.path.basename(mesh.getName()))
+            if path:
+                self.optimise_path = path
+                self.optimiser = MeshOptimiser(mesh)
+
+        if self.optimise_status:
+            ImGui.Text(self.optimise_status)
+
+    def draw_compact(self, mesh):
+        if not ImGui.TreeNode("Vertex Compaction"):
+            return
+
+        for key, label in (("normal", "Normal error"), ("texcoord", "Texcoord error"), ("colour", "Colour error")):
+            self.compact_thresholds[key] = ImGui.InputFloat(label, self.compact_thresholds[key], 0, 0, "%.5f")[1]
+
+        if ImGui.Button("\uf066 Compact & Save.."):
+            path = asksavefilename(self.app.filedir, os.path.basename(compacted_path(mesh.getName())))
+            if path:
+                rows, changes = compact_mesh(mesh, path, self.compact_thresholds)
+                lmgr = Ogre.LogManager.getSingleton()
+                for change in changes:
+                    lmgr.logMessage(change)
+                lmgr.logMessage(f"Compacted mesh saved to '{path}'")
+                self.compact_report = (format_compaction(rows), f"{len(changes)} conversions")
+
+        if self.compact_report:
+            cells, summary = self.compact_report
+            ImGui.Text(summary)
+            if ImGui.BeginTable("Compaction", 4, ImGui.TableFlags_Borders | ImGui.TableFlags_SizingStretchProp):
+                for header in ("Part", "Before", "After", "Saved"):
+                    ImGui.TableSetupColumn(header)
+                ImGui.TableHeadersRow()
+                for row in cells:
+                    ImGui.TableNextRow()
+                    for txt in row:
+                        ImGui.TableNextColumn()
+                        ImGui.Text(txt)
+                ImGui.EndTable()
+
+        ImGui.TreePop()
+
+    def update_lod_generation(self, entity):
+        """pick up the levels of a finished generation"""
+        generation = self.lod_generation
+        if generation is None or not generation.done:
+            return
+
+        self.lod_generation = None
+        if not generation.apply():
+            return
+        self.refresh_lod_info(entity)
+        stats = lod_level_stats(entity.getMesh())
+        self.lod_budget = stats[0][1]
+        if len(stats) > 1:
+            self.lod_report = (format_lod_stats(stats), [s[1] for s in stats])
+            self.lod_status = f"\uf00c Generated {len(stats) - 1} levels in {generation.duration:.2f}s"
+        else:
+            self.lod_status = "\uf071 No LOD levels produced, every reduction was rejected"
+        Ogre.LogManager.getSingleton().logMessage(
+            f"Generated {len(stats) - 1} LOD levels for '{printable(entity.getMesh().getName())}'"
+            f" in {generation.duration:.3f}s")
+
+    def draw_lod_generation(self, entity):
+        if not ImGui.TreeNode("Generate LODs"):
+            return
+
+        mesh = entity.getMesh()
+        if self.lod_rows is None:
+            self.lod_rows = default_lod_levels(LOD_STRATEGIES[self.lod_strategy][0], self.mesh_info.radius)
+
+        if self.lod_generation is not None:
+            generation = self.lod_generation
+            ImGui.ProgressBar(-ImGui.GetTime(), ImGui.ImVec2(ImGui.GetFontSize()*10, 0), "Generating..")
+            ImGui.SameLine()
+            ImGui.Text(f"{generation.elapsed:.1f}s")
+            if ImGui.Button("Cancel"):
+                generation.cancel()
+                self.lod_generation = None
+                self.lod_status = "Generation cancelled"
+            ImGui.TreePop()
+            return
+
+        ImGui.SetNextItemWidth(ImGui.GetFontSize()*10)
+        if ImGui.BeginCombo("Strategy", LOD_STRATEGIES[self.lod_strategy][1]):
+            for i, (name, label) in enumerate(LOD_STRATEGIES):
+                if ImGui.Selectable(label, i == self.lod_strategy) and i != self.lod_strategy:
+                    self.lod_strategy = i
+                    self.lod_rows = default_lod_levels(name, self.mesh_info.radius, len(self.lod_rows))
+            ImGui.EndCombo()
+        ImGui.SetNextItemWidth(ImGui.GetFontSize()*10)
+        if ImGui.BeginCombo("Reduction", LOD_METHODS[self.lod_method][0]):
+            for i, (label, _) in enumerate(LOD_METHODS):
+                if ImGui.Selectable(label, i == self.lod_method):
+                    self.lod_method = i
+            ImGui.EndCombo()
+
+        value_label = "Distance" if LOD_STRATEGIES[self.lod_strategy][0].startswith("distance") else "Screen ratio"
+        remove = -1
+        if ImGui.BeginTable("LodLevels", 3, ImGui.TableFlags_SizingStretchProp):
+            ImGui.TableSetupColumn(value_label)
+            ImGui.TableSetupColumn("Reduction")
+            ImGui.TableSetupColumn("", ImGui.TableColumnFlags_WidthFixed)
+            ImGui.TableHeadersRow()
+            for i, row in enumerate(self.lod_rows):
+                ImGui.PushID(i)
+                ImGui.TableNextRow()
+                ImGui.TableNextColumn()
+                ImGui.SetNextItemWidth(-1)
+                row[0] = ImGui.InputFloat("##value", row[0], 0, 0, "%.3f")[1]
+                ImGui.TableNextColumn()
+                ImGui.SetNextItemWidth(-1)
+                row[1] = ImGui.InputFloat("##reduction", row[1], 0, 0, "%.3f")[1]
+                ImGui.TableNextColumn()
+                if ImGui.SmallButton("\uf00d"):
+                    remove = i
+                ImGui.PopID()
+            ImGui.EndTable()
+        if remove > -1:
+            del self.lod_rows[remove]
+        if ImGui.SmallButton("\uf067 Add Level"):
+            last = self.lod_rows[-1] if self.lod_rows else [self.mesh_info.radius * 2, 0.25]
+            self.lod_rows.append([last[0] * 2, min(1, (1 + last[1]) / 2)])
+
+        if self.lod_rows and ImGui.Button("\uf0e7 Generate"):
+            self.lod_report = None
+            self.lod_status = None
+            generation = LodGeneration(mesh, LOD_STRATEGIES[self.lod_strategy][0], LOD_METHODS[self.lod_method][1],
+                                       [tuple(row) for row in self.lod_rows])
+            self.lod_generation = generation
+
+        if self.lod_report:
+            cells, triangles = self.lod_report
+            ImGui.SameLine()
+            if ImGui.Button("\uf0c7 Save LODs.."):
+                path = asksavefilename(self.app.filedir, os.path.basename(mesh.getName()))
+                if path:
+                    Ogre.MeshSerializer().exportMesh(mesh, path)
+                    self.lod_status = f"\uf0c7 Saved {os.path.basename(path)}"
+                    Ogre.LogManager.getSingleton().logMessage(f"Mesh with LODs saved to '{path}'")
+
+            if ImGui.BeginTable("LodStats", 4, ImGui.TableFlags_Borders | ImGui.TableFlags_SizingStretchProp):
+                for header in ("Level", value_label, "Triangles", "Vertices"):
+                    ImGui.TableSetupColumn(header)
+                ImGui.TableHeadersRow()
+                for row in cells:
+                    ImGui.TableNextRow()
+                    for txt in row:
+                        ImGui.TableNextColumn()
+                        ImGui.Text(txt)
+                ImGui.EndTable()
+
+            # preview the most detailed level within the budget
+            changed, self.lod_budget = ImGui.SliderInt("Triangle budget", self.lod_budget, triangles[-1], triangles[0])
+            if changed:
+                self.lod_idx_override = next((i for i, n in enumerate(triangles) if n <= self.lod_budget),
+                                             len(triangles) - 1)
+
+        if self.lod_status:
+            ImGui.Text(self.lod_status)
+
+        ImGui.TreePop()
+
+    def draw_skinning(self, entity):
+        app = self.app
+        mode = "hardware" if entity.isHardwareAnimationEnabled() else "software"
+        ImGui.Text(f"Skinning: {app.skinning_timer.ms:.3f}ms per frame ({mode})")
+        changed, enabled = ImGui.Checkbox("Hardware Skinning", app.hardware_skinning)
+        if changed:
+            app.set_hardware_skinning(enabled)
+
+        if np is None:
+            return
+
+        changed, app.use_pose_cache = ImGui.Checkbox("Pose Cache", app.use_pose_cache)
+        app.update_pose_cache(entity)
+        poses = app.pose_cache
+        if poses is not None and not poses.done:
+            ImGui.SameLine()
+            ImGui.Text(f"\uf252 baking {len(poses.samples)}/{len(poses.names)}")
+
+        if self.skinning is None or self.skinning[0] is not entity:
+            self.skinning = (entity, skinning_stats(entity.getMesh()))
+        bones, histogram, max_bones = self.skinning[1]
+        ImGui.Text(f"{bones} bones, up to {max_bones} per submesh")
+
+        ImGui.SetNextItemWidth(ImGui.GetFontSize()*8)
+        self.weight_budget = ImGui.SliderInt("Weight budget", self.weight_budget, 1, 4)[1]
+        if ImGui.BeginTable("Weights", 2, ImGui.TableFlags_SizingStretchProp):
+            for n, count in enumerate(histogram):
+                if n == 0 or not count:
+                    continue
+                ImGui.TableNextRow()
+                ImGui.TableSetColumnIndex(0)
+                ImGui.Text(f"{n} weights")
+                ImGui.TableSetColumnIndex(1)
+                ImGui.Text(f"{count} vertices")
+            ImGui.EndTable()
+        over = sum(histogram[self.weight_budget + 1:])
+        if over:
+            ImGui.TextColored(ImGui.ImVec4(1, 0.4, 0.4, 1), f"\uf071 {over} vertices exceed the budget")
+
+    def draw_cached_animation(self, poses, name):
+        if poses.current == name:
+            if ImGui.Button("\uf048 Reset"):
+                poses.stop()
+            ImGui.SameLine()
+            if ImGui.Button("\uf04c Pause" if poses.playing else "\uf04b Play"):
+                poses.playing = not poses.playing
+        elif ImGui.Button("\uf04b Play"):
+            poses.play(name)
+
+        length = poses.lengths[name]
+        if length > 0:
+            ImGui.SameLine()
+            t = poses.time if poses.current == name else 0
+            changed, value = ImGui.SliderFloat("", t, 0, length, "%.3fs")
+            if changed:
+                poses.seek(name, value)
+
+    def draw_lod_levels(self, entity, info):
+        if len(info.lod_labels) < 2:
+            return
+
+        if self.lod_idx_override > -1:
+            entity.setMeshLodBias(1, self.lod_idx_override, self.lod_idx_override)
+        else:
+            entity.setMeshLodBias(1)  # reset LOD override
+        curr_idx = entity.getCurrentLodIndex()
+        ImGui.AlignTextToFramePadding()
+        ImGui.Text(info.lod_strategy)
+        ImGui.SameLine()
+        
+        if ImGui.Checkbox("active", self.lod_idx_override == -1)[1]:
+            self.lod_idx_override = -1
+        elif self.lod_idx_override == -1:
+            self.lod_idx_override = curr_idx
+        
+        for i, txt in enumerate(info.lod_labels):
+            ImGui.Bullet()
+            if ImGui.Selectable(txt, i == curr_idx):
+                self.lod_idx_override = i
+
+            if ImGui.IsItemHovered():
+                # force this LOD level
+                entity.setMeshLodBias(1, i, i)
 
     def preRenderTargetUpdate(self, evt):
+        start = time.perf_counter()
+        self.build_frame()
+        self.app.profiler.ui_built(start)
+
+    def build_frame(self):
         if not self.app.cam.getViewport().getOverlaysEnabled():
             return
 
@@ -322,7 +3244,7 @@ class MeshViewerGui(Ogre.RenderTargetListener):
 
         entity = self.app.entity
 
-        if entity is None and self.app.attach_node is None:
+        if self.app.loader is not None:
             self.draw_loading()
             return
 
@@ -335,6 +3257,8 @@ class MeshViewerGui(Ogre.RenderTargetListener):
                     app.reload(keep_cam=True)
                 if ImGui.MenuItem("Save Screenshot", "P"):
                     self.app._save_screenshot()
+                if ImGui.MenuItem(f"Save Screenshot x{self.app.screenshot_scale}", None, False, np is not None):
+                    self.app._save_highres_screenshot()
                 ImGui.Separator()
                 if ImGui.MenuItem("Renderer Settings"):
                     self.show_render_settings = True
@@ -345,6 +3269,8 @@ class MeshViewerGui(Ogre.RenderTargetListener):
             if ImGui.BeginMenu("View"):
                 if ImGui.MenuItem("Side Panel", "N", self.side_panel_visible):
                     self.side_panel_visible = not self.side_panel_visible
+                if ImGui.MenuItem("Browser", "F2", self.app.browser.show):
+                    self.app.browser.show = not self.app.browser.show
                 if ImGui.BeginMenu("Fixed Camera Yaw"):
                     if ImGui.MenuItem("Disabled", "", self.app.fixed_yaw_axis == -1):
                         self.app.fixed_yaw_axis = -1
@@ -364,6 +3290,21 @@ class MeshViewerGui(Ogre.RenderTargetListener):
                     self.app._toggle_projection()
                 if ImGui.MenuItem("Wireframe Mode", "W", app.cam.getPolygonMode() == Ogre.PM_WIREFRAME):
                     self.app._toggle_wireframe_mode()
+                if ImGui.MenuItem("Auto Reload", None, self.app.watch):
+                    self.app.set_watch(not self.app.watch)
+                if ImGui.MenuItem("Texture Memory", None, self.show_textures):
+                    self.show_textures = not self.show_textures
+                if ImGui.MenuItem("Render on Demand", None, self.app.on_demand):
+                    self.app.on_demand = not self.app.on_demand
+                ImGui.EndMenu()
+
+            if self.app.attach_node and ImGui.BeginMenu("Scene Batching"):
+                mode = self.app.batcher.mode if self.app.batcher else 0
+                for i, name in enumerate(BATCHING_MODES):
+                    if ImGui.MenuItem(name, None, mode == i) and mode != i:
+                        self.app.set_batching(i)
+                        # where the comparison is shown
+                        self.show_metrics = True
                 ImGui.EndMenu()
 
             if entity is not None and ImGui.BeginMenu("Overlay"):
@@ -401,88 +3342,82 @@ class MeshViewerGui(Ogre.RenderTargetListener):
         if self.show_material is not None:
             self.draw_material(self.show_material)
 
+        if self.show_textures:
+            self.draw_textures()
+
         self.logwin.draw()
 
+        clicked = self.app.browser.draw(self.app.filedir)
+        if clicked:
+            self.app.infile = clicked
+            self.app.reload()
+
         if entity is None:
             # no sidebar yet when loading .scene
             return
 
         if self.side_panel_visible is False:
             # hide side panel
+            self.app.highlight.show(entity, ())
             return
 
         # Mesh Info Sidebar
-        mesh = entity.getMesh()
+        if self.mesh_info is None or self.mesh_info.entity is not entity:
+            self.set_mesh_info(MeshInfo(entity))
+        info = self.mesh_info
 
         ImGui.SetNextWindowSize(ImGui.ImVec2(300, ImGui.GetFontSize()*25), ImGui.Cond_FirstUseEver)
         ImGui.SetNextWindowPos(ImGui.ImVec2(0, ImGui.GetFontSize()*1.5))
         flags = ImGui.WindowFlags_NoTitleBar | ImGui.WindowFlags_NoMove
         ImGui.Begin("MeshProps", None, flags)
-        ImGui.Text("\uf016 "+mesh.getName())
+        ImGui.Text(info.title)
 
-        highlight = -1
+        highlight = set()
 
         if ImGui.CollapsingHeader("Geometry"):
-            if mesh.sharedVertexData:
-                if ImGui.TreeNode(f"Shared Vertices: {mesh.sharedVertexData.vertexCount}"):
-                    show_vertex_decl(mesh.sharedVertexData.vertexDeclaration)
+            if info.shared_decl:
+                if ImGui.TreeNode(info.shared_vertices):
+                    show_vertex_decl(info.shared_decl)
                     ImGui.TreePop()
             else:
-                ImGui.Text("Shared Vertices: None")
-
-            for i, sm in enumerate(mesh.getSubMeshes()):
-                submesh_details = ImGui.TreeNode(f"SubMesh #{i}")
-                if ImGui.IsItemHovered():
-                    highlight = i
-
-                if submesh_details:
-                    ImGui.BulletText("Material:")
-                    ImGui.SameLine()
-                    if ImGui.TextLink("\uf1b2 "+printable(sm.getMaterialName())):
-                        self.show_material = sm.getMaterialName()
-                    op = ROP2STR[sm.operationType] if sm.operationType <= 6 else "Control Points"
-                    ImGui.BulletText(f"Operation: {op}")
-
-                    if sm.indexData.indexCount:
-                        bits = sm.indexData.indexBuffer.getIndexSize() * 8
-                        ImGui.BulletText(f"Indices: {sm.indexData.indexCount} ({bits} bit)")
-                    else:
-                        ImGui.BulletText("Indices: None")
-
-                    if sm.vertexData:
-                        if ImGui.TreeNode(f"Vertices: {sm.vertexData.vertexCount}"):
-                            show_vertex_decl(sm.vertexData.vertexDeclaration)
-                            ImGui.TreePop()
-                    else:
-                        ImGui.BulletText("Vertices: shared")
-                    ImGui.TreePop()
-
-            if mesh.getEdgeList():
+                ImGui.Text(info.shared_vertices)
+
+            if self.picked:
+                ImGui.Text(self.picked)
+            if np is not None:
+                self.update_analysis(entity.getMesh())
+            hovered = self.draw_submesh_table(info)
+            highlight = self.selected_submeshes | ({hovered} if hovered > -1 else set())
+            if 0 <= self.selected_submesh < len(info.submeshes):
+                self.draw_submesh_details(info.submeshes[self.selected_submesh])
+
+            if info.edge_lists:
                 ImGui.Text("\uf05a EdgeLists present")
 
-        if self.highlighted > -1:
-            entity.getSubEntities()[self.highlighted].setMaterialName(self.orig_mat)
-            self.highlighted = -1
+            if self.analysis is not None:
+                self.draw_optimise(entity.getMesh())
+                self.draw_compact(entity.getMesh())
 
-        if highlight > -1:
-            self.orig_mat = printable(entity.getSubEntities()[highlight].getMaterial().getName())
-            entity.getSubEntities()[highlight].setMaterial(self.app.highlight_mat)
-            self.highlighted = highlight
+        self.app.highlight.show(entity, highlight)
 
-        animations = entity.getAllAnimationStates()
-        if animations is not None and ImGui.CollapsingHeader("Animations"):
+        if info.animations is not None and ImGui.CollapsingHeader("Animations"):
             controller_mgr = Ogre.ControllerManager.getSingleton()
 
-            if entity.hasSkeleton():
-                ImGui.Text(f"\uf183 Skeleton: {mesh.getSkeletonName()}")
+            poses = None
+            if info.skeleton:
+                ImGui.Text(info.skeleton)
                 # self.entity.setUpdateBoundingBoxFromSkeleton(True)
-            if mesh.hasVertexAnimation():
+                self.draw_skinning(entity)
+                poses = self.app.pose_cache
+            if info.vertex_animation:
                 ImGui.Text("\uf1e0 Vertex Animations")
 
-            for name, astate in animations.getAnimationStates().items():
+            for name, astate in info.animations:
                 if ImGui.TreeNode(name):
                     ImGui.PushID(name)
-                    if astate.getEnabled():
+                    if poses is not None and poses.ready(name) and not astate.getEnabled():
+                        self.draw_cached_animation(poses, name)
+                    elif astate.getEnabled():
                         if ImGui.Button("\uf048 Reset"):
                             astate.setEnabled(False)
                             astate.setTimePosition(0)
@@ -502,42 +3437,30 @@ class MeshViewerGui(Ogre.RenderTargetListener):
                     ImGui.PopID()
                     ImGui.TreePop()
 
-        lod_count = mesh.getNumLodLevels()
-        if lod_count > 1 and ImGui.CollapsingHeader("LOD levels"):
-            if self.lod_idx_override > -1:
-                entity.setMeshLodBias(1, self.lod_idx_override, self.lod_idx_override)
-            else:
-                entity.setMeshLodBias(1)  # reset LOD override
-            strategy = mesh.getLodStrategy().getName()
-            curr_idx = entity.getCurrentLodIndex()
-            ImGui.AlignTextToFramePadding()
-            ImGui.Text(f"Strategy: {strategy}")
-            ImGui.SameLine()
-            
-            if ImGui.Checkbox("active", self.lod_idx_override == -1)[1]:
-                self.lod_idx_override = -1
-            elif self.lod_idx_override == -1:
-                self.lod_idx_override = curr_idx
-            
-            for i in range(lod_count):
-                txt = "Base Mesh" if i == 0 else f"Level {i}: {mesh.getLodLevel(i).userValue:.2f}"
-                ImGui.Bullet()
-                if ImGui.Selectable(txt, i == curr_idx):
-                    self.lod_idx_override = i
+        if np is not None:
+            self.update_lod_generation(entity)
+            info = self.mesh_info
 
-                if ImGui.IsItemHovered():
-                    # force this LOD level
-                    entity.setMeshLodBias(1, i, i)
+        if (len(info.lod_labels) > 1 or np is not None) and ImGui.CollapsingHeader("LOD levels"):
+            self.draw_lod_levels(entity, info)
+            if np is not None:
+                self.draw_lod_generation(entity)
 
-        if ImGui.CollapsingHeader("Bounds"):
-            bounds = mesh.getBounds()
+        if ImGui.CollapsingHeader("Memory"):
+            kinds = {}
+            for row in info.memory:
+                kinds[row[1]] = kinds.get(row[1], 0) + row[4]
+            ImGui.Text(f"Total: {format_bytes(info.memory_total)}")
+            ImGui.SameLine()
+            ImGui.TextDisabled("(" + ", ".join(f"{k} {format_bytes(n)}" for k, n in kinds.items()) + ")")
+            self._sorted_table("Memory", ("Buffer", "Kind", "Count", "Stride", "Memory"), info.memory,
+                               (str, str, str, str, format_bytes))
 
+        if ImGui.CollapsingHeader("Bounds"):
             if ImGui.BeginTable("Bounds", 4, ImGui.TableFlags_SizingStretchProp):
-                s = bounds.getSize()
-                draw_lbl_table_row("Size", s)
-                c = bounds.getCenter()
-                draw_lbl_table_row("Center", c)
-                draw_lbl_table_row("Radius", (mesh.getBoundingSphereRadius(), None, None), ("{0:.2f}", None, None), ((1, 1, 1, 1), None, None))
+                draw_lbl_table_row("Size", info.size)
+                draw_lbl_table_row("Center", info.center)
+                draw_lbl_table_row("Radius", (info.radius, None, None), ("{0:.2f}", None, None), ((1, 1, 1, 1), None, None))
                 ImGui.EndTable()
 
         if self.app.attach_node and ImGui.CollapsingHeader("Transform"):
@@ -555,16 +3478,343 @@ class MeshViewerGui(Ogre.RenderTargetListener):
 
         ImGui.End()
 
-class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
-
-    def __init__(self, infile, rescfg):
-        OgreBites.ApplicationContext.__init__(self, "OgreMeshViewer")
-        OgreBites.InputListener.__init__(self)
+# chunk ids of the binary .skeleton format
+SKELETON_HEADER = 0x1000
+SKELETON_BLENDMODE = 0x1010
+SKELETON_BONE = 0x2000
+SKELETON_BONE_PARENT = 0x3000
+SKELETON_ANIMATION = 0x4000
+SKELETON_ANIMATION_BASEINFO = 0x4010
+SKELETON_ANIMATION_TRACK = 0x4100
+SKELETON_ANIMATION_TRACK_KEYFRAME = 0x4110
+
+def _skeleton_chunk(chunk_id, payload):
+    # the size includes the 6 byte header and all nested chunks
+    return struct.pack("<HI", chunk_id, 6 + len(payload)) + payload
+
+def _skeleton_string(s):
+    return s.encode("utf-8") + b"\n"
+
+def _skeleton_scale(scale):
+    # only written if it is not the default, the reader checks the chunk size for it
+    return struct.pack("<3f", *scale) if tuple(scale) != (1, 1, 1) else b""
+
+def export_skeleton(skel, path):
+    """write skel as version 1.8 binary .skeleton, like the SkeletonSerializer the bindings do not wrap
+
+    linked skeleton animation sources are not written.
+    """
+    bones = [skel.getBone(handle) for handle in range(skel.getNumBones())]
+    chunks = [_skeleton_chunk(SKELETON_BLENDMODE, struct.pack("<H", skel.getBlendMode()))]
+    for bone in bones:
+        q = bone.getInitialOrientation()
+        data = struct.pack("<H7f", bone.getHandle(), *bone.getInitialPosition(), q.x, q.y, q.z, q.w)
+        data += _skeleton_scale(bone.getInitialScale())
+        # unlike any other chunk, the size of a bone leaves out its name. The reader relies on it to detect the scale
+        chunks.append(struct.pack("<HI", SKELETON_BONE, 6 + len(data)) + _skeleton_string(bone.getName()) + data)
+    for bone in bones:
+        parent = bone.getParent()
+        if parent is not None:
+            parent = skel.getBone(parent.getName())
+            chunks.append(_skeleton_chunk(SKELETON_BONE_PARENT, struct.pack("<HH", bone.getHandle(), parent.getHandle())))
+
+    for i in range(skel.getNumAnimations()):
+        anim = skel.getAnimation(i)
+        payload = _skeleton_string(anim.getName()) + struct.pack("<f", anim.getLength())
+        if anim.getUseBaseKeyFrame():
+            payload += _skeleton_chunk(SKELETON_ANIMATION_BASEINFO,
+                                       _skeleton_string(anim.getBaseKeyFrameAnimationName()) +
+                                       struct.pack("<f", anim.getBaseKeyFrameTime()))
+        for bone in bones:
+            if not anim.hasNodeTrack(bone.getHandle()):
+                continue
+            track = anim.getNodeTrack(bone.getHandle())
+            keys = b""
+            for k in range(track.getNumKeyFrames()):
+                kf = track.getNodeKeyFrame(k)
+                q = kf.getRotation()
+                keys += _skeleton_chunk(SKELETON_ANIMATION_TRACK_KEYFRAME,
+                                        struct.pack("<8f", kf.getTime(), q.x, q.y, q.z, q.w, *kf.getTranslate()) +
+                                        _skeleton_scale(kf.getScale()))
+            payload += _skeleton_chunk(SKELETON_ANIMATION_TRACK, struct.pack("<H", bone.getHandle()) + keys)
+        chunks.append(_skeleton_chunk(SKELETON_ANIMATION, payload))
+
+    with open(path, "wb") as f:
+        f.write(struct.pack("<H", SKELETON_HEADER) + _skeleton_string("[Serializer_v1.80]"))
+        f.writelines(chunks)
+
+def _dir_bytes(path):
+    return sum(os.path.getsize(os.path.join(dirpath, fn)) for dirpath, _, filenames in os.walk(path) for fn in filenames)
+
+class ShaderCache:
+    """generated RTSS sources and GPU program microcode, kept between launches
+
+    there is one directory per render system and driver, as the microcode is
+    only valid for those. Once the cache exceeds max_bytes, the directories
+    that were used least recently are evicted first.
+    """
+    MICROCODE = "microcode.bin"
+    LAST_USED = "last_used"
+
+    def __init__(self, rootdir, max_bytes):
+        self.rootdir = rootdir
+        self.max_bytes = max_bytes
+        self.path = None
+        self.known = set()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(rendersystem):
+        caps = rendersystem.getCapabilities()
+        driver = f"{rendersystem.getName()} {caps.getDeviceName()} {caps.getDriverVersion().toString()}"
+        readable = "".join(c if c.isalnum() else "_" for c in rendersystem.getName())
+        return f"{readable}_{hashlib.sha1(driver.encode()).hexdigest()[:12]}"
+
+    def open(self, rendersystem):
+        """point the shader generator and the microcode cache to the directory of rendersystem"""
+        self.path = os.path.join(self.rootdir, self.key(rendersystem))
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, self.LAST_USED), "w", encoding="utf-8") as f:
+            f.write(time.strftime("%Y-%m-%dT%H:%M:%S"))
+        self.evict()
+
+        self.known = set(os.listdir(self.path))
+        OgreRTShader.ShaderGenerator.getSingleton().setShaderCachePath(self.path + "/")
+
+        gpm = Ogre.GpuProgramManager.getSingleton()
+        if not gpm.canGetCompiledShaderBuffer():
+            return
+        gpm.setSaveMicrocodesToCache(True)
+        microcode = os.path.join(self.path, self.MICROCODE)
+        if os.path.exists(microcode):
+            gpm.loadMicrocodeCache(Ogre.Root.openFileStream(microcode))
+            Ogre.LogManager.getSingleton().logMessage(
+                f"Shader cache: loaded {format_bytes(os.path.getsize(microcode))} of microcode")
+
+    def evict(self):
+        entries = []
+        for name in os.listdir(self.rootdir):
+            path = os.path.join(self.rootdir, name)
+            stamp = os.path.join(path, self.LAST_USED)
+            if os.path.isdir(path):
+                entries.append((os.path.getmtime(stamp) if os.path.exists(stamp) else 0, path, _dir_bytes(path)))
+
+        total = sum(e[2] for e in entries)
+        for _, path, nbytes in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == self.path:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= nbytes
+            Ogre.LogManager.getSingleton().logMessage(f"Shader cache: evicted {os.path.basename(path)}")
+
+        if total > self.max_bytes:
+            # only our own directory is left, start over
+            for fn in os.listdir(self.path):
+                if fn != self.LAST_USED:
+                    os.remove(os.path.join(self.path, fn))
+
+    def report(self):
+        """log the hits and misses since the last report"""
+        if self.path is None:
+            return
+        shadergen = OgreRTShader.ShaderGenerator.getSingleton()
+        programs = shadergen.getShaderCount(Ogre.GPT_VERTEX_PROGRAM) + shadergen.getShaderCount(Ogre.GPT_FRAGMENT_PROGRAM)
+
+        files = set(os.listdir(self.path))
+        # a program that was not found in the cache is written to it
+        misses = len(files - self.known)
+        hits = max(0, programs - misses)
+        self.known = files
+        self.misses += misses
+        self.hits += hits
+        Ogre.LogManager.getSingleton().logMessage(f"Shader cache: {hits} hits, {misses} misses "
+                                                  f"({self.hits} hits, {self.misses} misses in total)")
+
+    def close(self):
+        if self.path is None:
+            return
+        self.report()
+        gpm = Ogre.GpuProgramManager.getSingleton()
+        if gpm.getSaveMicrocodesToCache() and gpm.isCacheDirty():
+            gpm.saveMicrocodeCache(Ogre.Root.createFileStream(os.path.join(self.path, self.MICROCODE), Ogre.RGN_DEFAULT,
+                                                              True))
+        self.path = None
+
+class AssetCache:
+    """meshes converted by assimp, saved as .mesh, .skeleton and .material
+
+    entries are keyed by the content hash of the source file. The hash of a
+    path is remembered along with its size and mtime, so unchanged files do
+    not need to be hashed again. Once the cache exceeds max_bytes, the least
+    recently used entries are evicted first.
+    """
+    INDEX = "index.json"
+    ENTRY = "entry.json"
+
+    def __init__(self, rootdir, max_bytes):
+        self.rootdir = rootdir
+        self.max_bytes = max_bytes
+        self.index = {}
+        os.makedirs(rootdir, exist_ok=True)
+        path = os.path.join(rootdir, self.INDEX)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.index = json.load(f)
+
+    @staticmethod
+    def _stat(infile):
+        st = os.stat(infile)
+        return os.path.abspath(infile), st.st_size, st.st_mtime_ns
+
+    def known_digest(self, infile):
+        """content hash of infile, if it did not change since it was hashed, else None"""
+        path, size, mtime = self._stat(infile)
+        entry = self.index.get(path)
+        if entry is None or entry["size"] != size or entry["mtime"] != mtime:
+            return None
+        return entry["digest"]
+
+    def remember(self, infile, digest):
+        path, size, mtime = self._stat(infile)
+        self.index[path] = {"size": size, "mtime": mtime, "digest": digest}
+        tmp = os.path.join(self.rootdir, self.INDEX + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(tmp, os.path.join(self.rootdir, self.INDEX))
+
+    def lookup(self, digest):
+        """(directory, mesh name) of the entry or None"""
+        path = os.path.join(self.rootdir, digest)
+        entry = os.path.join(path, self.ENTRY)
+        if not os.path.exists(entry):
+            return None
+        with open(entry, encoding="utf-8") as f:
+            mesh = json.load(f)["mesh"]
+        # mark as recently used
+        os.utime(entry)
+        return path, mesh
+
+    def store(self, digest, mesh, report=None):
+        """save mesh with its skeleton and materials, returns False if it cannot be cached
+
+        report is called with (kind, name) of every resource, once it was written
+        """
+        report = report or (lambda kind, name: None)
+        lmgr = Ogre.LogManager.getSingleton()
+        rgm = Ogre.ResourceGroupManager.getSingleton()
+        matmgr = Ogre.MaterialManager.getSingleton()
+
+        materials = {}
+        for sm in mesh.getSubMeshes():
+            # getByName returns a null pointer, not None, for materials of other groups
+            if not matmgr.resourceExists(sm.getMaterialName(), mesh.getGroup()):
+                continue
+            mat = matmgr.getByName(sm.getMaterialName(), mesh.getGroup())
+            materials[mat.getName()] = mat
+            for tech in mat.getTechniques():
+                for p in tech.getPasses():
+                    for tus in p.getTextureUnitStates():
+                        name = tus.getTextureName()
+                        if name and not rgm.resourceExistsInAnyGroup(name):
+                            lmgr.logMessage(f"Not caching '{printable(mesh.getName())}', it has embedded textures")
+                            return False
+
+        names = [mesh.getName()] + ([mesh.getSkeletonName()] if mesh.hasSkeleton() else [])
+        if any(os.path.basename(n) != n for n in names):
+            return False
+
+        tmp = tempfile.mkdtemp(dir=self.rootdir)
+        try:
+            meshname = mesh.getName() + ".mesh"
+            Ogre.MeshSerializer().exportMesh(mesh, os.path.join(tmp, meshname))
+            report("Meshes", meshname)
+            if mesh.hasSkeleton():
+                export_skeleton(mesh.getSkeleton(), os.path.join(tmp, mesh.getSkeletonName()))
+                report("Skeletons", mesh.getSkeletonName())
+            if materials:
+                ser = Ogre.MaterialSerializer()
+                for mat in materials.values():
+                    ser.queueForExport(mat)
+                ser.exportQueued(os.path.join(tmp, mesh.getName() + ".material"))
+                for name in materials:
+                    report("Materials", name)
+            with open(os.path.join(tmp, self.ENTRY), "w", encoding="utf-8") as f:
+                json.dump({"mesh": meshname}, f)
+
+            path = os.path.join(self.rootdir, digest)
+            shutil.rmtree(path, ignore_errors=True)
+            os.replace(tmp, path)
+        except (RuntimeError, OSError):
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        self.evict(path)
+        return True
+
+    def evict(self, keep=None):
+        entries = []
+        for name in os.listdir(self.rootdir):
+            path = os.path.join(self.rootdir, name)
+            entry = os.path.join(path, self.ENTRY)
+            if os.path.isdir(path) and os.path.exists(entry):
+                entries.append((os.path.getmtime(entry), path, _dir_bytes(path)))
+
+        total = sum(e[2] for e in entries)
+        for _, path, nbytes in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            total -= nbytes
+            Ogre.LogManager.getSingleton().logMessage(f"Asset cache: evicted {os.path.basename(path)}")
+
+class ActivityListener(OgreBites.InputListener):
+    """passes all input on, but makes the viewer draw the next frames"""
+
+    def __init__(self, app):
+        OgreBites.InputListener.__init__(self)
+        self.app = app
+
+    def _touched(self):
+        self.app.request_redraw()
+        return False
+
+    def keyPressed(self, evt):
+        return self._touched()
+
+    def keyReleased(self, evt):
+        return self._touched()
+
+    def textInput(self, evt):
+        return self._touched()
+
+    def mouseMoved(self, evt):
+        return self._touched()
+
+    def mouseWheelRolled(self, evt):
+        return self._touched()
+
+    def mousePressed(self, evt):
+        return self._touched()
+
+    def mouseReleased(self, evt):
+        return self._touched()
+
+class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
+    headless = False
+
+    def __init__(self, infile, rescfg):
+        OgreBites.ApplicationContext.__init__(self, "OgreMeshViewer")
+        OgreBites.InputListener.__init__(self)
 
         self.infile = infile
-        if not self.infile:
+        if not self.infile and not self.headless:
             self.infile = askopenfilename()
-        if not self.infile:
+        if not self.infile and not self.headless:
             raise SystemExit("No file selected")
 
         self.filename = None
@@ -574,7 +3824,10 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
         self.entity = None
         self.attach_node = None
         self.highlight_mat = None
-        self.restart = False
+        self.do_restart = False
+        self.reload_pending = False
+        self.loader = None
+        self.load_started = time.perf_counter()
         self.axes_visible = False
         self.fixed_yaw_axis = 1
         self.default_tilt = Ogre.Degree(20)
@@ -582,13 +3835,48 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
         self.grid_visible = True
 
         self.active_controllers = {}
+        self.bvh_cache = {}
+        self.profiler = None
+        self.shader_cache_size = SHADER_CACHE_SIZE
+        self.shader_cache = None
+        self.asset_cache_size = ASSET_CACHE_SIZE
+        self.asset_cache = None
+        self.cache_location = None
+        self.cached_mesh = None
+        self.browser = None
+        self.batcher = None
+        self.batch_started = None
+
+        self.skinning_timer = None
+        self.hardware_skinning = False
+        self.skinning_srs = None
+        # frames until the entities notice the regenerated shaders
+        self.skinning_refresh = 0
+        self.use_pose_cache = False
+        self.pose_cache = None
+        self.max_texture_size = 0
+        self.screenshots = None
+        self.screenshot_scale = SCREENSHOT_SCALE
+
+        self.on_demand = False
+        self.idle_fps = IDLE_FPS
+        # frames to draw, even if nothing seems to change
+        self.redraw_frames = 0
+        self.last_drawn = 0
+        self.activity = None
+
+        self.watch = False
+        self.watcher = None
+        # watched path -> (kind, resource names)
+        self.watched = {}
 
         self.next_rendersystem = ""
         self.next_campose = None
 
-        # in case we want to show the file dialog
-        root = tk.Tk()
-        root.withdraw()
+        if not self.headless:
+            # in case we want to show the file dialog
+            root = tk.Tk()
+            root.withdraw()
 
     def keyPressed(self, evt):
         if evt.keysym.sym == OgreBites.SDLK_ESCAPE:
@@ -609,30 +3897,81 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
             self._toggle_wireframe_mode()
         elif evt.keysym.sym == OgreBites.SDLK_F1:
             self.gui.load_file()
+        elif evt.keysym.sym == OgreBites.SDLK_F2:
+            self.browser.show = not self.browser.show
         elif evt.keysym.sym == OgreBites.SDLK_F5:
             self.reload(keep_cam=True)
 
         return True
 
-    def mousePressed(self, evt):
-        vp = self.cam.getViewport()
-        ray = self.cam.getCameraToViewportRay(evt.x / vp.getActualWidth(), evt.y / vp.getActualHeight())
+    def _pick_triangle(self, entity, ray):
+        mesh = entity.getMesh()
+        bvh = self.bvh_cache.get(mesh.getName())
+        if bvh is None:
+            start = time.perf_counter()
+            bvh = TriangleBVH(mesh)
+            self.bvh_cache[mesh.getName()] = bvh
+            Ogre.LogManager.getSingleton().logMessage(
+                f"Built picking BVH for {bvh.count} triangles in {time.perf_counter() - start:.3f}s")
+
+        # intersect in mesh space. The direction is not normalised, so the distance stays in world units
+        inv = entity.getParentNode()._getFullTransform().inverse()
+        return bvh.intersect(inv * ray.getOrigin(), inv.linear() * ray.getDirection())
+
+    def pick(self, ray):
+        """(distance, movable, submesh index, triangle id) of the closest hit or None
+
+        the ray query only tests bounding boxes, so the entity hits are refined to the exact triangle
+        """
         self.ray_query.setRay(ray)
         self.ray_query.setSortByDistance(True)
+
+        best = None
+        best_distance = float("inf")
         for hit in self.ray_query.execute():
-            if evt.clicks == 2:
-                self.camman.setPivotOffset(ray.getPoint(hit.distance))
-                return True
-            
-            new_entity = hit.movable.castEntity()
+            if hit.distance > best_distance:
+                break
 
-            if self.attach_node and new_entity and evt.button == OgreBites.BUTTON_LEFT:
-                if self.entity is not None:
-                    self.entity.getParentSceneNode().showBoundingBox(False)
+            entity = hit.movable.castEntity()
+            if entity is None or np is None:
+                candidate = (hit.distance, hit.movable, -1, -1)
+            else:
+                tri_hit = self._pick_triangle(entity, ray)
+                if tri_hit is None:
+                    continue
+                candidate = (tri_hit[0], hit.movable, tri_hit[1], tri_hit[2])
+
+            if candidate[0] < best_distance:
+                best = candidate
+                best_distance = candidate[0]
+
+        return best
+
+    def mousePressed(self, evt):
+        vp = self.cam.getViewport()
+        ray = self.cam.getCameraToViewportRay(evt.x / vp.getActualWidth(), evt.y / vp.getActualHeight())
+
+        hit = self.pick(ray)
+        if hit is None:
+            return True
+
+        distance, movable, submesh, triangle = hit
+        if evt.clicks == 2:
+            self.camman.setPivotOffset(ray.getPoint(distance))
+            return True
 
-                self.entity = new_entity
-                self.entity.getParentSceneNode().showBoundingBox(True)
-            break
+        new_entity = movable.castEntity()
+
+        if self.attach_node and new_entity and evt.button == OgreBites.BUTTON_LEFT:
+            if self.entity is not None:
+                self.entity.getParentSceneNode().showBoundingBox(False)
+
+            self.entity = new_entity
+            self.entity.getParentSceneNode().showBoundingBox(True)
+
+        if submesh > -1 and new_entity is self.entity and evt.button == OgreBites.BUTTON_LEFT:
+            Ogre.LogManager.getSingleton().logMessage(f"Picked SubMesh #{submesh}, Triangle #{triangle}")
+            self.gui.show_pick(self.entity, submesh, triangle)
 
         return True
 
@@ -645,6 +3984,8 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
         return True
 
     def _toggle_bbox(self):
+        if self.entity is None:
+            return
         enode = self.entity.getParentSceneNode()
         enode.showBoundingBox(not enode.getShowBoundingBox())
 
@@ -657,7 +3998,9 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
             self.cam.setPolygonMode(Ogre.PM_SOLID)
 
     def _toggle_axes(self):
-        if not self.axes_visible:
+        if self.axes is None:
+            pass
+        elif not self.axes_visible:
             self.scn_mgr.addListener(self.axes)
         else:
             self.scn_mgr.removeListener(self.axes)
@@ -681,7 +4024,79 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
         else:
             self.cam.setProjectionType(Ogre.PT_PERSPECTIVE)
 
+    def _screenshot_path(self, suffix=""):
+        name = os.path.splitext(self.filename)[0]
+        stamp = time.strftime("%Y%m%d_%H%M%S") + f"_{int(time.time() * 1000) % 1000:03d}"
+        return os.path.join(self.filedir, f"screenshot_{name}_{stamp}{suffix}.png")
+
     def _save_screenshot(self):
+        if self.screenshots is None:
+            self._save_screenshot_sync()
+            return
+
+        win = self.getRenderWindow()
+        img = Ogre.Image(Ogre.PF_BYTE_RGB, win.getWidth(), win.getHeight())
+        self.cam.getViewport().setOverlaysEnabled(False)
+        win.update(False)
+        win.copyContentsToMemory(img.getPixelBox(), Ogre.RenderTarget.FB_AUTO)
+        self.cam.getViewport().setOverlaysEnabled(True)
+
+        writer = self.screenshots.open(self._screenshot_path(), win.getWidth(), win.getHeight())
+        self.screenshots.write(writer, image_array(img).copy())
+        self.screenshots.close(writer)
+
+    def _save_highres_screenshot(self):
+        """render screenshot_scale x screenshot_scale tiles of the window size and stitch them row by row"""
+        if self.screenshots is None:
+            Ogre.LogManager.getSingleton().logMessage("High resolution screenshots need numpy", Ogre.LML_CRITICAL)
+            return
+
+        scale = self.screenshot_scale
+        win = self.getRenderWindow()
+        w, h = win.getWidth(), win.getHeight()
+
+        texmgr = Ogre.TextureManager.getSingleton()
+        tex = texmgr.createManual("MeshViewer/Tiles", RGN_MESHVIEWER, Ogre.TEX_TYPE_2D, w, h, 0, Ogre.PF_BYTE_RGB,
+                                  Ogre.TU_RENDERTARGET)
+        rtt = tex.getBuffer().getRenderTarget()
+        vp = rtt.addViewport(self.cam)
+        vp.setOverlaysEnabled(False)
+        vp.setBackgroundColour(BACKGROUND_COLOUR)
+        vp.setMaterialScheme(self.cam.getViewport().getMaterialScheme())
+
+        # the frustum on the near plane, as Ogre computes it
+        cam = self.cam
+        if cam.getProjectionType() == Ogre.PT_ORTHOGRAPHIC:
+            top = cam.getOrthoWindowHeight() / 2
+        else:
+            top = cam.getNearClipDistance() * math.tan(cam.getFOVy().valueRadians() / 2)
+        right = top * cam.getAspectRatio()
+
+        path = self._screenshot_path(f"_{scale}x")
+        writer = self.screenshots.open(path, w * scale, h * scale)
+        img = Ogre.Image(Ogre.PF_BYTE_RGB, w, h)
+        # render textures only bind the overload with a source box
+        box = Ogre.Box(0, 0, w, h)
+        start = time.perf_counter()
+        try:
+            for ty in range(scale):
+                strip = np.empty((h, w * scale, 3), np.uint8)
+                for tx in range(scale):
+                    cam.setFrustumExtents(-right + 2 * right * tx / scale, -right + 2 * right * (tx + 1) / scale,
+                                          top - 2 * top * ty / scale, top - 2 * top * (ty + 1) / scale)
+                    rtt.update()
+                    rtt.copyContentsToMemory(box, img.getPixelBox(), Ogre.RenderTarget.FB_AUTO)
+                    strip[:, tx * w:(tx + 1) * w] = image_array(img)[:, :, :3]
+                self.screenshots.write(writer, strip)
+        finally:
+            cam.resetFrustumExtents()
+            texmgr.remove(tex.getHandle())
+            self.screenshots.close(writer)
+
+        Ogre.LogManager.getSingleton().logMessage(
+            f"Rendered {scale * scale} tiles of {w}x{h} in {time.perf_counter() - start:.3f}s")
+
+    def _save_screenshot_sync(self):
         name = os.path.splitext(self.filename)[0]
         outpath = os.path.join(self.filedir, f"screenshot_{name}_")
 
@@ -716,21 +4131,293 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
         else:
             self.camman.setYawPitchDist(0, self.default_tilt, diam)
 
+    def store_campose(self):
+        camnode = self.camman.getCamera()
+        # multiply to store a copy instead of a reference
+        self.next_campose = (camnode.getPosition()*1, camnode.getOrientation()*1)
+
     def reload(self, keep_cam=False):
-        if not app.infile:
+        if not self.infile:
             return
 
         if keep_cam:
-            camnode = self.camman.getCamera()
-            # multiply to store a copy instead of a reference
-            self.next_campose = (camnode.getPosition()*1, camnode.getOrientation()*1)
+            self.store_campose()
+
+        # we might be called while rendering, so defer to the next frameStarted
+        self.reload_pending = True
+
+    def restart(self):
+        """full restart, only needed to apply a different render system"""
+        self.load_started = time.perf_counter()
+        self.do_restart = True
+        self.getRoot().queueEndRendering()
+
+    def frameStarted(self, evt):
+        if self.reload_pending:
+            self.reload_pending = False
+            self.load_started = time.perf_counter()
+            if self.loader:
+                self.loader.cancel()
+                self.loader = None
+            self.gui.reset()
+            self.unload_asset()
+            self.load_asset()
+
+        if self.loader:
+            self.loader.step()
+
+            if self.loader.done:
+                if self.loader.cancelled:
+                    self.unload_asset()
+                    Ogre.LogManager.getSingleton().logMessage("Loading cancelled")
+                else:
+                    self.frame_asset()
+                    self.update_watched()
+                self.loader = None
+
+        if self.batcher:
+            self.update_batching(evt)
+
+        if self.pose_cache:
+            self.pose_cache.update(evt.timeSinceLastFrame)
+
+        if self.screenshots and self.screenshots.pending:
+            for writer in self.screenshots.poll():
+                lmgr = Ogre.LogManager.getSingleton()
+                if writer.failed:
+                    lmgr.logMessage(f"Saving screenshot failed: {writer.failed}", Ogre.LML_CRITICAL)
+                else:
+                    lmgr.logMessage(f"Screenshot saved to {os.path.normpath(writer.path)}")
+
+        if self.skinning_refresh:
+            self.skinning_refresh -= 1
+            if not self.skinning_refresh:
+                self._reevaluate_skinning()
+
+        if self.watcher and not self.loader and not self.reload_pending:
+            for path in self.watcher.poll():
+                self.reload_resource(path)
+
+        return OgreBites.ApplicationContext.frameStarted(self, evt)
+
+    def _skinned_entities(self):
+        entities = (e.castEntity() for e in self.scn_mgr.getMovableObjects("Entity").values())
+        return [e for e in entities if e.hasSkeleton() and e.getQueryFlags()]
+
+    def set_hardware_skinning(self, enabled):
+        """compare software skinning with RTSS hardware skinning"""
+        shadergen = OgreRTShader.ShaderGenerator.getSingleton()
+        scheme = OgreRTShader.ShaderGenerator.DEFAULT_SCHEME_NAME
+        render_state = shadergen.getRenderState(scheme)
+        if enabled and not self.skinning_srs:
+            self.skinning_srs = shadergen.createSubRenderState("SGX_HardwareSkinning")
+            render_state.addTemplateSubRenderState(self.skinning_srs)
+            self.prepare_hardware_skinning()
+        elif not enabled and self.skinning_srs:
+            render_state.removeSubRenderState(self.skinning_srs)
+            self.skinning_srs = None
+        self.hardware_skinning = enabled
+
+        shadergen.invalidateScheme(scheme)
+        # the shaders are generated on the next frame
+        self.skinning_refresh = 2
+        self.request_redraw(self.skinning_refresh + 1)
+
+    def prepare_hardware_skinning(self):
+        """let RTSS size the shaders to the bones and weights of the entities"""
+        factory = OgreRTShader.HardwareSkinningFactory.getSingleton()
+        for ent in self._skinned_entities():
+            factory.prepareEntityForSkinning(ent)
+
+    def _reevaluate_skinning(self):
+        # setting the material makes the entity check, whether its shaders do the skinning
+        for ent in self._skinned_entities():
+            for se in ent.getSubEntities():
+                se.setMaterial(se.getMaterial())
+
+    def stop_animations(self, entity):
+        controller_mgr = Ogre.ControllerManager.getSingleton()
+        for ctrl in self.active_controllers.values():
+            controller_mgr.destroyController(ctrl)
+        self.active_controllers = {}
+        states = entity.getAllAnimationStates()
+        if states is not None:
+            for astate in states.getAnimationStates().values():
+                astate.setEnabled(False)
+
+    def update_pose_cache(self, entity):
+        """the pose cache follows the inspected entity, while enabled"""
+        poses = self.pose_cache
+        if poses is not None and (not self.use_pose_cache or poses.entity is not entity):
+            poses.close()
+            self.pose_cache = None
+        if self.use_pose_cache and self.pose_cache is None and entity.hasSkeleton():
+            # the cache drives the bones alone
+            self.stop_animations(entity)
+            self.pose_cache = PoseCache(entity)
+
+    def set_batching(self, mode):
+        """rebuild the .scene by BATCHING_MODES[mode]"""
+        if self.batcher:
+            self.batcher.revert()
+            self.batcher = None
+        if mode == 0:
+            return
 
-        app.restart = True
-        app.getRoot().queueEndRendering()
+        stats = self.getRenderWindow().getStatistics()
+        summary = self.profiler.summary()
+        frame_ms = summary[0][0][1] if summary else 0
+        self.batcher = SceneBatcher(self.scn_mgr, mode, (stats.batchCount, stats.triangleCount, frame_ms))
+        self.batch_started = time.perf_counter()
+
+    def update_batching(self, evt):
+        batcher = self.batcher
+        if not batcher.done:
+            batcher.step()
+            if batcher.done:
+                Ogre.LogManager.getSingleton().logMessage(
+                    f"{BATCHING_MODES[batcher.mode]}: built {batcher.total} batches in "
+                    f"{time.perf_counter() - self.batch_started:.3f}s, {batcher.skipped} animated or unique entities kept")
+            return
+
+        stats = self.getRenderWindow().getStatistics()
+        batcher.measure(stats.batchCount, stats.triangleCount, evt.timeSinceLastFrame * 1000)
+
+    def set_watch(self, enabled):
+        self.watch = enabled
+        if not enabled and self.watcher:
+            self.watcher.close()
+            self.watcher = None
+        elif enabled and not self.watcher:
+            self.watcher = FileWatcher()
+            Ogre.LogManager.getSingleton().logMessage(f"Watching files for changes ({self.watcher.mode})")
+            self.update_watched()
+
+    def _userdata_file(self, name):
+        path = os.path.join(self.filedir, name)
+        return path if os.path.isfile(path) else None
+
+    def update_watched(self):
+        """watch the asset file and the skeletons, material scripts and textures it uses from UserData"""
+        if not self.watcher or not self.infile:
+            return
+
+        watched = {}
+        def add(path, kind, name):
+            if path:
+                watched.setdefault(os.path.abspath(path), (kind, set()))[1].add(name)
+
+        add(self.infile, "asset", self.filename)
+        for ent in self.scn_mgr.getMovableObjects("Entity").values():
+            ent = ent.castEntity()
+            mesh = ent.getMesh()
+            if mesh.hasSkeleton():
+                add(self._userdata_file(mesh.getSkeletonName()), "skeleton", mesh.getSkeletonName())
+            for se in ent.getSubEntities():
+                mat = se.getMaterial()
+                if mat.getGroup() != RGN_USERDATA:
+                    continue
+                add(self._userdata_file(mat.getOrigin()), "material", mat.getName())
+                for tech in mat.getTechniques():
+                    for p in tech.getPasses():
+                        for tus in p.getTextureUnitStates():
+                            for i in range(tus.getNumFrames()):
+                                name = tus.getFrameTextureName(i)
+                                add(self._userdata_file(name), "texture", name)
+
+        self.watched = watched
+        self.watcher.watch(watched)
+
+    def reload_resource(self, path):
+        """reload only what changed, keeping the camera and the UI"""
+        if path not in self.watched:
+            return
+        kind, names = self.watched[path]
+        lmgr = Ogre.LogManager.getSingleton()
+        lmgr.logMessage(f"Changed: {os.path.basename(path)}")
+        start = time.perf_counter()
+
+        if kind == "texture":
+            texmgr = Ogre.TextureManager.getSingleton()
+            for name in names:
+                tex = texmgr.getByName(name, RGN_USERDATA)
+                if tex:
+                    tex.reload()
+        elif kind == "material":
+            self._reload_material_script(path)
+        elif self.attach_node is None and self.filename.lower().endswith(".mesh") and kind in ("asset", "skeleton"):
+            self._reload_mesh(names if kind == "skeleton" else ())
+        else:
+            # converted or composed assets are only complete after a full load
+            self.reload(keep_cam=True)
+            return
+
+        lmgr.logMessage(f"Reloaded {kind} in {time.perf_counter() - start:.3f}s")
+        self.update_watched()
+
+    def _reload_material_script(self, path):
+        matmgr = Ogre.MaterialManager.getSingleton()
+        shadergen = OgreRTShader.ShaderGenerator.getSingleton()
+        with open(path, encoding="utf-8", errors="replace") as f:
+            names = [n.strip('"') for n in material_names(f.read())]
+
+        # the script defines them again
+        for name in names:
+            if matmgr.resourceExists(name, RGN_USERDATA):
+                shadergen.removeAllShaderBasedTechniques(name, RGN_USERDATA)
+                matmgr.remove(name, RGN_USERDATA)
+        stream = Ogre.ResourceGroupManager.getSingleton().openResource(os.path.basename(path), RGN_USERDATA)
+        matmgr.parseScript(stream, RGN_USERDATA)
+
+        # the sub entities still hold the removed materials
+        for ent in self.scn_mgr.getMovableObjects("Entity").values():
+            for se in ent.castEntity().getSubEntities():
+                if se.getMaterialName() in names:
+                    se.setMaterialName(se.getMaterialName(), RGN_USERDATA)
+
+    def _reload_mesh(self, skeletons=()):
+        controller_mgr = Ogre.ControllerManager.getSingleton()
+        for ctrl in self.active_controllers.values():
+            controller_mgr.destroyController(ctrl)
+        self.active_controllers = {}
+        self.bvh_cache = {}
+        # the pose cache holds the bones of the skeleton instance, which the reload replaces
+        if self.pose_cache:
+            self.pose_cache.close()
+            self.pose_cache = None
+
+        skelmgr = Ogre.SkeletonManager.getSingleton()
+        for name in skeletons:
+            skelmgr.getByName(name, RGN_USERDATA).reload()
+
+        self.gui.reset()
+        self.entity.getMesh().reload()
+        # the entity would only pick up the new mesh while rendering, but the UI snapshot
+        # is rebuilt from its sub entities and animation states before that
+        self.entity._initialise(True)
+
+        if self.hardware_skinning:
+            self.prepare_hardware_skinning()
+            self.skinning_refresh = 2
+
+    def _update_userdata_location(self):
+        if not self.infile:
+            return
 
-    def locateResources(self):
         self.filename = os.path.basename(self.infile)
-        self.filedir = os.path.dirname(self.infile)
+        filedir = os.path.dirname(self.infile)
+
+        rgm = Ogre.ResourceGroupManager.getSingleton()
+        if self.filedir is not None and self.filedir != filedir:
+            rgm.removeResourceLocation(self.filedir, RGN_USERDATA)
+        self.filedir = filedir
+
+        # explicitly add mesh location to be safe
+        if not rgm.resourceLocationExists(self.filedir, RGN_USERDATA):
+            rgm.addResourceLocation(self.filedir, "FileSystem", RGN_USERDATA)
+
+    def locateResources(self):
+        self.filedir = None
 
         rgm = Ogre.ResourceGroupManager.getSingleton()
         # ensure our resource group is separate, even with a local resources.cfg
@@ -747,20 +4434,26 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
                 for kind, loc in settings.items():
                     rgm.addResourceLocation(loc, kind, sec)
 
-        # explicitly add mesh location to be safe
-        if not rgm.resourceLocationExists(self.filedir, RGN_USERDATA):
-            rgm.addResourceLocation(self.filedir, "FileSystem", RGN_USERDATA)
+        # the thumbnail renderer starts without a file
+        if not rgm.resourceGroupExists(RGN_USERDATA):
+            rgm.createResourceGroup(RGN_USERDATA, False)
+        self._update_userdata_location()
 
         # add fonts to default resource group
         rgm.addResourceLocation(os.path.dirname(__file__) + "/fonts", "FileSystem", RGN_MESHVIEWER)
 
     def loadResources(self):
         rgm = Ogre.ResourceGroupManager.getSingleton()
+        if self.shader_cache_size:
+            # before any shader is generated
+            self.shader_cache = ShaderCache(self.getFSLayer().getWritablePath("shadercache"), self.shader_cache_size)
+            self.shader_cache.open(self.getRoot().getRenderSystem())
+
         rgm.initialiseResourceGroup(Ogre.RGN_INTERNAL)
         rgm.initialiseResourceGroup(RGN_MESHVIEWER)
 
         # only capture default group
-        self.logwin = LogWindow()
+        self.logwin = LogWindow(self.getFSLayer().getWritablePath("meshviewer_log.txt"))
         Ogre.LogManager.getSingleton().getDefaultLog().addListener(self.logwin)
         rgm.initialiseResourceGroup(RGN_USERDATA)
 
@@ -772,10 +4465,62 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
 
         OgreBites.ApplicationContext.setup(self)
 
-        self.restart = False
+        self.do_restart = False
         imgui_overlay = self.initialiseImGui()
         ImGui.GetIO().IniFilename = self.getFSLayer().getWritablePath("imgui.ini")
 
+        self.setup_scene()
+
+        # HiDPI
+        pixel_ratio = self.getDisplayDPI() / 96
+        Ogre.Overlay.OverlayManager.getSingleton().setPixelRatio(pixel_ratio)
+        ImGui.GetStyle().ScaleAllSizes(pixel_ratio)
+
+        imgui_overlay.addFont("UIText", RGN_MESHVIEWER)
+        self.logwin.font = imgui_overlay.addFont("LogText", RGN_MESHVIEWER)
+
+        imgui_overlay.show()
+
+        vp = self.getRenderWindow().addViewport(self.cam)
+        vp.setBackgroundColour(BACKGROUND_COLOUR)
+
+        if self.asset_cache_size:
+            self.asset_cache = AssetCache(self.getFSLayer().getWritablePath("assetcache"), self.asset_cache_size)
+
+        thumbdir = self.getFSLayer().getWritablePath("thumbcache")
+        service = ThumbnailService(ThumbnailCache(thumbdir, THUMBNAIL_CACHE_SIZE), THUMBNAIL_SIZE, self.rescfg,
+                                   self.getRoot().getRenderSystem().getName())
+        Ogre.ResourceGroupManager.getSingleton().addResourceLocation(thumbdir, "FileSystem", RGN_MESHVIEWER)
+        self.browser = AssetBrowser(service, RGN_MESHVIEWER)
+
+        self.profiler = FrameProfiler()
+        self.getRoot().addFrameListener(self.profiler)
+        self.scn_mgr.addRenderQueueListener(self.profiler)
+        self.skinning_timer = SkinningTimer(self)
+        self.scn_mgr.addListener(self.skinning_timer)
+        if np is not None:
+            self.screenshots = ScreenshotEncoder()
+
+        self.gui = MeshViewerGui(self)
+        self.getRenderWindow().addListener(self.gui)
+
+        # imgui needs warmup to render on first frame
+        # see https://github.com/ocornut/imgui/issues/1893#issuecomment-399102821
+        self.getRenderWindow().update(False)
+        self.getRoot().renderOneFrame()
+
+        self.load_asset()
+
+        if self.watch:
+            self.set_watch(True)
+
+        self.activity = ActivityListener(self)
+        self.input_dispatcher = OgreBites.InputListenerChain([self.activity, self.getImGuiInputListener(), self.camman,
+                                                              self])
+        self.addInputListener(self.input_dispatcher)
+
+    def setup_scene(self):
+        """scene, camera and lighting shared by the interactive and the headless viewer"""
         root = self.getRoot()
         scn_mgr = root.createSceneManager()
         scn_mgr.addRenderQueueListener(self.getOverlaySystem())
@@ -785,18 +4530,10 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
         self.mat_creator = MaterialCreator()
         Ogre.MeshManager.getSingleton().setListener(self.mat_creator)
 
-        # HiDPI
-        pixel_ratio = self.getDisplayDPI() / 96
-        Ogre.Overlay.OverlayManager.getSingleton().setPixelRatio(pixel_ratio)
-        ImGui.GetStyle().ScaleAllSizes(pixel_ratio)
-
         # for picking
         self.ray_query = scn_mgr.createRayQuery(Ogre.Ray())
-
-        imgui_overlay.addFont("UIText", RGN_MESHVIEWER)
-        self.logwin.font = imgui_overlay.addFont("LogText", RGN_MESHVIEWER)
-
-        imgui_overlay.show()
+        # the regions only know their bounds, picking uses the entities they were built from
+        self.ray_query.setQueryTypeMask(0xFFFFFFFF & ~Ogre.SceneManager.STATICGEOMETRY_TYPE_MASK)
 
         shadergen = OgreRTShader.ShaderGenerator.getSingleton()
         shadergen.addSceneManager(scn_mgr)  # must be done before we do anything with the scene
@@ -804,45 +4541,85 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
         scn_mgr.setAmbientLight((.1, .1, .1))
 
         self.highlight_mat = Ogre.MaterialManager.getSingleton().create("Highlight", RGN_MESHVIEWER)
-        self.highlight_mat.getTechniques()[0].getPasses()[0].setEmissive((1, 1, 0))
-
-        main_cam_name = "MeshViewer/Cam"
-        self.cam = scn_mgr.createCamera(main_cam_name)
+        p = self.highlight_mat.getTechniques()[0].getPasses()[0]
+        # added on top of the shaded submesh
+        p.setDiffuse((0, 0, 0, 1))
+        p.setAmbient((0, 0, 0))
+        p.setEmissive((0.6, 0.6, 0))
+        p.setSceneBlending(Ogre.SBT_ADD)
+        p.setDepthWriteEnabled(False)
+        p.setDepthFunction(Ogre.CMPF_LESS_EQUAL)
+        p.setDepthBias(1, 1)
+        self.highlight = SubMeshHighlight(scn_mgr, self.highlight_mat)
+
+        self.cam = scn_mgr.createCamera(MAIN_CAM_NAME)
         self.cam.setAutoAspectRatio(True)
         camnode = scn_mgr.getRootSceneNode().createChildSceneNode()
         camnode.attachObject(self.cam)
 
-        vp = self.getRenderWindow().addViewport(self.cam)
-        vp.setBackgroundColour((.3, .3, .3))
+        self.light = scn_mgr.createLight("MainLight")
+        self.light.setType(Ogre.Light.LT_DIRECTIONAL)
+        self.light.setSpecularColour(Ogre.ColourValue.White)
+        camnode.attachObject(self.light)
 
-        self.gui = MeshViewerGui(self)
-        self.getRenderWindow().addListener(self.gui)
+        self.grid_floor = GridFloor(1, scn_mgr.getRootSceneNode())
 
-        # imgui needs warmup to render on first frame
-        # see https://github.com/ocornut/imgui/issues/1893#issuecomment-399102821
-        self.getRenderWindow().update(False)
-        self.getRoot().renderOneFrame()
+        self.camman = OgreBites.CameraMan(camnode)
+        self.camman.setStyle(OgreBites.CS_ORBIT)
+
+        self.axes = None
+
+    def load_asset(self):
+        rgm = Ogre.ResourceGroupManager.getSingleton()
+        if self.cache_location:
+            rgm.removeResourceLocation(self.cache_location, RGN_USERDATA)
+        self.cache_location = None
+        self.cached_mesh = None
+
+        self._update_userdata_location()
+        rgm.initialiseResourceGroup(RGN_USERDATA)
 
         Ogre.LogManager.getSingleton().logMessage(f"Opening file: {os.path.normpath(self.infile)}")
 
+        self.loader = AssetLoader(self)
+
+    def use_cached_asset(self, path, meshname):
+        """load the converted asset from path, instead of running assimp"""
+        rgm = Ogre.ResourceGroupManager.getSingleton()
+        # nothing was loaded yet, so this only parses the scripts again
+        rgm.clearResourceGroup(RGN_USERDATA)
+        rgm.addResourceLocation(path, "FileSystem", RGN_USERDATA)
+        rgm.initialiseResourceGroup(RGN_USERDATA)
+        self.cache_location = path
+        self.cached_mesh = meshname
+        Ogre.LogManager.getSingleton().logMessage(f"Using cached conversion {os.path.basename(path)}")
+
+    def create_asset(self):
+        scn_mgr = self.scn_mgr
+
         if self.filename.lower().endswith(".scene"):
             self.attach_node = scn_mgr.getRootSceneNode().createChildSceneNode()
             self.attach_node.loadChildren(self.filename)
+        else:
+            self.attach_node = None
+            self.entity = scn_mgr.createEntity(self.cached_mesh or self.filename)
+            scn_mgr.getRootSceneNode().createChildSceneNode().attachObject(self.entity)
 
+    def frame_asset(self):
+        scn_mgr = self.scn_mgr
+
+        if self.attach_node:
             self.attach_node._update(True, False)
             diam = self.attach_node._getWorldAABB().getSize().length()
 
             for c in scn_mgr.getCameras().values():
-                if c.getName() == main_cam_name:
+                if c.getName() == MAIN_CAM_NAME:
                     continue
                 # the camera frustum of any contained camera blows the above heuristic
                 # so use the camera position instead
                 diam = c.getDerivedPosition().length()
                 break
         else:
-            self.attach_node = None
-            self.entity = scn_mgr.createEntity(self.filename)
-            scn_mgr.getRootSceneNode().createChildSceneNode().attachObject(self.entity)
             diam = self.entity.getBoundingBox().getSize().length()
 
         self.cam.setNearClipDistance(diam * 0.01)
@@ -850,55 +4627,1012 @@ class MeshViewer(OgreBites.ApplicationContext, OgreBites.InputListener):
         self.axes = Ogre.DefaultDebugDrawer()
         self.axes.setStatic(True)
         self.axes.drawAxes(Ogre.Affine3.IDENTITY, diam / 4)
-        self.axes_visible = False
+        if self.axes_visible:
+            scn_mgr.addListener(self.axes)
 
-        if len(scn_mgr.getMovableObjects("Light")) == 0:
-            # skip creating light, if scene already contains one
-            light = scn_mgr.createLight("MainLight")
-            light.setType(Ogre.Light.LT_DIRECTIONAL)
-            light.setSpecularColour(Ogre.ColourValue.White)
-            camnode.attachObject(light)
+        # skip our light, if scene already contains one
+        self.light.setVisible(len(scn_mgr.getMovableObjects("Light")) == 1)
 
-        self.grid_floor = GridFloor(diam, scn_mgr.getRootSceneNode())
-
-        self.camman = OgreBites.CameraMan(camnode)
-        self.camman.setStyle(OgreBites.CS_ORBIT)
+        self.grid_floor.set_scale(diam)
 
         # We need to set YawPitchDist to initial values, so "diam" is properly set
         self.camman.setYawPitchDist(0, self.default_tilt, diam)
         self.update_fixed_camera_yaw()
 
-        self.input_dispatcher = OgreBites.InputListenerChain([self.getImGuiInputListener(), self.camman, self])
-        self.addInputListener(self.input_dispatcher)
+        if self.hardware_skinning:
+            self.prepare_hardware_skinning()
+            self.skinning_refresh = 2
+
+        Ogre.LogManager.getSingleton().logMessage(f"Loading took {time.perf_counter() - self.load_started:.3f}s")
+
+    def unload_asset(self):
+        scn_mgr = self.scn_mgr
+        if self.shader_cache:
+            self.shader_cache.report()
+        shadergen = OgreRTShader.ShaderGenerator.getSingleton()
+        controller_mgr = Ogre.ControllerManager.getSingleton()
+
+        for ctrl in self.active_controllers.values():
+            controller_mgr.destroyController(ctrl)
+        self.active_controllers = {}
+        self.bvh_cache = {}
+
+        # the batches refer to the entities
+        self.set_batching(0)
+        if self.pose_cache:
+            self.pose_cache.close()
+            self.pose_cache = None
+
+        if self.axes_visible and self.axes:
+            scn_mgr.removeListener(self.axes)
+        self.axes = None
+
+        node = self.attach_node
+        if self.entity and not node:
+            node = self.entity.getParentSceneNode()
+
+        # drop the generated shaders of everything we are about to remove
+        for ent in scn_mgr.getMovableObjects("Entity").values():
+            for se in ent.castEntity().getSubEntities():
+                mat = se.getMaterial()
+                if mat.getGroup() == RGN_USERDATA:
+                    shadergen.removeAllShaderBasedTechniques(mat.getName(), RGN_USERDATA)
+
+        # anything but our own camera and light was created by the asset
+        for typename in ("Entity", "ParticleSystem", "BillboardSet"):
+            scn_mgr.destroyAllMovableObjectsByType(typename)
+        for typename, own in (("Light", self.light), ("Camera", self.cam)):
+            for name in list(scn_mgr.getMovableObjects(typename).keys()):
+                if name != own.getName():
+                    scn_mgr.destroyMovableObject(name, typename)
+
+        if node:
+            node.removeAndDestroyAllChildren()
+            scn_mgr.destroySceneNode(node)
+        # .scene files may contain node animations
+        scn_mgr.destroyAllAnimationStates()
+        scn_mgr.destroyAllAnimations()
+
+        self.entity = None
+        self.attach_node = None
+
+        # everything from the file location, including parsed scripts
+        Ogre.ResourceGroupManager.getSingleton().clearResourceGroup(RGN_USERDATA)
 
     def windowResized(self, win):
         # remember the resolution for next start
         self.getRoot().getRenderSystem().setConfigOption("Video Mode", f"{win.getWidth()} x {win.getHeight()}")
+        self.request_redraw()
+
+    def request_redraw(self, frames=3):
+        """draw the next frames in on demand mode. ImGui needs a few to settle after input"""
+        self.redraw_frames = max(self.redraw_frames, frames)
+
+    def busy(self):
+        """whether the picture changes without any input"""
+        gui = self.gui
+        jobs = (gui.analysis, gui.optimiser, gui.lod_generation)
+        return bool(self.active_controllers or self.loader or self.reload_pending or self.skinning_refresh
+                    or (self.pose_cache and (self.pose_cache.playing or not self.pose_cache.done))
+                    or (self.screenshots and self.screenshots.pending)
+                    or any(job is not None and not job.done for job in jobs)
+                    or (self.batcher and self.batcher.after is None)
+                    or self.profiler.recording is not None
+                    or (self.browser and self.browser.busy)
+                    or (self.watcher and self.watcher.pending)
+                    or self.scn_mgr.getMovableObjects("ParticleSystem"))
+
+    def _idle(self):
+        if not self.on_demand:
+            return False
+        if self.busy():
+            # so the results show up, once the work is done
+            self.request_redraw(2)
+            return False
+        if self.redraw_frames:
+            return False
+        return not self.idle_fps or time.perf_counter() - self.last_drawn < 1 / self.idle_fps
+
+    def run(self):
+        """Root.startRendering, but in on demand mode frames are only drawn when something changes"""
+        root = self.getRoot()
+        root.getRenderSystem()._initRenderTargets()
+        root.clearEventTimes()
+        root.queueEndRendering(False)
+
+        idle_since = None
+        while not root.endRenderingQueued():
+            if self._idle():
+                if idle_since is None:
+                    idle_since = time.perf_counter()
+                # input is dispatched to the ActivityListener, which requests the next frame
+                self.pollEvents()
+                time.sleep(IDLE_POLL_INTERVAL)
+                continue
+
+            if idle_since is not None:
+                self.profiler.idle(time.perf_counter() - idle_since)
+                # or animations and the frame stats would jump by the idle time
+                root.clearEventTimes()
+                idle_since = None
+
+            self.redraw_frames = max(0, self.redraw_frames - 1)
+            self.last_drawn = time.perf_counter()
+            if not root.renderOneFrame():
+                break
 
     def shutdown(self):
-        self.scn_mgr.removeListener(self.axes)
+        if self.axes:
+            self.scn_mgr.removeListener(self.axes)
         Ogre.LogManager.getSingleton().getDefaultLog().removeListener(self.logwin)
+        if self.profiler:
+            self.getRoot().removeFrameListener(self.profiler)
+        if self.skinning_timer:
+            self.scn_mgr.removeListener(self.skinning_timer)
+            self.skinning_timer = None
+        if self.screenshots:
+            self.screenshots.shutdown()
+            self.screenshots = None
+        if self.pose_cache:
+            self.pose_cache.close()
+            self.pose_cache = None
+        if self.shader_cache:
+            self.shader_cache.close()
+            self.shader_cache = None
+        if self.watcher:
+            self.watcher.close()
+            self.watcher = None
+        if self.browser:
+            self.browser.close()
+            self.browser = None
         OgreBites.ApplicationContext.shutdown(self)
 
         self.entity = None
         self.axes = None
 
 
+class ThumbnailRenderer(MeshViewer):
+    """renders assets into an offscreen texture, without any UI"""
+    headless = True
+
+    def __init__(self, rescfg, size, rendersystem=None, height=None):
+        MeshViewer.__init__(self, None, rescfg)
+        self.size = size
+        self.height = height or size
+        self.next_rendersystem = rendersystem
+        self.grid_visible = False
+        # the home directory of the workers is temporary
+        self.shader_cache_size = 0
+        self.rtt = None
+
+    def oneTimeConfig(self):
+        # never show the config dialog. Select the render system right away, as shutting down another one, that was
+        # never initialised, fails without a display
+        root = self.getRoot()
+        if self.next_rendersystem:
+            root.setRenderSystem(root.getRenderSystemByName(self.next_rendersystem))
+        elif not root.restoreConfig():
+            # GL3+ falls back to EGL without a display. Tiny has no render textures
+            root.setRenderSystem(root.getRenderSystemByName(HEADLESS_RENDERSYSTEM) or root.getAvailableRenderers()[0])
+        return True
+
+    def createWindow(self, name, w=0, h=0, miscParams=None):
+        # GL needs a context, even if we only render offscreen
+        return OgreBites.ApplicationContext.createWindow(self, name, 1, 1, {"hidden": "true"})
+
+    def windowResized(self, win):
+        pass
+
+    def setup(self):
+        OgreBites.ApplicationContext.setup(self)
+
+        self.setup_scene()
+
+        tex = Ogre.TextureManager.getSingleton().createManual("MeshViewer/Offscreen", RGN_MESHVIEWER, Ogre.TEX_TYPE_2D,
+                                                              self.size, self.height, 0, Ogre.PF_BYTE_RGBA,
+                                                              Ogre.TU_RENDERTARGET)
+        self.rtt = tex.getBuffer().getRenderTarget()
+        vp = self.rtt.addViewport(self.cam)
+        vp.setOverlaysEnabled(False)
+        vp.setBackgroundColour(BACKGROUND_COLOUR)
+        self.cam.setAspectRatio(self.size / self.height)
+
+    def load_now(self, infile):
+        """replace the current asset, without spreading the work over frames"""
+        self.unload_asset()
+
+        self.infile = infile
+        self.load_started = time.perf_counter()
+        self.load_asset()
+        self.loader.finish()
+        self.loader = None
+        self.frame_asset()
+
+    def render(self, infile, outfile):
+        self.load_now(infile)
+        self.rtt.update()
+        self.rtt.writeContentsToFile(outfile)
+
+    def render_sequence(self, infile, encoder, frames=0, fps=30, animation=None, orbit=True):
+        """render a turntable and/or an animation frame by frame, handing the pixels to encoder
+
+        the camera and animation time only depend on the frame index, so the output is reproducible.
+        returns the number of frames rendered.
+        """
+        self.load_now(infile)
+
+        astate = None
+        if animation:
+            if not self.entity or not self.entity.hasAnimationState(animation):
+                raise RuntimeError(f"no animation '{animation}' in {infile}")
+            astate = self.entity.getAnimationState(animation)
+            astate.setEnabled(True)
+            astate.setLoop(True)
+            frames = frames or max(1, math.ceil(astate.getLength() * fps))
+        frames = frames or SEQUENCE_FRAMES
+
+        # orbit around the up axis, starting from the framed view
+        camnode = self.camman.getCamera()
+        position, orientation = camnode.getPosition() * 1, camnode.getOrientation() * 1
+        axis = [0, 0, 0]
+        axis[1 if self.fixed_yaw_axis == -1 else self.fixed_yaw_axis] = 1
+        axis = Ogre.Vector3(*axis)
+
+        img = Ogre.Image(Ogre.PF_BYTE_RGB, self.rtt.getWidth(), self.rtt.getHeight())
+        # render textures only bind the overload with a source box
+        box = Ogre.Box(0, 0, img.getWidth(), img.getHeight())
+        for i in range(frames):
+            if orbit:
+                q = Ogre.Quaternion(Ogre.Radian(2 * math.pi * i / frames), axis)
+                camnode.setPosition(q * position)
+                camnode.setOrientation(q * orientation)
+            if astate:
+                astate.setTimePosition(i / fps)
+            self.rtt.update()
+            self.rtt.copyContentsToMemory(box, img.getPixelBox(), Ogre.RenderTarget.FB_AUTO)
+            # blocks while the encoders are behind, so only a few frames are in memory
+            encoder.submit(i, image_array(img).copy())
+
+        return frames
+
+class ThumbnailWorker:
+    def __init__(self, rescfg, size, rendersystem):
+        self.renderer = ThumbnailRenderer(rescfg, size, rendersystem)
+        # keep ogre.cfg and ogre.log of the workers apart from the interactive viewer and each other
+        self.homedir = tempfile.mkdtemp(prefix="ogre-meshviewer-")
+        self.renderer.getFSLayer().setHomePath(self.homedir)
+        self.renderer.initApp()
+
+    def process(self, task):
+        self.renderer.render(*task)
+
+    def close(self):
+        self.renderer.closeApp()
+        shutil.rmtree(self.homedir, ignore_errors=True)
+
+def _worker_main(worker_cls, initargs, tasks, results):
+    worker = worker_cls(*initargs)
+    try:
+        for task in iter(tasks.get, None):
+            try:
+                results.put((task, worker.process(task), None))
+            except RuntimeError as e:
+                results.put((task, None, str(e)))
+    finally:
+        worker.close()
+
+def run_workers(worker_cls, initargs, tasks, workers):
+    """process tasks by a pool of processes, each holding one long-lived worker_cls instance
+
+    yields (task, result, error) in order of completion. tasks must be unique.
+    """
+    if not tasks:
+        return
+
+    task_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue()
+    for task in tasks:
+        task_queue.put(task)
+
+    procs = []
+    for _ in range(max(1, min(workers, len(tasks)))):
+        task_queue.put(None)
+        p = multiprocessing.Process(target=_worker_main, args=(worker_cls, initargs, task_queue, result_queue))
+        p.start()
+        procs.append(p)
+
+    pending = set(tasks)
+    while pending:
+        try:
+            task, result, error = result_queue.get(timeout=1)
+        except queue.Empty:
+            if not any(p.is_alive() for p in procs):
+                # a worker crashed, report the tasks that were not processed
+                for task in pending:
+                    yield task, None, "worker process died"
+                break
+            continue
+
+        pending.discard(task)
+        yield task, result, error
+
+    for p in procs:
+        p.join()
+
+def render_thumbnails(indir, outdir, size, workers, rescfg=None, rendersystem=None):
+    tasks = []
+    for infile in find_assets(indir):
+        outfile = os.path.join(outdir, os.path.splitext(os.path.relpath(infile, indir))[0] + ".png")
+        if os.path.exists(outfile) and os.path.getmtime(outfile) >= os.path.getmtime(infile):
+            continue
+        os.makedirs(os.path.dirname(outfile), exist_ok=True)
+        tasks.append((infile, outfile))
+
+    print(f"Rendering {len(tasks)} thumbnails")
+
+    failed = 0
+    for done, (task, _, error) in enumerate(run_workers(ThumbnailWorker, (rescfg, size, rendersystem), tasks, workers)):
+        if error:
+            failed += 1
+            print(f"[{done + 1}/{len(tasks)}] {task[0]}: {error}")
+        else:
+            print(f"[{done + 1}/{len(tasks)}] {task[0]}")
+
+    return 1 if failed else 0
+
+class SequenceEncoder:
+    """encodes the frames of a sequence while the next ones render
+
+    PNGs are written by a pool of threads, as zlib releases the GIL. A video is piped to a
+    single ffmpeg process, which encodes on threads of its own. At most two frames per thread wait
+    in the queue, which bounds the memory of long sequences.
+    """
+
+    def __init__(self, pattern, width, height, workers, video=None, fps=30):
+        self.pattern = pattern
+        self.width = width
+        self.height = height
+        self.errors = []
+        self.proc = None
+
+        if video:
+            ffmpeg = shutil.which("ffmpeg")
+            if ffmpeg is None:
+                raise RuntimeError("writing a video needs ffmpeg on the PATH")
+            # yuv420p for compatible players, which needs an even size
+            self.proc = subprocess.Popen([ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+                                          "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+                                          "-pix_fmt", "yuv420p", video], stdin=subprocess.PIPE)
+            # frames must arrive in order
+            workers = 1
+
+        self.jobs = queue.Queue(2 * workers)
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(workers)]
+        for t in self.threads:
+            t.start()
+
+    def _run(self):
+        for index, pixels in iter(self.jobs.get, None):
+            try:
+                if self.proc:
+                    self.proc.stdin.write(pixels[:, :, :3].tobytes())
+                else:
+                    with PngWriter(self.pattern.format(index), self.width, self.height) as png:
+                        png.write_rows(pixels)
+            except (OSError, ValueError) as e:
+                self.errors.append(f"frame {index}: {e}")
+
+    def submit(self, index, pixels):
+        if self.errors:
+            raise RuntimeError(self.errors[0])
+        self.jobs.put((index, pixels))
+
+    def close(self):
+        """wait for all frames to be written"""
+        for _ in self.threads:
+            self.jobs.put(None)
+        for t in self.threads:
+            t.join()
+
+        if self.proc:
+            try:
+                self.proc.stdin.close()
+            except OSError as e:
+                self.errors.append(str(e))
+            if self.proc.wait() != 0:
+                self.errors.append(f"ffmpeg exited with {self.proc.returncode}")
+
+        if self.errors:
+            raise RuntimeError(self.errors[0])
+
+def export_sequence(infile, outdir, resolution, frames, fps, animation=None, orbit=True, video=False, workers=1,
+                    rescfg=None, rendersystem=None):
+    if np is None:
+        print("Exporting image sequences needs numpy")
+        return 1
+
+    width, height = resolution
+    name = os.path.splitext(os.path.basename(infile))[0]
+    os.makedirs(outdir, exist_ok=True)
+
+    renderer = ThumbnailRenderer(rescfg, width, rendersystem, height)
+    renderer.initApp()
+    start = time.perf_counter()
+    encoder = None
+    try:
+        encoder = SequenceEncoder(os.path.join(outdir, name + "_{:04d}.png"), width, height, workers,
+                                  os.path.join(outdir, name + ".mp4") if video else None, fps)
+        frames = renderer.render_sequence(infile, encoder, frames, fps, animation, orbit)
+        encoder.close()
+    except RuntimeError as e:
+        if encoder:
+            # let the encoder threads finish, only the first error is reported
+            try:
+                encoder.close()
+            except RuntimeError:
+                pass
+        print(f"{infile}: {e}")
+        return 1
+    finally:
+        renderer.closeApp()
+
+    print(f"Exported {frames} frames of {infile} to {outdir} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+class ThumbnailCache:
+    """rendered thumbnails, keyed by path, size and mtime of the asset
+
+    the least recently used thumbnails are evicted first, once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, rootdir, max_bytes):
+        self.rootdir = rootdir
+        self.max_bytes = max_bytes
+        os.makedirs(rootdir, exist_ok=True)
+        self.nbytes = _dir_bytes(rootdir)
+
+    def filename(self, infile):
+        st = os.stat(infile)
+        key = f"{os.path.abspath(infile)}|{st.st_size}|{st.st_mtime_ns}"
+        return hashlib.sha1(key.encode()).hexdigest() + ".png"
+
+    def lookup(self, infile):
+        """name of the cached thumbnail or None"""
+        name = self.filename(infile)
+        path = os.path.join(self.rootdir, name)
+        if not os.path.exists(path):
+            return None
+        # mark as recently used
+        os.utime(path)
+        return name
+
+    def added(self, name):
+        self.nbytes += os.path.getsize(os.path.join(self.rootdir, name))
+        if self.nbytes > self.max_bytes:
+            self.evict(name)
+
+    def evict(self, keep=None):
+        entries = []
+        for name in os.listdir(self.rootdir):
+            path = os.path.join(self.rootdir, name)
+            if name.endswith(".png"):
+                entries.append((os.path.getmtime(path), name, os.path.getsize(path)))
+
+        self.nbytes = sum(e[2] for e in entries)
+        # leave some headroom, so we do not evict on every new thumbnail
+        for _, name, nbytes in sorted(entries):
+            if self.nbytes <= self.max_bytes * 0.9:
+                break
+            if name == keep:
+                continue
+            os.remove(os.path.join(self.rootdir, name))
+            self.nbytes -= nbytes
+
+class ThumbnailService:
+    """renders thumbnails on request by a background ThumbnailWorker process"""
+
+    def __init__(self, cache, size, rescfg=None, rendersystem=None):
+        self.cache = cache
+        self.initargs = (rescfg, size, rendersystem)
+        self.tasks = None
+        self.results = None
+        self.proc = None
+        self.pending = set()
+
+    def request(self, infile):
+        if self.proc is None:
+            # forking would share the GL context and windows of the viewer
+            ctx = multiprocessing.get_context("spawn")
+            self.tasks = ctx.Queue()
+            self.results = ctx.Queue()
+            self.proc = ctx.Process(target=_worker_main,
+                                    args=(ThumbnailWorker, self.initargs, self.tasks, self.results),
+                                    daemon=True)
+            self.proc.start()
+
+        task = (infile, os.path.join(self.cache.rootdir, self.cache.filename(infile)))
+        self.pending.add(task)
+        self.tasks.put(task)
+
+    def poll(self):
+        """(infile, thumbnail name, error) of the finished requests"""
+        finished = []
+        while self.pending:
+            try:
+                task, _, error = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(task)
+            name = os.path.basename(task[1])
+            if not error:
+                self.cache.added(name)
+            finished.append((task[0], name, error))
+
+        if self.pending and not self.proc.is_alive():
+            # report the requests of a crashed worker, the next request starts a new one
+            finished += [(task[0], None, "worker process died") for task in self.pending]
+            self.pending = set()
+            self.proc = None
+        return finished
+
+    def close(self):
+        if self.proc is None:
+            return
+        # drop the outstanding requests, so we do not wait for them
+        try:
+            while True:
+                self.tasks.get_nowait()
+        except queue.Empty:
+            pass
+        self.tasks.put(None)
+        self.proc.join(5)
+        if self.proc.is_alive():
+            self.proc.terminate()
+        self.proc = None
+
+class AssetBrowser:
+    """thumbnail grid of the assets next to the current one
+
+    thumbnails are requested only for the visible cells and uploaded a few per frame.
+    """
+    UPLOADS_PER_FRAME = 4
+    MAX_TEXTURES = 512
+
+    def __init__(self, service, group):
+        self.service = service
+        self.group = group
+        self.show = False
+        self.cell_size = 96
+
+        self.directory = None
+        self.dir_mtime = None
+        self.files = []
+        # path -> "queued", "failed" or thumbnail name to upload
+        self.state = {}
+        # path -> texture, in order of use
+        self.textures = {}
+        self.uploads = []
+
+    def _list(self, directory):
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        if directory == self.directory and mtime == self.dir_mtime:
+            return
+        self.directory = directory
+        self.dir_mtime = mtime
+        self.files = []
+        with os.scandir(directory) as it:
+            for e in it:
+                if e.is_file() and e.name.lower().endswith(MESH_EXTENSIONS):
+                    self.files.append(e.path)
+        self.files.sort(key=lambda p: os.path.basename(p).lower())
+        # changed files get a new cache entry
+        self.state = {}
+
+    def _texture(self, path):
+        if path in self.textures:
+            tex = self.textures.pop(path)
+            self.textures[path] = tex
+            return tex
+
+        state = self.state.get(path)
+        if state is None:
+            try:
+                name = self.service.cache.lookup(path)
+            except OSError:
+                name = None
+            if name:
+                self.state[path] = name
+                self.uploads.append(path)
+            else:
+                self.state[path] = "queued"
+                self.service.request(path)
+        return None
+
+    def _upload(self):
+        texmgr = Ogre.TextureManager.getSingleton()
+        uploads, self.uploads = self.uploads[:self.UPLOADS_PER_FRAME], self.uploads[self.UPLOADS_PER_FRAME:]
+        for path in uploads:
+            name = self.state.get(path)
+            if name in (None, "queued", "failed") or path in self.textures:
+                continue
+            try:
+                self.textures[path] = texmgr.load(name, self.group, Ogre.TEX_TYPE_2D, 0)
+            except RuntimeError:
+                self.state[path] = "failed"
+
+        while len(self.textures) > self.MAX_TEXTURES:
+            path = next(iter(self.textures))
+            texmgr.remove(self.textures.pop(path).getHandle())
+            # still on disk, so it can be uploaded again without rendering
+            self.state.pop(path, None)
+
+    @property
+    def busy(self):
+        return self.show and bool(self.service.pending or self.uploads)
+
+    def update(self):
+        for infile, name, error in self.service.poll():
+            if infile not in self.state:
+                continue
+            if error:
+                Ogre.LogManager.getSingleton().logMessage(f"Thumbnail of {infile}: {error}")
+                self.state[infile] = "failed"
+            else:
+                self.state[infile] = name
+                self.uploads.append(infile)
+        self._upload()
+
+    def draw(self, directory):
+        if not self.show:
+            return
+
+        self.update()
+        self._list(directory)
+
+        ImGui.SetNextWindowSize(ImGui.ImVec2(ImGui.GetFontSize()*22, ImGui.GetFontSize()*30), ImGui.Cond_FirstUseEver)
+        self.show = ImGui.Begin("Browser", self.show)[1]
+        ImGui.Text(f"\uf07c {directory} ({len(self.files)})")
+
+        ImGui.BeginChild("thumbnails", ImGui.ImVec2(0, 0))
+        size = ImGui.ImVec2(self.cell_size, self.cell_size)
+        spacing = ImGui.GetStyle().ItemSpacing
+        columns = max(1, int((ImGui.GetContentRegionAvail().x + spacing.x) // (self.cell_size + spacing.x)))
+        rows = (len(self.files) + columns - 1) // columns
+
+        clicked = None
+        if ImGui.BeginTable("grid", columns, ImGui.TableFlags_SizingFixedSame):
+            clipper = ImGui.ImGuiListClipper()
+            clipper.Begin(rows)
+            while clipper.Step():
+                for row in range(clipper.DisplayStart, clipper.DisplayEnd):
+                    ImGui.TableNextRow()
+                    for path in self.files[row*columns:(row + 1)*columns]:
+                        ImGui.TableNextColumn()
+                        name = os.path.basename(path)
+                        tex = self._texture(path)
+                        if tex is not None:
+                            pressed = ImGui.ImageButton(path, tex.getHandle(), size)
+                        else:
+                            icon = "\uf071" if self.state.get(path) == "failed" else "\uf110"
+                            pressed = ImGui.Button(f"{icon}##{path}", size)
+                        if pressed:
+                            clicked = path
+                        if ImGui.IsItemHovered():
+                            ImGui.SetTooltip(name)
+                        ImGui.Text(name)
+            ImGui.EndTable()
+        ImGui.EndChild()
+        ImGui.End()
+
+        return clicked
+
+    def close(self):
+        texmgr = Ogre.TextureManager.getSingleton()
+        for tex in self.textures.values():
+            texmgr.remove(tex.getHandle())
+        self.textures = {}
+        self.service.close()
+
+class MeshInspector:
+    """loads assets without any render system, to describe them"""
+
+    def __init__(self, rescfg):
+        fslayer = Ogre.FileSystemLayer("OgreMeshViewer")
+
+        # no ogre.log, as there might be many of us
+        self.logmgr = Ogre.LogManager()
+        self.logmgr.createLog("MeshInspector", True, False, True)
+
+        if os.path.isdir(PLUGIN_DIR):
+            self.root = Ogre.Root("", "", "")
+            for name in ASSET_PLUGINS:
+                self.root.loadPlugin(os.path.join(PLUGIN_DIR, name))
+        else:
+            self.root = Ogre.Root(fslayer.getConfigFilePath("plugins.cfg"), "", "")
+        # meshes are only loaded to system memory
+        self.bufmgr = Ogre.DefaultHardwareBufferManager()
+        self.scn_mgr = self.root.createSceneManager()
+
+        self.mat_creator = MaterialCreator()
+        Ogre.MeshManager.getSingleton().setListener(self.mat_creator)
+
+        rgm = Ogre.ResourceGroupManager.getSingleton()
+        rgm.createResourceGroup(RGN_USERDATA, False)
+        if rescfg:
+            cfg = Ogre.ConfigFile()
+            cfg.loadDirect(rescfg)
+
+            for sec, settings in cfg.getSettingsBySection().items():
+                if not rgm.resourceGroupExists(sec):
+                    rgm.createResourceGroup(sec, False)
+                for kind, loc in settings.items():
+                    rgm.addResourceLocation(loc, kind, sec)
+        rgm.initialiseAllResourceGroups()
+        rgm.setWorldResourceGroupName(RGN_USERDATA) # used by .scene loader
+
+        self.filedir = None
+
+    def _locate(self, infile):
+        """make infile available in RGN_USERDATA, returns its resource name"""
+        rgm = Ogre.ResourceGroupManager.getSingleton()
+        rgm.clearResourceGroup(RGN_USERDATA)
+
+        filedir = os.path.dirname(infile)
+        if self.filedir is not None and self.filedir != filedir:
+            rgm.removeResourceLocation(self.filedir, RGN_USERDATA)
+        self.filedir = filedir
+        if not rgm.resourceLocationExists(filedir, RGN_USERDATA):
+            rgm.addResourceLocation(filedir, "FileSystem", RGN_USERDATA)
+        rgm.initialiseResourceGroup(RGN_USERDATA)
+        return os.path.basename(infile)
+
+    def process(self, infile):
+        filename = self._locate(infile)
+        if not filename.lower().endswith(".scene"):
+            return describe_mesh(Ogre.MeshManager.getSingleton().load(filename, RGN_USERDATA))
+
+        try:
+            self.scn_mgr.getRootSceneNode().createChildSceneNode().loadChildren(filename)
+            meshes = {}
+            for ent in self.scn_mgr.getMovableObjects("Entity").values():
+                mesh = ent.castEntity().getMesh()
+                meshes[mesh.getName()] = mesh
+            return {"meshes": [describe_mesh(m) for m in meshes.values()]}
+        finally:
+            self.scn_mgr.clearScene()
+
+    def close(self):
+        Ogre.ResourceGroupManager.getSingleton().clearResourceGroup(RGN_USERDATA)
+        self.scn_mgr = None
+        # the meshes still need the buffer manager while the root destroys them
+        self.root = None
+        self.bufmgr = None
+
+class AssetConverter(MeshInspector):
+    """converts a file by assimp into the AssetCache, for the AssetLoader of the viewer
+
+    every written resource is reported on progress as (kind, name)
+    """
+
+    def __init__(self, rescfg, cachedir, max_bytes, progress):
+        MeshInspector.__init__(self, rescfg)
+        # the default material of the converted submeshes, a render system would create it
+        Ogre.MaterialManager.getSingleton().initialise()
+        self.cache = AssetCache(cachedir, max_bytes)
+        self.progress = progress
+
+    def process(self, infile):
+        # the task of run_workers, with the content hash of the file
+        path, digest = infile
+        mesh = Ogre.MeshManager.getSingleton().load(self._locate(path), RGN_USERDATA)
+        return self.cache.store(digest, mesh, lambda kind, name: self.progress.put((kind, name)))
+
+def compacted_path(infile, outdir=None):
+    outfile = os.path.splitext(os.path.basename(infile))[0] + ".compact.mesh"
+    return os.path.join(outdir or os.path.dirname(infile), outfile)
+
+class MeshCompactor(MeshInspector):
+    """compact_mesh for the files of run_workers"""
+
+    def __init__(self, rescfg, outdir, thresholds):
+        MeshInspector.__init__(self, rescfg)
+        self.outdir = outdir
+        self.thresholds = thresholds
+
+    def process(self, infile):
+        filename = self._locate(infile)
+        if filename.lower().endswith(".scene"):
+            raise RuntimeError("only meshes can be compacted")
+        mesh = Ogre.MeshManager.getSingleton().load(filename, RGN_USERDATA)
+        return compact_mesh(mesh, compacted_path(infile, self.outdir), self.thresholds)
+
+def compact_assets(paths, workers, rescfg=None, outdir=None, thresholds=None):
+    files = []
+    for path in paths:
+        files += find_assets(path) if os.path.isdir(path) else [path]
+    tasks = [f for f in dict.fromkeys(files) if not f.lower().endswith(".scene")]
+
+    if outdir:
+        os.makedirs(outdir, exist_ok=True)
+
+    failed = 0
+    initargs = (rescfg, outdir, thresholds or COMPACT_THRESHOLDS)
+    for infile, result, error in run_workers(MeshCompactor, initargs, tasks, workers):
+        if error:
+            failed += 1
+            print(f"{infile}: ERROR {error}")
+            continue
+
+        rows, changes = result
+        print(f"{infile} -> {compacted_path(infile, outdir)}")
+        for change in changes:
+            print(f"  {change}")
+        for label, before, after, saved in format_compaction(rows):
+            print(f"  {label:<16} {before:>10} -> {after:>10} {saved:>5}")
+
+    return 1 if failed else 0
+
+class InfoCache:
+    """results of MeshInspector, keyed by path, size and mtime of the file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def _key(infile):
+        st = os.stat(infile)
+        return os.path.abspath(infile), st.st_size, st.st_mtime_ns
+
+    def get(self, infile):
+        path, size, mtime = self._key(infile)
+        entry = self.entries.get(path)
+        if entry is None or entry["size"] != size or entry["mtime"] != mtime:
+            return None
+        return entry["result"]
+
+    def put(self, infile, result):
+        path, size, mtime = self._key(infile)
+        self.entries[path] = {"size": size, "mtime": mtime, "result": result}
+        self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+
+def inspect_assets(paths, workers, rescfg=None, as_json=False, cache_path=None):
+    files = []
+    for path in paths:
+        files += find_assets(path) if os.path.isdir(path) else [path]
+    files = list(dict.fromkeys(files))
+
+    cache = InfoCache(cache_path)
+    results = {}
+    tasks = []
+    for infile in files:
+        result = cache.get(infile) if os.path.exists(infile) else None
+        if result is None:
+            tasks.append(infile)
+        else:
+            results[infile] = result
+
+    for infile, info, error in run_workers(MeshInspector, (rescfg,), tasks, workers):
+        results[infile] = {"error": error} if error else info
+        if os.path.exists(infile):
+            cache.put(infile, results[infile])
+    cache.save()
+
+    if as_json:
+        json.dump([dict(file=f, **results[f]) for f in files], sys.stdout, indent=1)
+        print()
+    else:
+        for f in files:
+            print(f"{f}: {summarize_info(results[f])}")
+
+    return 1 if any("error" in r for r in results.values()) else 0
+
+
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Ogre Mesh Viewer")
     parser.add_argument("infile", nargs="?", help="path to a ogre .mesh, ogre .scene or any format supported by assimp")
     parser.add_argument("-c", "--rescfg", help="path to the resources.cfg")
+    parser.add_argument("--rendersystem", help=f"render system to use, e.g. '{HEADLESS_RENDERSYSTEM}' without display")
+    parser.add_argument("--thumbnails", metavar="DIR", help="render a thumbnail of every file in DIR and exit")
+    parser.add_argument("--out", metavar="OUTDIR",
+                        help="output directory for --thumbnails (default: thumbnails) and --compact (default: next to the input)")
+    parser.add_argument("--size", type=int, default=256, help="thumbnail size in pixels")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    parser.add_argument("--sequence", metavar="OUTDIR",
+                        help="render a turntable or animation of infile as an image sequence to OUTDIR and exit")
+    parser.add_argument("--resolution", default="1280x720", metavar="WxH", help="frame size of --sequence")
+    parser.add_argument("--frames", type=int, default=0,
+                        help=f"number of frames of --sequence (default: the animation length or {SEQUENCE_FRAMES})")
+    parser.add_argument("--fps", type=int, default=30, help="animation frames per second of --sequence")
+    parser.add_argument("--animation", metavar="NAME", help="play the animation NAME in --sequence")
+    parser.add_argument("--no-orbit", action="store_true", help="keep the camera still in --sequence")
+    parser.add_argument("--video", action="store_true", help="write --sequence as a single .mp4 using ffmpeg")
+    parser.add_argument("--info", nargs="+", metavar="PATH", help="describe the given files or directories and exit")
+    parser.add_argument("--json", action="store_true", help="print --info as JSON")
+    parser.add_argument("--no-cache", action="store_true", help="ignore the --info result cache")
+    parser.add_argument("--compact", nargs="+", metavar="PATH",
+                        help="save the given meshes with packed vertex formats and 16 bit indices as *.compact.mesh and exit")
+    parser.add_argument("--shader-cache-size", type=int, default=SHADER_CACHE_SIZE >> 20, metavar="MB",
+                        help="size limit of the shader cache, 0 to disable it")
+    parser.add_argument("--clear-shader-cache", action="store_true", help="delete the cached shaders before starting")
+    parser.add_argument("--on-demand", action="store_true",
+                        help="only render when something changes, instead of continuously")
+    parser.add_argument("--idle-fps", type=float, default=IDLE_FPS,
+                        help="redraws per second while nothing changes with --on-demand, 0 to only redraw on changes")
+    parser.add_argument("--screenshot-scale", type=int, default=SCREENSHOT_SCALE, metavar="N",
+                        help="high resolution screenshots are N times the window size")
+    parser.add_argument("--max-texture-size", type=int, default=0, metavar="PX",
+                        help="reduce larger textures to this size at load time, by skipping their top mips")
+    parser.add_argument("--watch", action="store_true",
+                        help="reload the mesh, skeleton, materials and textures when their files change")
+    parser.add_argument("--asset-cache-size", type=int, default=ASSET_CACHE_SIZE >> 20, metavar="MB",
+                        help="size limit of the cache of assets converted by assimp, 0 to disable it")
+    for key in COMPACT_THRESHOLDS:
+        parser.add_argument(f"--max-{key}-error", type=float, default=COMPACT_THRESHOLDS[key],
+                            help=f"maximal {key} error per component for --compact")
     args = parser.parse_args()
+
+    if args.compact:
+        thresholds = {key: getattr(args, f"max_{key}_error") for key in COMPACT_THRESHOLDS}
+        raise SystemExit(compact_assets(args.compact, args.workers, args.rescfg, args.out, thresholds))
+
+    if args.info:
+        cache_path = None if args.no_cache else Ogre.FileSystemLayer("OgreMeshViewer").getWritablePath("info_cache.json")
+        raise SystemExit(inspect_assets(args.info, args.workers, args.rescfg, args.json, cache_path))
+
+    if args.thumbnails:
+        raise SystemExit(render_thumbnails(args.thumbnails, args.out or "thumbnails", args.size, args.workers,
+                                           args.rescfg, args.rendersystem))
+
+    if args.sequence:
+        if not args.infile:
+            parser.error("--sequence needs an infile")
+        try:
+            resolution = tuple(int(v) for v in args.resolution.lower().split("x"))
+        except ValueError:
+            resolution = ()
+        if len(resolution) != 2:
+            parser.error("--resolution must be given as WxH")
+        raise SystemExit(export_sequence(args.infile, args.sequence, resolution, args.frames, args.fps, args.animation,
+                                         not args.no_orbit, args.video, args.workers, args.rescfg, args.rendersystem))
+
+    if args.clear_shader_cache:
+        shutil.rmtree(Ogre.FileSystemLayer("OgreMeshViewer").getWritablePath("shadercache"), ignore_errors=True)
+
     app = MeshViewer(args.infile, args.rescfg)
+    if args.rendersystem:
+        app.next_rendersystem = args.rendersystem
+    app.shader_cache_size = args.shader_cache_size << 20
+    app.asset_cache_size = args.asset_cache_size << 20
+    app.watch = args.watch
+    app.max_texture_size = args.max_texture_size
+    app.screenshot_scale = args.screenshot_scale
+    app.on_demand = args.on_demand
+    app.idle_fps = args.idle_fps
 
     while True:  # allow auto restart
         try:
             app.initApp()
-            app.getRoot().startRendering()
+            app.run()
             app.closeApp()
         except RuntimeError as e:
             raise SystemExit(e) from e
 
-        if not app.restart: break
+        if not app.do_restart: break
@@ -0,0 +1,95 @@
+"""the .skeleton writer and the converted asset cache"""
+import os
+
+import pytest
+
+viewer = pytest.importorskip("ogre_mesh_viewer")
+Ogre = pytest.importorskip("Ogre")
+
+@pytest.fixture(scope="module")
+def inspector():
+    inspector = viewer.MeshInspector(None)
+    # the default material of the manual object
+    Ogre.MaterialManager.getSingleton().initialise()
+    yield inspector
+    inspector.close()
+
+def create_skeleton(name):
+    skel = Ogre.SkeletonManager.getSingleton().create(name, viewer.RGN_USERDATA, True)
+    root = skel.createBone("root", 0)
+    root.setPosition(1, 2, 3)
+    root.setScale(2, 2, 2)
+    arm = skel.createBone("arm", 1)
+    arm.setOrientation(Ogre.Quaternion(Ogre.Radian(0.5), Ogre.Vector3(0, 1, 0)))
+    root.addChild(arm)
+    skel.setBindingPose()
+    skel.setBlendMode(Ogre.ANIMBLEND_CUMULATIVE)
+
+    track = skel.createAnimation("wave", 2).createNodeTrack(1, arm)
+    for k in range(3):
+        kf = track.createNodeKeyFrame(k)
+        kf.setRotation(Ogre.Quaternion(Ogre.Radian(k * 0.3), Ogre.Vector3(1, 0, 0)))
+        kf.setTranslate(Ogre.Vector3(k, 0, 0))
+    kf.setScale(Ogre.Vector3(1, 3, 1))
+    skel.createAnimation("idle", 1).setUseBaseKeyFrame(True, 0.5, "wave")
+    return skel
+
+def load_skeleton(directory, name):
+    rgm = Ogre.ResourceGroupManager.getSingleton()
+    rgm.addResourceLocation(directory, "FileSystem", viewer.RGN_USERDATA)
+    try:
+        skelmgr = Ogre.SkeletonManager.getSingleton()
+        skelmgr.load(name, viewer.RGN_USERDATA)
+        return skelmgr.getByName(name, viewer.RGN_USERDATA)
+    finally:
+        rgm.removeResourceLocation(directory, viewer.RGN_USERDATA)
+
+def test_export_skeleton_loads_back(inspector, tmp_path):
+    viewer.export_skeleton(create_skeleton("written.skeleton"), str(tmp_path / "read.skeleton"))
+    skel = load_skeleton(str(tmp_path), "read.skeleton")
+
+    assert skel.getBlendMode() == Ogre.ANIMBLEND_CUMULATIVE
+    assert skel.getNumBones() == 2
+    root, arm = skel.getBone(0), skel.getBone(1)
+    assert tuple(root.getPosition()) == (1, 2, 3)
+    assert tuple(root.getScale()) == (2, 2, 2)
+    assert arm.getParent().getName() == "root"
+    assert arm.getOrientation().y == pytest.approx(0.2474, abs=1e-4)
+
+    wave = skel.getAnimation("wave")
+    assert wave.getLength() == 2
+    track = wave.getNodeTrack(1)
+    assert track.getNumKeyFrames() == 3
+    kf = track.getNodeKeyFrame(2)
+    assert tuple(kf.getTranslate()) == (2, 0, 0)
+    assert kf.getRotation().x == pytest.approx(0.2955, abs=1e-4)
+    assert tuple(kf.getScale()) == (1, 3, 1)
+    assert tuple(track.getNodeKeyFrame(1).getScale()) == (1, 1, 1)
+
+    idle = skel.getAnimation("idle")
+    assert idle.getUseBaseKeyFrame()
+    assert idle.getBaseKeyFrameAnimationName() == "wave"
+    assert idle.getBaseKeyFrameTime() == 0.5
+
+def test_store_skinned_mesh(inspector, tmp_path):
+    skel = create_skeleton("cached.skeleton")
+    obj = inspector.scn_mgr.createManualObject("skinned")
+    obj.begin("BaseWhite", Ogre.RenderOperation.OT_TRIANGLE_LIST, viewer.RGN_USERDATA)
+    for p in ((0, 0, 0), (1, 0, 0), (0, 1, 0)):
+        obj.position(*p)
+    obj.triangle(0, 1, 2)
+    obj.end()
+    mesh = obj.convertToMesh("skinned", viewer.RGN_USERDATA)
+    inspector.scn_mgr.destroyManualObject(obj)
+    mesh._notifySkeleton(skel)
+
+    cache = viewer.AssetCache(str(tmp_path / "cache"), 1 << 20)
+    try:
+        assert cache.store("digest", mesh)
+    finally:
+        Ogre.MeshManager.getSingleton().remove(mesh.getHandle())
+
+    path, meshname = cache.lookup("digest")
+    assert meshname == "skinned.mesh"
+    assert os.path.exists(os.path.join(path, meshname))
+    assert load_skeleton(path, "cached.skeleton").getNumBones() == 2
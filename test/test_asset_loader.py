@@ -0,0 +1,30 @@
+"""converting assets by assimp in a worker process, while the viewer keeps drawing frames"""
+import os
+
+import pytest
+
+viewer = pytest.importorskip("ogre_mesh_viewer")
+benchmark = pytest.importorskip("benchmark")
+
+RENDERSYSTEM = os.environ.get("OGRE_RENDERSYSTEM", viewer.HEADLESS_RENDERSYSTEM)
+CUBE = os.path.join(os.path.dirname(__file__), "cube.obj")
+
+def test_convert_in_background(tmp_path):
+    app = benchmark.BenchmarkViewer(CUBE, RENDERSYSTEM, 64, 64)
+    # MeshViewerGui refers to the application as module global
+    viewer.app = app
+    app.getFSLayer().setHomePath(str(tmp_path) + os.sep)
+    app.initApp()
+    try:
+        stages = set()
+        while app.loader is not None:
+            stages.add((app.loader.stage, app.loader.counts["Meshes"], app.loader.counts["Materials"]))
+            app.frame()
+
+        # the written resources are reported while converting
+        assert ("converting", 1, 1) in stages
+        assert app.cached_mesh == "cube.obj.mesh"
+        assert app.entity.getMesh().getName() == "cube.obj.mesh"
+        assert os.listdir(tmp_path / "assetcache")
+    finally:
+        app.closeApp()
@@ -0,0 +1,67 @@
+"""the process pool behind --thumbnails, --info and --compact"""
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+viewer = pytest.importorskip("ogre_mesh_viewer")
+
+class Squarer:
+    """a worker, without any Ogre root"""
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def process(self, task):
+        if task > self.limit:
+            raise RuntimeError(f"{task} is too large")
+        return task * task
+
+    def close(self):
+        pass
+
+def test_find_assets_is_sorted_and_recursive(tmp_path):
+    for name in ("b.mesh", "a.OBJ", "notes.txt", "sub/c.scene", "sub/d.material"):
+        (tmp_path / name).parent.mkdir(exist_ok=True)
+        (tmp_path / name).write_bytes(b"")
+    found = [p[len(str(tmp_path)) + 1:] for p in viewer.find_assets(str(tmp_path))]
+    assert [p.replace("\\", "/") for p in found] == ["a.OBJ", "b.mesh", "sub/c.scene"]
+
+def test_run_workers_reports_results_and_errors():
+    results = {task: (result, error) for task, result, error in viewer.run_workers(Squarer, (5,), [2, 3, 7], 2)}
+    assert results[2] == (4, None)
+    assert results[3] == (9, None)
+    assert results[7] == (None, "7 is too large")
+
+def test_run_workers_without_tasks():
+    assert not list(viewer.run_workers(Squarer, (5,), [], 2))
+
+def test_compact_packs_normals(tmp_path):
+    cube = os.path.join(os.path.dirname(__file__), "cube.obj")
+    out = subprocess.run([sys.executable, viewer.__file__, "--compact", cube, "--out", str(tmp_path), "-j", "1"],
+                         capture_output=True, text=True, check=True).stdout
+    assert "Normal: float3 -> int1010102n" in out
+    # 36 vertices of 16 instead of 24 bytes
+    assert "936 B ->      648 B" in out
+    assert (tmp_path / "cube.compact.mesh").exists()
+
+def test_thumbnails_render_offscreen(tmp_path):
+    cube = os.path.join(os.path.dirname(__file__), "cube.obj")
+    indir = tmp_path / "assets"
+    indir.mkdir()
+    shutil.copy(cube, indir)
+    subprocess.run([sys.executable, viewer.__file__, "--thumbnails", str(indir), "--out", str(tmp_path / "out"),
+                    "--size", "64", "-j", "1"], capture_output=True, text=True, check=True)
+    png = (tmp_path / "out" / "cube.png").read_bytes()
+    # width and height in the IHDR chunk
+    assert png[16:24] == (64).to_bytes(4, "big") * 2
+
+def test_compact_lists_lod_levels(tmp_path):
+    benchmark = pytest.importorskip("benchmark")
+    assert benchmark.generate_assets(str(tmp_path), [benchmark.Spec("lod", 400, 1, 0, 0, 2)], 1)
+    out = subprocess.run([sys.executable, viewer.__file__, "--compact", str(tmp_path / "lod.mesh"), "-j", "1"],
+                         capture_output=True, text=True, check=True).stdout
+    assert "LOD 1 SubMesh #0" in out
+    assert "LOD 2 SubMesh #0" in out
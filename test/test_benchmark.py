@@ -0,0 +1,26 @@
+"""regression detection of the benchmark suite"""
+import pytest
+
+benchmark = pytest.importorskip("benchmark")
+
+def result(**changes):
+    values = dict.fromkeys(benchmark.METRICS, 1.0)
+    values.update(changes)
+    return values
+
+def test_compare_needs_relative_and_absolute_slowdown():
+    baseline = {"verts_10k.mesh": result(frame_ms_p50=10, load_s=1)}
+
+    # 50% slower, 5 ms more
+    regressions = benchmark.compare({"verts_10k.mesh": result(frame_ms_p50=15, load_s=1)}, baseline, 0.2, 1)
+    assert regressions == [("verts_10k.mesh", "frame_ms_p50", 10, 15)]
+
+    # within the tolerance
+    assert not benchmark.compare({"verts_10k.mesh": result(frame_ms_p50=11, load_s=1)}, baseline, 0.2, 1)
+
+    # seconds are compared in ms, so 0.5 ms more load time stays below min_delta
+    assert not benchmark.compare({"verts_10k.mesh": result(frame_ms_p50=10, load_s=1.0005)}, baseline, 0, 1)
+    assert benchmark.compare({"verts_10k.mesh": result(frame_ms_p50=10, load_s=1.5)}, baseline, 0.2, 1)
+
+def test_compare_skips_new_benchmarks():
+    assert not benchmark.compare({"new.mesh": result(load_s=100)}, {}, 0.2, 1)
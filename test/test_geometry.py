@@ -0,0 +1,58 @@
+"""vertex cache and vertex fetch optimisation"""
+import pytest
+
+np = pytest.importorskip("numpy")
+viewer = pytest.importorskip("ogre_mesh_viewer")
+
+def grid_triangles(n):
+    quads = [(y * n + x, y * n + x + n, y * n + x + n + 1, y * n + x + 1) for y in range(n - 1) for x in range(n - 1)]
+    return np.array([t for a, b, c, d in quads for t in ((a, b, c), (a, c, d))], dtype=np.uint32)
+
+def test_simulate_fifo_evicts_oldest_entry():
+    # the second access of 0 misses, as 1 and 2 pushed it out
+    assert viewer.simulate_fifo(np.array([0, 1, 2, 0, 3, 0]), 2) == [0, 1, 2, 0, 3]
+    assert viewer.simulate_fifo(np.array([0, 1, 0, 1]), 2) == [0, 1]
+    assert viewer.simulate_fifo(np.array([], dtype=np.uint32), 4) == []
+
+def test_optimise_vertex_cache_reduces_misses():
+    tris = grid_triangles(32)
+    shuffled = tris[np.random.default_rng(1).permutation(len(tris))]
+
+    order = viewer.optimise_vertex_cache(shuffled, 32 * 32)
+    assert sorted(order.tolist()) == list(range(len(tris)))
+
+    before = len(viewer.simulate_fifo(shuffled.ravel(), 16))
+    after = len(viewer.simulate_fifo(shuffled[order].ravel(), 16))
+    assert after < before / 2
+
+def test_optimise_vertex_fetch_orders_by_first_use():
+    remap = viewer.optimise_vertex_fetch(np.array([5, 2, 5, 0]), 7)
+    assert remap[[5, 2, 5, 0]].tolist() == [0, 1, 0, 2]
+    # the unused vertices follow, in their old order
+    assert remap[[1, 3, 4, 6]].tolist() == [3, 4, 5, 6]
+
+def test_analyse_geometry_of_optimised_grid():
+    tris = grid_triangles(32)
+    pos = np.array([(x, 0, y) for y in range(32) for x in range(32)], dtype=np.float32)
+    metrics = viewer.analyse_geometry(tris[viewer.optimise_vertex_cache(tris, 32 * 32)], pos, 12)
+    # a regular grid approaches 0.5 misses per triangle with a large enough cache
+    assert 0.5 <= metrics["acmr"][32] < 1
+    assert metrics["atvr"] >= 1
+    # nothing overlaps in a flat grid
+    assert 1 <= metrics["overdraw"] < 1.5
+
+def test_cluster_vertices_within_target():
+    pos = np.array([(x, 0, y) for y in range(32) for x in range(32)], dtype=np.float32)
+    remap = viewer.cluster_vertices(pos, 256)
+    reps = np.unique(remap)
+    assert 64 < len(reps) <= 256
+    # every vertex is represented by a vertex of its own cluster
+    assert (remap[reps] == reps).all()
+    assert np.abs(pos - pos[remap]).max() < 4
+    assert (viewer.cluster_vertices(pos, 2000) == np.arange(len(pos))).all()
+
+def test_collapse_triangles_drops_degenerate_and_duplicates():
+    tris = np.array([(0, 1, 2), (0, 2, 3), (1, 2, 3), (3, 2, 1)], dtype=np.uint32)
+    # 3 merges into 2
+    collapsed = viewer.collapse_triangles(tris, np.array([0, 1, 2, 2]))
+    assert collapsed.tolist() == [[0, 1, 2]]
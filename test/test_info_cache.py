@@ -0,0 +1,52 @@
+"""--info and its result cache"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+viewer = pytest.importorskip("ogre_mesh_viewer")
+
+CUBE = os.path.join(os.path.dirname(__file__), "cube.obj")
+
+def test_info_cache_follows_size_and_mtime(tmp_path):
+    asset = tmp_path / "cube.mesh"
+    asset.write_bytes(b"1234")
+    cache_path = str(tmp_path / "info_cache.json")
+
+    cache = viewer.InfoCache(cache_path)
+    assert cache.get(str(asset)) is None
+    cache.put(str(asset), {"triangles": 12})
+    assert cache.get(str(asset)) == {"triangles": 12}
+    cache.save()
+
+    # results survive a restart
+    cache = viewer.InfoCache(cache_path)
+    assert cache.get(str(asset)) == {"triangles": 12}
+
+    # a changed file is described again
+    asset.write_bytes(b"12345")
+    assert cache.get(str(asset)) is None
+    asset.write_bytes(b"1234")
+    st = asset.stat()
+    os.utime(asset, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert cache.get(str(asset)) is None
+
+def test_info_cache_only_saves_changes(tmp_path):
+    cache_path = tmp_path / "info_cache.json"
+    viewer.InfoCache(str(cache_path)).save()
+    assert not cache_path.exists()
+    # no path disables the cache
+    viewer.InfoCache(None).save()
+
+def test_info_of_obj_through_assimp(tmp_path):
+    # a fresh process, as the Ogre root of the workers must find the codec plugins on its own
+    out = subprocess.run([sys.executable, viewer.__file__, "--info", CUBE, "--json", "--no-cache", "-j", "1"],
+                         cwd=tmp_path, capture_output=True, text=True, check=True).stdout
+    info, = json.loads(out)
+    assert info["file"] == CUBE
+    assert "error" not in info
+    assert len(info["submeshes"]) == 1
+    assert info["submeshes"][0]["vertices"]["count"] == 36
+    assert info["memory"]["total"] > 0
@@ -0,0 +1,101 @@
+"""the side panel snapshot and geometry memory of a real mesh"""
+import os
+
+import pytest
+
+viewer = pytest.importorskip("ogre_mesh_viewer")
+Ogre = pytest.importorskip("Ogre")
+
+CUBE = os.path.join(os.path.dirname(__file__), "cube.obj")
+
+@pytest.fixture(scope="module")
+def inspector():
+    inspector = viewer.MeshInspector(None)
+    # entities need the default material, which a render system would set up
+    Ogre.MaterialManager.getSingleton().initialise()
+    yield inspector
+    inspector.close()
+
+def load_cube(inspector):
+    # _locate clears the previous test's copy
+    return Ogre.MeshManager.getSingleton().load(inspector._locate(CUBE), viewer.RGN_USERDATA)
+
+def memory_rows(info, kind):
+    return [r for r in info.memory if r[1] == kind]
+
+def test_mesh_info_of_plain_mesh(inspector):
+    mesh = load_cube(inspector)
+    entity = inspector.scn_mgr.createEntity(mesh)
+    try:
+        info = viewer.MeshInfo(entity)
+    finally:
+        inspector.scn_mgr.destroyEntity(entity)
+
+    assert len(info.submeshes) == 1
+    assert info.skeleton is None
+    assert info.lod_labels == ("Base Mesh",)
+    assert memory_rows(info, "Indices") == [("SubMesh #0", "Indices", 36, 2, 72)]
+    assert info.memory_total == sum(r[4] for r in info.memory)
+    with pytest.raises(AttributeError):
+        info.title = "other"
+
+def test_mesh_info_of_poses_morphs_and_edges(inspector):
+    mesh = load_cube(inspector)
+    pose = mesh.createPose(1, "bulge")
+    pose.addVertex(0, Ogre.Vector3(0, 1, 0))
+
+    track = mesh.createAnimation("wave", 1).createVertexTrack(1, Ogre.VAT_MORPH)
+    for t in (0, 1):
+        buf = Ogre.HardwareBufferManager.getSingleton().createVertexBuffer(12, 36, Ogre.HBU_CPU_ONLY)
+        track.createVertexMorphKeyFrame(t).setVertexBuffer(buf)
+    mesh.buildEdgeList()
+
+    entity = inspector.scn_mgr.createEntity(mesh)
+    try:
+        info = viewer.MeshInfo(entity)
+    finally:
+        inspector.scn_mgr.destroyEntity(entity)
+
+    assert info.vertex_animation
+    assert [name for name, _ in info.animations] == ["wave"]
+    assert memory_rows(info, "Pose") == [("Pose bulge", "Pose", 36, 12, 432)]
+    assert memory_rows(info, "Morph") == [("Morph wave #1", "Morph", 2, 432, 864)]
+    # 12 triangles and the 18 edges of a closed cube
+    assert memory_rows(info, "Edge List")[0][2] == 30
+
+def test_generated_lod_levels(inspector):
+    obj = inspector.scn_mgr.createManualObject("grid")
+    obj.begin("BaseWhite", Ogre.RenderOperation.OT_TRIANGLE_LIST, viewer.RGN_USERDATA)
+    n = 32
+    for y in range(n):
+        for x in range(n):
+            obj.position(x, 0, y)
+    for y in range(n - 1):
+        for x in range(n - 1):
+            a = y * n + x
+            obj.quad(a, a + n, a + n + 1, a + 1)
+    obj.end()
+    mesh = obj.convertToMesh("grid.mesh", viewer.RGN_USERDATA)
+    inspector.scn_mgr.destroyManualObject(obj)
+
+    try:
+        generation = viewer.LodGeneration(mesh, "distance_sphere", "proportional", [(200, 0.75), (100, 0.5)])
+        generation.finish()
+        assert generation.apply()
+
+        assert mesh.getLodStrategy().getName() == "distance_sphere"
+        stats = viewer.lod_level_stats(mesh)
+        assert [s[0] for s in stats[1:]] == [100, 200]
+        triangles = [s[1] for s in stats]
+        assert triangles[0] == 2 * 31 * 31 and triangles[0] > triangles[1] > triangles[2]
+        assert stats[1][2] <= n * n // 2
+
+        entity = inspector.scn_mgr.createEntity(mesh)
+        try:
+            info = viewer.MeshInfo(entity)
+        finally:
+            inspector.scn_mgr.destroyEntity(entity)
+        assert len(info.lod_labels) == 3
+        assert [r[2] for r in memory_rows(info, "LOD Indices")] == [3 * t for t in triangles[1:]]
+    finally:
+        Ogre.MeshManager.getSingleton().remove(mesh.getHandle())
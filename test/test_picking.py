@@ -0,0 +1,66 @@
+"""triangle-accurate picking with the BVH"""
+import pytest
+
+np = pytest.importorskip("numpy")
+viewer = pytest.importorskip("ogre_mesh_viewer")
+
+class FakeMesh:
+    """stands in for an Ogre.Mesh, its submeshes are the triangle corners"""
+
+    def __init__(self, submeshes):
+        self.submeshes = submeshes
+
+    def getSubMeshes(self):
+        return self.submeshes
+
+@pytest.fixture(name="soup")
+def fixture_soup(monkeypatch):
+    monkeypatch.setattr(viewer, "read_submesh_triangles", lambda mesh, sm: sm)
+    rng = np.random.default_rng(7)
+    # small triangles scattered in a unit cube, in three submeshes
+    centres = rng.random((3, 500, 1, 3), dtype=np.float32)
+    return list(centres + rng.normal(0, 0.05, (3, 500, 3, 3)).astype(np.float32))
+
+def brute_force(submeshes, o, d):
+    best = None
+    for i, corners in enumerate(submeshes):
+        for j, (v0, v1, v2) in enumerate(corners.astype(np.float64)):
+            e1, e2 = v1 - v0, v2 - v0
+            p = np.cross(d, e2)
+            det = e1 @ p
+            if abs(det) < 1e-12:
+                continue
+            s = o - v0
+            u = s @ p / det
+            q = np.cross(s, e1)
+            v = d @ q / det
+            t = e2 @ q / det
+            if u >= 0 and v >= 0 and u + v <= 1 and t > 0 and (best is None or t < best[0]):
+                best = (t, i, j)
+    return best
+
+def test_bvh_matches_brute_force(soup):
+    bvh = viewer.TriangleBVH(FakeMesh(soup))
+    assert bvh.count == 1500
+
+    rng = np.random.default_rng(3)
+    hits = 0
+    for _ in range(50):
+        o = rng.random(3) * 3 - 1
+        d = rng.random(3) - o
+        d /= np.linalg.norm(d)
+        expected = brute_force(soup, o, d)
+        found = bvh.intersect(o, d)
+        if expected is None:
+            assert found is None
+            continue
+        hits += 1
+        assert found[1:] == expected[1:]
+        assert found[0] == pytest.approx(expected[0], rel=1e-4)
+    # the rays aim into the cube, so most of them hit
+    assert hits > 10
+
+def test_bvh_without_triangles(monkeypatch):
+    monkeypatch.setattr(viewer, "read_submesh_triangles", lambda mesh, sm: None)
+    bvh = viewer.TriangleBVH(FakeMesh([None]))
+    assert bvh.intersect((0, 0, 0), (0, 0, 1)) is None
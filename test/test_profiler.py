@@ -0,0 +1,11 @@
+"""frame time statistics"""
+import pytest
+
+viewer = pytest.importorskip("ogre_mesh_viewer")
+
+def test_percentile_nearest_rank():
+    ordered = list(range(1, 101))
+    assert viewer.percentile(ordered, 50) == 51
+    assert viewer.percentile(ordered, 95) == 96
+    assert viewer.percentile(ordered, 100) == 100
+    assert viewer.percentile([7], 99) == 7
@@ -0,0 +1,54 @@
+"""reloading a mesh in place, while its animation and pose cache are running"""
+import os
+
+import pytest
+
+pytest.importorskip("numpy")
+viewer = pytest.importorskip("ogre_mesh_viewer")
+benchmark = pytest.importorskip("benchmark")
+
+RENDERSYSTEM = os.environ.get("OGRE_RENDERSYSTEM", viewer.HEADLESS_RENDERSYSTEM)
+
+@pytest.fixture(scope="module")
+def app(tmp_path_factory):
+    assetdir = tmp_path_factory.mktemp("assets")
+    assert benchmark.generate_assets(str(assetdir), [benchmark.Spec("skinned", 400, 2, 4, 1, 0)], 1)
+
+    app = benchmark.BenchmarkViewer(str(assetdir / "skinned.mesh"), RENDERSYSTEM, 64, 64)
+    # MeshViewerGui refers to the application as module global
+    viewer.app = app
+    app.getFSLayer().setHomePath(str(tmp_path_factory.mktemp("home")))
+    app.initApp()
+    while app.loader is not None:
+        app.frame()
+    yield app
+    app.closeApp()
+
+def test_reload_mesh_with_pose_cache(app):
+    entity = app.entity
+    entity.getAnimationState("anim0").setEnabled(True)
+    app.use_pose_cache = True
+    app.update_pose_cache(entity)
+    assert app.pose_cache is not None
+    while not app.pose_cache.ready("anim0"):
+        app.frame()
+    app.pose_cache.play("anim0")
+    for _ in range(3):
+        app.frame()
+
+    app._reload_mesh(("skinned.skeleton",))
+    assert app.pose_cache is None
+    assert len(entity.getSubEntities()) == 2
+
+    # the animation states now belong to the new skeleton instance
+    astate = entity.getAnimationState("anim0")
+    astate.setEnabled(True)
+    assert astate.getLength() == pytest.approx(2)
+
+    app.update_pose_cache(entity)
+    for _ in range(3):
+        app.frame()
+
+    info = viewer.MeshInfo(entity)
+    assert len(info.submeshes) == 2
+    assert [name for name, _ in info.animations] == ["anim0"]
@@ -0,0 +1,109 @@
+"""streaming PNG output of the screenshots and image sequences"""
+import os
+import struct
+import subprocess
+import sys
+import zlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+viewer = pytest.importorskip("ogre_mesh_viewer")
+
+def read_png(path):
+    """(width, height, RGB rows) of a PNG with filter type 0 rows"""
+    with open(path, "rb") as f:
+        data = f.read()
+    assert data[:8] == b"\x89PNG\r\n\x1a\n"
+
+    offset = 8
+    idat = b""
+    kinds = []
+    while offset < len(data):
+        length, kind = struct.unpack_from(">I4s", data, offset)
+        body = data[offset + 8:offset + 8 + length]
+        crc, = struct.unpack_from(">I", data, offset + 8 + length)
+        assert crc == zlib.crc32(kind + body)
+        kinds.append(kind)
+        if kind == b"IHDR":
+            width, height, depth, colour = struct.unpack_from(">IIBB", body)
+            assert (depth, colour) == (8, 2)
+        elif kind == b"IDAT":
+            idat += body
+        offset += 12 + length
+    assert kinds[0] == b"IHDR" and kinds[-1] == b"IEND"
+
+    rows = np.frombuffer(zlib.decompress(idat), np.uint8).reshape(height, 1 + width * 3)
+    assert not rows[:, 0].any()
+    return width, height, rows[:, 1:].reshape(height, width, 3)
+
+def test_png_writer_strips(tmp_path):
+    rng = np.random.default_rng(5)
+    # RGBA like the copied framebuffer, the alpha is dropped
+    pixels = rng.integers(0, 256, (7, 5, 4), dtype=np.uint8)
+
+    path = str(tmp_path / "shot.png")
+    png = viewer.PngWriter(path, 5, 7)
+    png.write_rows(pixels[:3])
+    png.write_rows(pixels[3:])
+    png.close()
+
+    width, height, rgb = read_png(path)
+    assert (width, height) == (5, 7)
+    assert (rgb == pixels[:, :, :3]).all()
+
+def test_screenshot_encoder_in_background(tmp_path):
+    pixels = np.full((4, 6, 3), 200, dtype=np.uint8)
+    encoder = viewer.ScreenshotEncoder()
+    writer = encoder.open(str(tmp_path / "shot.png"), 6, 4)
+    encoder.write(writer, pixels)
+    encoder.close(writer)
+    assert encoder.pending == 1
+    encoder.shutdown()
+
+    assert encoder.poll() == [writer]
+    assert encoder.pending == 0
+    assert writer.failed is None
+    assert (read_png(writer.path)[2] == pixels).all()
+
+def test_png_writer_deletes_partial_file(tmp_path):
+    path = tmp_path / "shot.png"
+    png = viewer.PngWriter(str(path), 5, 7)
+    png.write_rows(np.zeros((3, 5, 3), dtype=np.uint8))
+    # rows of the wrong width
+    with pytest.raises(ValueError):
+        png.write_rows(np.zeros((4, 6, 3), dtype=np.uint8))
+    assert png._file.closed
+    assert not path.exists()
+
+    with pytest.raises(ValueError):
+        with viewer.PngWriter(str(path), 5, 7) as png:
+            raise ValueError("frame lost")
+    assert not path.exists()
+
+    with viewer.PngWriter(str(path), 5, 7) as png:
+        png.write_rows(np.zeros((7, 5, 3), dtype=np.uint8))
+    assert read_png(str(path))[:2] == (5, 7)
+
+def test_screenshot_encoder_reports_failed_writer(tmp_path):
+    encoder = viewer.ScreenshotEncoder()
+    writer = encoder.open(str(tmp_path / "shot.png"), 6, 4)
+    encoder.write(writer, np.zeros((4, 5, 3), dtype=np.uint8))
+    encoder.close(writer)
+    encoder.shutdown()
+
+    assert encoder.poll() == [writer]
+    assert writer.failed
+    assert not (tmp_path / "shot.png").exists()
+
+def test_export_sequence_orbits(tmp_path):
+    cube = os.path.join(os.path.dirname(__file__), "cube.obj")
+    subprocess.run([sys.executable, viewer.__file__, "--sequence", str(tmp_path), "--resolution", "64x48",
+                    "--frames", "3", cube], capture_output=True, text=True, check=True)
+    assert sorted(os.listdir(tmp_path)) == [f"cube_{i:04d}.png" for i in range(3)]
+
+    width, height, first = read_png(tmp_path / "cube_0000.png")
+    assert (width, height) == (64, 48)
+    # the cube covers part of the background and turns by a third with the camera
+    assert len(np.unique(first.reshape(-1, 3), axis=0)) > 1
+    assert (read_png(tmp_path / "cube_0001.png")[2] != first).any()
@@ -0,0 +1,33 @@
+"""the load-time texture size budget"""
+import pytest
+
+viewer = pytest.importorskip("ogre_mesh_viewer")
+Ogre = viewer.Ogre
+
+def image(fmt, width, height, mips=0):
+    img = Ogre.Image()
+    img.create(fmt, width, height, 1, 1, mips)
+    return img
+
+def test_cap_image_keeps_small_images():
+    img = image(Ogre.PF_BYTE_RGBA, 64, 32)
+    assert viewer.cap_image(img, 64) is img
+
+def test_cap_image_skips_top_mips():
+    capped = viewer.cap_image(image(Ogre.PF_BYTE_RGBA, 256, 128, 8), 64)
+    assert (capped.getWidth(), capped.getHeight()) == (64, 32)
+    # the skipped levels are gone, the smaller ones are kept
+    assert capped.getNumMipmaps() == 6
+
+def test_cap_image_scales_without_mips():
+    capped = viewer.cap_image(image(Ogre.PF_BYTE_RGBA, 300, 100), 64)
+    assert (capped.getWidth(), capped.getHeight()) == (300 >> 3, 100 >> 3)
+
+def test_cap_image_keeps_compressed_without_mips():
+    img = image(Ogre.PF_DXT1, 256, 256)
+    assert viewer.cap_image(img, 64) is img
+
+def test_texture_bytes_counts_mips_and_faces():
+    assert viewer.texture_bytes(4, 4, 1, 1, 0, Ogre.PF_BYTE_RGBA) == 64
+    # 4x4 + 2x2 + 1x1 pixels, for each face of a cube map
+    assert viewer.texture_bytes(4, 4, 1, 6, 2, Ogre.PF_BYTE_RGBA) == 6 * 4 * 21
@@ -0,0 +1,37 @@
+"""the thumbnail cache and the background renderer of the asset browser"""
+import os
+import time
+
+import pytest
+
+viewer = pytest.importorskip("ogre_mesh_viewer")
+
+CUBE = os.path.join(os.path.dirname(__file__), "cube.obj")
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = viewer.ThumbnailCache(str(tmp_path), 250)
+    for name, mtime in (("old.png", 1), ("used.png", 2), ("new.png", 3)):
+        (tmp_path / name).write_bytes(b"x" * 100)
+        os.utime(tmp_path / name, (mtime, mtime))
+        cache.added(name)
+    assert sorted(os.listdir(tmp_path)) == ["new.png", "used.png"]
+    assert cache.nbytes == 200
+
+def test_service_renders_into_cache(tmp_path):
+    cache = viewer.ThumbnailCache(str(tmp_path), 1 << 20)
+    assert cache.lookup(CUBE) is None
+
+    service = viewer.ThumbnailService(cache, 64)
+    try:
+        service.request(CUBE)
+        finished = []
+        deadline = time.monotonic() + 60
+        while not finished and time.monotonic() < deadline:
+            finished = service.poll()
+            time.sleep(0.05)
+    finally:
+        service.close()
+
+    assert finished == [(CUBE, cache.filename(CUBE), None)]
+    assert cache.lookup(CUBE) == cache.filename(CUBE)
+    assert cache.nbytes == os.path.getsize(tmp_path / cache.filename(CUBE))
@@ -0,0 +1,70 @@
+"""change detection of --watch"""
+import os
+import time
+
+import pytest
+
+from ogre_file_watcher import FileWatcher, material_names
+
+def wait_for(watcher, timeout=5):
+    end = time.perf_counter() + timeout
+    while time.perf_counter() < end:
+        changed = watcher.poll()
+        if changed:
+            return changed
+        time.sleep(0.01)
+    return []
+
+@pytest.fixture(name="watcher")
+def fixture_watcher():
+    watcher = FileWatcher()
+    yield watcher
+    watcher.close()
+
+def test_changes_are_debounced(watcher, tmp_path):
+    path = str(tmp_path / "cube.material")
+    watcher.watch([path])
+    # long enough, that a slow machine does not oversleep it
+    watcher.DEBOUNCE = 0.5
+
+    watcher._changed(path)
+    assert not watcher.poll()
+    time.sleep(watcher.DEBOUNCE / 2)
+    # a second write restarts the wait
+    watcher._changed(path)
+    time.sleep(watcher.DEBOUNCE / 2)
+    assert not watcher.poll()
+    time.sleep(watcher.DEBOUNCE)
+    assert watcher.poll() == [path]
+    assert not watcher.poll()
+
+def test_only_watched_files_are_reported(watcher, tmp_path):
+    path = str(tmp_path / "cube.mesh")
+    watcher.watch([path])
+    watcher._changed(str(tmp_path / "other.mesh"))
+    time.sleep(watcher.DEBOUNCE)
+    assert not watcher.poll()
+
+def test_writes_are_detected(watcher, tmp_path):
+    path = tmp_path / "cube.mesh"
+    path.write_bytes(b"old")
+    watcher.watch([str(path)])
+    # the polling fallback compares the mtime, which needs to move on
+    time.sleep(0.05)
+
+    path.write_bytes(b"new content")
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert wait_for(watcher) == [str(path)]
+
+    # replacing the file, like most editors do
+    tmp = tmp_path / "cube.mesh.tmp"
+    tmp.write_bytes(b"replaced")
+    os.replace(tmp, path)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10**9))
+    assert wait_for(watcher) == [str(path)]
+
+def test_material_names():
+    script = 'material Body\n{\n}\nmaterial "Quoted Name" : Base\n{\n}\n  material Child:Body {}\n'
+    assert material_names(script) == ["Body", '"Quoted Name"', "Child"]